@@ -0,0 +1,82 @@
+"""
+测量各入口在全新解释器中的导入耗时，并检查 import 时没有加载渲染模块、没有创建窗口。
+每个入口运行 --runs 次取中位数，每行输出一个 JSON。
+
+加 --check 作为启动时间回归检查：轻量入口加载了渲染模块、任何入口创建了窗口，
+或 `import vtkbox` 中位数超过 --max-ms 时以非零状态退出。
+
+    python benchmarks/bench_import_time.py [--runs 5] [--check] [--max-ms 500]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+_PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+visualizer = sys.modules.get('vtkbox.visualizer')
+print(json.dumps({{
+    'seconds': elapsed,
+    'modules': len(sys.modules),
+    'vtkmodules_all': 'vtkmodules.all' in sys.modules,
+    'rendering': 'vtkmodules.vtkRenderingCore' in sys.modules,
+    'window_created': visualizer is not None and visualizer._global_display_component is not None,
+}}))
+'''
+
+# (入口, 是否应保持轻量：不加载渲染模块)
+ENTRIES = [
+    ('import vtkbox', True),
+    ('from vtkbox import color', True),
+    ('from vtkbox import create_visualizer_subprocess', True),
+    ('from vtkbox.urdf2vtk import VRobot', False),
+    ('from vtkbox import VTKVisualizer, vtk_show', False),
+]
+
+
+def measure(statement: str, runs: int) -> dict:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get('PYTHONPATH')])))
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', _PROBE.format(statement=statement)], env=env,
+                                check=True, capture_output=True, text=True).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    result = dict(samples[-1])
+    result['seconds'] = statistics.median(s['seconds'] for s in samples)
+    return {'statement': statement, 'runs': runs, **result}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--check', action='store_true')
+    parser.add_argument('--max-ms', type=float, default=500)
+    args = parser.parse_args()
+
+    failures = []
+    for statement, light in ENTRIES:
+        result = measure(statement, args.runs)
+        print(json.dumps(result))
+        if result['vtkmodules_all']:
+            failures.append(f'{statement}: 加载了 vtkmodules.all')
+        if light and result['rendering']:
+            failures.append(f'{statement}: 加载了渲染模块')
+        if result['window_created']:
+            failures.append(f'{statement}: import 时创建了窗口')
+        if statement == 'import vtkbox' and result['seconds'] * 1e3 > args.max_ms:
+            failures.append(f'{statement}: {result["seconds"] * 1e3:.0f} ms 超过 {args.max_ms:.0f} ms')
+
+    if args.check and failures:
+        for failure in failures:
+            print(failure, file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+测量大点云构建 actor 时的峰值内存增量与耗时。每个用例在全新解释器中运行：
+先生成输入（不计入），再以 ru_maxrss 的增量作为构建 actor 期间额外占用的峰值内存。
+
+    python benchmarks/bench_ingest_memory.py [--points 50000000] [--cases xyzi_f32,structured_f32]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+_PROBE = '''
+import json, resource, time
+import numpy
+from vtkbox import actor_creator
+
+n, case = {n}, {case!r}
+rng = numpy.random.default_rng(0)
+chunk = 1 << 20
+if case == 'structured_f32':
+    points = numpy.zeros(n, dtype=[('x', 'f4'), ('y', 'f4'), ('z', 'f4'), ('intensity', 'f4'), ('ring', 'u2')])
+    for start in range(0, n, chunk):
+        block = points[start:start + chunk]
+        for field in ('x', 'y', 'z', 'intensity'):
+            block[field] = rng.random(len(block), dtype=numpy.float32)
+else:
+    dtype = numpy.float32 if case.endswith('f32') else numpy.float64
+    points = numpy.empty((n, 4 if case.startswith('xyzi') else 3), dtype=dtype)
+    for start in range(0, n, chunk):
+        points[start:start + chunk] = rng.random(points[start:start + chunk].shape, dtype=dtype)
+
+base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+if case.startswith('xyz_'):
+    actor = actor_creator.point_actor(points)
+else:
+    actor = actor_creator.point_actor_with_intensity(points)
+elapsed = time.perf_counter() - start
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{'input_mb': points.nbytes / (1 << 20), 'peak_extra_mb': (peak - base) / 1024,
+                  'seconds': elapsed}}))
+'''
+
+CASES = ['xyz_f32', 'xyz_f64', 'xyzi_f32', 'xyzi_f64', 'structured_f32']
+
+
+def run(n: int, case: str) -> dict:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get('PYTHONPATH')])))
+    # -c 会把工作目录放在 sys.path 首位，切到 root 保证导入的是本目录下的 vtkbox
+    process = subprocess.run([sys.executable, '-c', _PROBE.format(n=n, case=case)], env=env, cwd=root,
+                             capture_output=True, text=True)
+    result = {'case': case, 'points': n}
+    if process.returncode != 0:
+        result['error'] = process.stderr.strip().splitlines()[-1] if process.stderr.strip() else process.returncode
+        return result
+    result.update(json.loads(process.stdout.strip().splitlines()[-1]))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--points', type=int, default=50_000_000)
+    parser.add_argument('--cases', default=','.join(CASES))
+    args = parser.parse_args()
+    for case in args.cases.split(','):
+        print(json.dumps(run(args.points, case)), flush=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+从大点云文件构建 actor 的峰值内存与耗时：先在临时目录生成 KITTI .bin（分块写入，不计入），
+每个用例在全新解释器中运行，以 ru_maxrss 衡量峰值常驻内存。
+- fromfile: numpy.fromfile 整体读入后 add_points_with_intensity（原来的做法）
+- mmap_full: add_points_from_file 读取全部点
+- mmap_preview: add_points_from_file(max_points=...) 降采样预览
+
+    python benchmarks/bench_point_file.py [--points 125000000] [--max-points 2000000] [--cases mmap_preview]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy
+
+_PROBE = '''
+import json, resource, time
+import numpy
+from vtkbox.visualizer import VTKVisualizer
+
+path, case, max_points = {path!r}, {case!r}, {max_points}
+viz = VTKVisualizer(headless=True, size=(320, 240))
+base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+if case == 'fromfile':
+    points = numpy.fromfile(path, dtype=numpy.float32).reshape(-1, 4)
+    uid, actor = viz.add_points_with_intensity(points)
+else:
+    uid, actor = viz.add_points_from_file(path, max_points=max_points if case == 'mmap_preview' else None)
+elapsed = time.perf_counter() - start
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{'actor_points': actor.GetMapper().GetInput().GetNumberOfPoints(),
+                  'peak_extra_mb': (peak - base) / 1024, 'seconds': elapsed}}))
+'''
+
+CASES = ['fromfile', 'mmap_full', 'mmap_preview']
+
+
+def make_bin(path: str, n: int, chunk: int = 1 << 22):
+    rng = numpy.random.default_rng(0)
+    with open(path, 'wb') as f:
+        for start in range(0, n, chunk):
+            rng.random((min(chunk, n - start), 4), dtype=numpy.float32).tofile(f)
+
+
+def run(path: str, case: str, max_points: int) -> dict:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get('PYTHONPATH')])))
+    process = subprocess.run([sys.executable, '-c', _PROBE.format(path=path, case=case, max_points=max_points)],
+                             env=env, cwd=root, capture_output=True, text=True)
+    result = {'case': case, 'file_mb': os.path.getsize(path) / (1 << 20)}
+    if process.returncode != 0:
+        result['error'] = process.stderr.strip().splitlines()[-1] if process.stderr.strip() else process.returncode
+        return result
+    result.update(json.loads(process.stdout.strip().splitlines()[-1]))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--points', type=int, default=125_000_000)
+    parser.add_argument('--max-points', type=int, default=2_000_000)
+    parser.add_argument('--cases', default=','.join(CASES))
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory(prefix='vtkbox_bench_') as directory:
+        path = os.path.join(directory, 'cloud.bin')
+        make_bin(path, args.points)
+        for case in args.cases.split(','):
+            print(json.dumps(run(path, case, args.max_points)), flush=True)
+
+
+if __name__ == '__main__':
+    main()
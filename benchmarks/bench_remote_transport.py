@@ -0,0 +1,72 @@
+"""
+对比 VTKVisualizerRemote 两种参数传输方式的单帧延迟：
+pickle 整个 numpy 数组经 Queue 传输 vs 共享内存池只传描述。
+
+子进程只做参数重建与一次读取（模拟 update_points 的拷贝），不创建窗口，测的是传输本身。
+
+    python benchmarks/bench_remote_transport.py [--points 1000000] [--frames 50]
+"""
+import argparse
+import json
+import time
+from multiprocessing import Process, Queue, resource_tracker
+
+import numpy
+
+from vtkbox.visualizer_multiprocess import _SharedMemoryPool, _SharedMemoryReceiver
+
+
+def _consumer(request: Queue, release: Queue, reply: Queue):
+    receiver = _SharedMemoryReceiver(release)
+    while True:
+        message = request.get()
+        if message is None:
+            break
+        sent, args = message
+        args = tuple(receiver.unpack(a) for a in args)
+        float(args[0][-1, 0])  # 触碰数据
+        scratch = numpy.empty_like(args[0])
+        scratch[:] = args[0]
+        del args
+        reply.put(time.perf_counter() - sent)
+
+
+def run(points: int, frames: int, shared_memory: bool) -> dict:
+    request, release, reply = Queue(), Queue(), Queue()
+    pool = _SharedMemoryPool(release) if shared_memory else None
+    resource_tracker.ensure_running()
+    process = Process(target=_consumer, args=(request, release, reply))
+    process.start()
+    frame = numpy.random.rand(points, 3)
+    latency = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        payload = pool.pack(frame) if pool is not None else frame
+        request.put((start, (payload,)))
+        latency.append(reply.get())
+    request.put(None)
+    process.join()
+    if pool is not None:
+        pool.close()
+    latency = numpy.array(latency[1:]) * 1e3  # 去掉首帧（建段 / 页错误）
+    return {
+        'transport': 'shared_memory' if shared_memory else 'pickle',
+        'points': points,
+        'frames': frames,
+        'latency_ms_mean': float(latency.mean()),
+        'latency_ms_p50': float(numpy.percentile(latency, 50)),
+        'latency_ms_p95': float(numpy.percentile(latency, 95)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--points', type=int, default=1_000_000)
+    parser.add_argument('--frames', type=int, default=50)
+    args = parser.parse_args()
+    for shared_memory in (False, True):
+        print(json.dumps(run(args.points, args.frames, shared_memory)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,323 @@
+"""
+vtkbox 热点路径的基准套件，全部离屏运行，不需要显示器：
+point_actor / point_actor_with_intensity / line_actor 构建、点云空间索引的构建与查询、合成 URDF 的 VRobot 构建、set_q 吞吐、
+VTKVisualizerRemote 小/大参数调用的延迟与吞吐、典型场景的离屏帧时间。
+
+每个用例输出一行 JSON（case + params + 统计量，时间单位 ms）；--output 另存带环境信息的汇总文件，
+--compare 与之前的汇总文件逐项比较中位数，变慢超过 --max-regression 倍时以非零状态退出。
+
+    python benchmarks/bench_suite.py [--quick] [--only point_actor,set_q] [--output result.json]
+                                     [--compare baseline.json] [--max-regression 1.25]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vtkmodules.vtkCommonCore import vtkVersion  # noqa: E402
+from vtkmodules.vtkFiltersSources import vtkSphereSource  # noqa: E402
+from vtkmodules.vtkIOGeometry import vtkSTLWriter  # noqa: E402
+
+from vtkbox import actor_creator, create_visualizer_subprocess, VTKVisualizer  # noqa: E402
+from vtkbox.point_accumulator import PointAccumulator  # noqa: E402
+from vtkbox.point_index import PointIndex  # noqa: E402
+from vtkbox.urdf2vtk import VRobot, mesh_cache  # noqa: E402
+
+
+def _stats(samples: list[float]) -> dict:
+    """samples 为秒"""
+    ms = numpy.array(samples) * 1e3
+    return {
+        'repeat': len(ms),
+        'median_ms': float(numpy.median(ms)),
+        'min_ms': float(ms.min()),
+        'p95_ms': float(numpy.percentile(ms, 95)),
+    }
+
+
+def _timeit(func, repeat: int, warmup: int = 1) -> dict:
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return _stats(samples)
+
+
+def make_robot(root: str, n_links: int, resolution: int = 32) -> str:
+    """在 root 下生成 n_links 个 link 的串联机器人（球体 STL mesh），返回 urdf 路径"""
+    os.makedirs(os.path.join(root, 'meshes'), exist_ok=True)
+    for i in range(4):
+        sphere = vtkSphereSource()
+        sphere.SetRadius(0.05)
+        sphere.SetThetaResolution(resolution + i)
+        sphere.SetPhiResolution(resolution + i)
+        writer = vtkSTLWriter()
+        writer.SetFileName(os.path.join(root, 'meshes', f'm{i}.stl'))
+        writer.SetInputConnection(sphere.GetOutputPort())
+        writer.SetFileTypeToBinary()
+        writer.Write()
+    links = ''.join(
+        f'<link name="l{i}"><visual><origin xyz="0 0 0.05"/>'
+        f'<geometry><mesh filename="package://meshes/m{i % 4}.stl"/></geometry><material name="c"/></visual>'
+        f'<collision><geometry><cylinder length="0.1" radius="0.02"/></geometry></collision></link>'
+        for i in range(n_links))
+    joints = ''.join(
+        f'<joint name="j{i}" type="{"prismatic" if i % 3 == 0 else "revolute"}">'
+        f'<parent link="l{i - 1}"/><child link="l{i}"/><origin xyz="0 0 0.1" rpy="0.1 0 0.2"/>'
+        f'<axis xyz="0 {i % 2} {1 - i % 2}"/><limit lower="-3" upper="3" effort="1" velocity="1"/></joint>'
+        for i in range(1, n_links))
+    path = os.path.join(root, 'robot.urdf')
+    with open(path, 'w') as f:
+        f.write(f'<robot name="bench"><material name="c"><color rgba="0.8 0.3 0.2 1"/></material>'
+                f'{links}{joints}</robot>')
+    return path
+
+
+def bench_point_actor(sizes: list[int]):
+    for n in sizes:
+        points = numpy.random.rand(n, 3)
+        intensity_points = numpy.random.rand(n, 4)
+        repeat = 3 if n >= 5_000_000 else 10
+        yield 'point_actor', {'points': n}, _timeit(lambda: actor_creator.point_actor(points), repeat)
+        yield 'point_actor_with_intensity', {'points': n}, \
+            _timeit(lambda: actor_creator.point_actor_with_intensity(intensity_points), repeat)
+        if n <= 1_000_000:
+            # 已满的 20 帧累积缓冲区中追加一帧（同时淘汰最旧的一帧）
+            accumulator = PointAccumulator(20)
+            for _ in range(20):
+                accumulator.append(points)
+            yield 'accumulator_append', {'points': n, 'max_frames': 20}, \
+                _timeit(lambda: accumulator.append(points), repeat)
+
+
+def bench_line_actor(sizes: list[int]):
+    for n in sizes:
+        points = numpy.cumsum(numpy.random.rand(n, 3) - 0.5, axis=0)
+        yield 'line_actor', {'points': n}, _timeit(lambda: actor_creator.line_actor(points), 10)
+    # 1000 条 50 个顶点的折线合成一个 actor
+    lines = numpy.cumsum(numpy.random.rand(1000, 50, 3) - 0.5, axis=1)
+    offsets = numpy.arange(1000) * 50
+    flat = lines.reshape(-1, 3)
+    yield 'lines_actor', {'lines': 1000, 'points': 50_000}, \
+        _timeit(lambda: actor_creator.lines_actor(flat, offsets), 10)
+    actor = actor_creator.lines_actor(flat, offsets)
+    yield 'update_lines_actor', {'lines': 1000, 'points': 50_000}, \
+        _timeit(lambda: actor_creator.update_lines_actor(actor, flat, offsets), 10)
+
+
+def bench_point_query(sizes: list[int]):
+    for n in sizes:
+        points = numpy.random.rand(n, 3).astype(numpy.float32) * 100
+        polydata = actor_creator.point_actor(points).GetMapper().GetInput()
+        repeat = 3 if n >= 5_000_000 else 10
+
+        def build():
+            polydata.GetPoints().Modified()
+            index.locator()
+        index = PointIndex(polydata)
+        yield 'point_index_build', {'points': n}, _timeit(build, repeat)
+        yield 'point_nearest', {'points': n, 'k': 10}, _timeit(lambda: index.nearest((50, 50, 50), 10), 100)
+        # 穿过点云中心的视线，容差约为 0.1 个点间距
+        spacing = 100 / n ** (1 / 3)
+        yield 'point_ray_pick', {'points': n}, \
+            _timeit(lambda: index.intersect_segment((50, 50, -1000), (50, 50, 1000), spacing * 0.1), 100)
+        index.within_box((0, 1, 0, 1, 0, 1))
+        yield 'point_within_box', {'points': n, 'box': 0.01}, \
+            _timeit(lambda: index.within_box((40, 50, 40, 50, 40, 50)), 20)
+
+
+def bench_robot(robot_dir: str, n_links: int):
+    urdf = make_robot(robot_dir, n_links)
+
+    def cold_load(**kwargs):
+        # 进程内 mesh_cache 会让之后的构建不再解析 STL，每次构建前清空，测的是冷启动加载
+        mesh_cache.clear()
+        VRobot(urdf, robot_dir, **kwargs)
+    yield 'robot_load', {'links': n_links}, _timeit(cold_load, 5)
+    yield 'robot_load', {'links': n_links, 'load_workers': 4}, _timeit(lambda: cold_load(load_workers=4), 5)
+    cache = os.path.join(robot_dir, 'robot_cache.npz')
+    VRobot.compile(urdf, robot_dir, cache)
+    yield 'robot_load', {'links': n_links, 'cache': True}, _timeit(lambda: cold_load(cache=cache), 5)
+
+
+def bench_set_q(robot_dir: str, n_links: int, calls: int):
+    robot = VRobot(make_robot(robot_dir, n_links), robot_dir)
+    q = numpy.random.uniform(-1, 1, (calls, len(robot.positive_joints)))
+    samples = []
+    for row in q:
+        start = time.perf_counter()
+        robot.set_q(row)
+        samples.append(time.perf_counter() - start)
+    result = _stats(samples)
+    result['calls_per_s'] = len(samples) / sum(samples)
+    yield 'set_q', {'links': n_links}, result
+
+
+def _remote_case(viz, n: int, calls: int) -> dict:
+    points = numpy.random.rand(n, 3)
+    viz.add_points(points, name='bench').result()
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        viz.update_points('bench', points).result()
+        samples.append(time.perf_counter() - start)
+    result = _stats(samples)
+    # 吞吐：连续发出，只等待最后一次
+    start = time.perf_counter()
+    futures = [viz.update_points('bench', points) for _ in range(calls)]
+    futures[-1].result()
+    result['calls_per_s'] = calls / (time.perf_counter() - start)
+    viz.remove_actor('bench').result()
+    return result
+
+
+def bench_remote(sizes: list[int], calls: int):
+    """headless 子进程：测的是传输 + 子进程执行 update_points，不含渲染"""
+    viz = create_visualizer_subprocess(headless=True, size=(320, 240))
+    for n in sizes:
+        yield 'remote_update_points', {'points': n}, _remote_case(viz, n, calls)
+
+
+def _random_boxes(n: int) -> numpy.ndarray:
+    lower = numpy.random.uniform(-20, 20, (n, 3))
+    bounds = numpy.empty((n, 6))
+    bounds[:, 0::2] = lower
+    bounds[:, 1::2] = lower + numpy.random.uniform(0.1, 0.6, (n, 3))
+    return bounds
+
+
+def bench_offscreen(robot_dir: str, n_links: int, n_points: int, frames: int, size: tuple[int, int]):
+    # boxes 为 400 个独立 actor，instanced_boxes 为一个实例化 actor
+    scenes = {
+        'points': lambda viz: viz.add_points_with_intensity(numpy.random.rand(n_points, 4)),
+        'boxes': lambda viz: [viz.add_box(x, x + 0.5, y, y + 0.5, 0, 0.5, opacity=0.5)
+                              for x in range(20) for y in range(20)],
+        'instanced_boxes': lambda viz: viz.add_boxes(_random_boxes(20_000)),
+        'robot': lambda viz: viz.set_robot(make_robot(robot_dir, n_links), robot_dir),
+    }
+    for name, build in scenes.items():
+        viz = VTKVisualizer(headless=True, size=size)
+        build(viz)
+        viz.reset_camera()
+        buffer = numpy.empty((size[1], size[0], 3), dtype=numpy.uint8)
+        camera = viz._viz.renderer.GetActiveCamera()
+
+        def frame():
+            camera.Azimuth(1)
+            viz.mark_dirty()
+            viz.render_to_array(out=buffer)
+
+        params = {'scene': name, 'width': size[0], 'height': size[1]}
+        if name == 'points':
+            params['points'] = n_points
+        elif name == 'instanced_boxes':
+            params['boxes'] = 20_000
+        yield 'offscreen_frame', params, _timeit(frame, frames, warmup=2)
+        viz._viz.render_window.Finalize()
+
+
+def _key(case: str, params: dict) -> str:
+    return json.dumps([case, params], sort_keys=True)
+
+
+def _environment() -> dict:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=root, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    try:
+        from importlib.metadata import version
+        vtkbox_version = version('vtkbox')
+    except Exception:
+        vtkbox_version = None
+    return {
+        'vtkbox': vtkbox_version,
+        'commit': commit,
+        'vtk': vtkVersion.GetVTKVersion(),
+        'numpy': numpy.__version__,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def compare(results: list[dict], baseline_path: str, max_regression: float) -> list[str]:
+    with open(baseline_path) as f:
+        baseline = {_key(r['case'], r['params']): r for r in json.load(f)['results']}
+    regressions = []
+    for result in results:
+        old = baseline.get(_key(result['case'], result['params']))
+        if old is None:
+            continue
+        ratio = result['median_ms'] / old['median_ms']
+        print(json.dumps({'case': result['case'], 'params': result['params'], 'baseline_ms': old['median_ms'],
+                          'median_ms': result['median_ms'], 'ratio': ratio}))
+        if ratio > max_regression:
+            regressions.append(f'{result["case"]} {result["params"]}: {old["median_ms"]:.3f} ms -> '
+                               f'{result["median_ms"]:.3f} ms ({ratio:.2f}x)')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--quick', action='store_true', help='缩小规模，用于快速冒烟')
+    parser.add_argument('--only', default='',
+                        help='逗号分隔的用例组: point_actor,line_actor,point_query,robot,set_q,remote,offscreen')
+    parser.add_argument('--output', help='汇总结果写入的 JSON 文件')
+    parser.add_argument('--compare', help='作为基线的汇总 JSON 文件')
+    parser.add_argument('--max-regression', type=float, default=1.25)
+    args = parser.parse_args()
+
+    quick = args.quick
+    point_sizes = [10_000, 1_000_000] if quick else [10_000, 1_000_000, 10_000_000]
+    n_links = 10 if quick else 40
+    robot_dir = tempfile.mkdtemp(prefix='vtkbox_bench_')
+    groups = {
+        'point_actor': lambda: bench_point_actor(point_sizes),
+        'line_actor': lambda: bench_line_actor([1_000, 100_000]),
+        'point_query': lambda: bench_point_query(point_sizes),
+        'robot': lambda: bench_robot(robot_dir, n_links),
+        'set_q': lambda: bench_set_q(robot_dir, n_links, 200 if quick else 2000),
+        'offscreen': lambda: bench_offscreen(robot_dir, n_links, 100_000 if quick else 1_000_000,
+                                             5 if quick else 30, (640, 480) if quick else (1280, 720)),
+        'remote': lambda: bench_remote([1_000, 1_000_000], 20 if quick else 100),
+    }
+    selected = [name for name in args.only.split(',') if name] or list(groups)
+    unknown = set(selected) - set(groups)
+    if unknown:
+        parser.error(f'未知的用例组: {", ".join(sorted(unknown))}')
+
+    results = []
+    for name in selected:
+        for case, params, stats in groups[name]():
+            result = {'case': case, 'params': params, **stats}
+            results.append(result)
+            print(json.dumps(result), flush=True)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'environment': _environment(), 'results': results}, f, indent=2)
+    if args.compare:
+        regressions = compare(results, args.compare, args.max_regression)
+        if regressions:
+            for regression in regressions:
+                print(regression, file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,29 @@
-from .urdf2vtk import VRobot
+import importlib
+
 from . import color
-from . import actor_creator
-from .visualizer import VTKVisualizer, vtk_show
-from .visualizer_multiprocess import create_visualizer_subprocess, VTKVisualizerRemote
\ No newline at end of file
+
+# 渲染相关部分在第一次访问时才导入，import vtkbox 只加载 numpy 与 vtkCommonCore
+_LAZY_ATTRS = {
+    'VRobot': '.urdf2vtk',
+    'actor_creator': '.actor_creator',
+    'VTKVisualizer': '.visualizer',
+    'vtk_show': '.visualizer',
+    'create_visualizer_subprocess': '.visualizer_multiprocess',
+    'VTKVisualizerRemote': '.visualizer_multiprocess',
+}
+
+__all__ = ['color', *_LAZY_ATTRS]
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(module_name, __name__)
+    value = module if module_name == f'.{name}' else getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
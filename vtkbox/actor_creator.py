@@ -1,97 +1,476 @@
 import numpy
-from vtkmodules import all as vtk
-from vtkmodules.util.numpy_support import numpy_to_vtk
+from numpy.lib.recfunctions import structured_to_unstructured
+from vtkmodules.vtkCommonCore import vtkDataArray, vtkDoubleArray, vtkIdTypeArray, vtkPoints, vtkUnsignedCharArray
+from vtkmodules.vtkCommonDataModel import vtkCellArray, vtkPolyData
+from vtkmodules.vtkFiltersGeneral import vtkVertexGlyphFilter
+from vtkmodules.vtkFiltersSources import vtkCubeSource, vtkPolyLineSource
+from vtkmodules.vtkIOGeometry import vtkSTLReader
+from vtkmodules.vtkRenderingCore import vtkActor, vtkGlyph3DMapper, vtkPointGaussianMapper, vtkPolyDataMapper
+# 注册 OpenGL 对象工厂，之后创建的 mapper / actor 才是可渲染的 OpenGL 实现
+import vtkmodules.vtkRenderingOpenGL2  # noqa: F401
+from vtkmodules.util.numpy_support import create_vtk_array, get_vtk_array_type, numpy_to_vtk, vtk_to_numpy
 
 from .color import vtk_color_from_intensity
 
 
-def point_actor(points: vtk.vtkPoints | list | numpy.ndarray,
+_INTENSITY_FIELDS = ('intensity', 'i', 'remission', 'reflectance')
+
+
+def xyz_view(points: list | numpy.ndarray) -> numpy.ndarray:
+    """
+    不拷贝地取出 (N, 3) 坐标：(N, >=3) 数组取前三列，结构化数组取 x / y / z 字段（字段类型相同且等间隔时为视图）。
+    列表转为 float64 数组，数组保持原有类型
+    """
+    if isinstance(points, (list, tuple)):
+        points = numpy.asarray(points, dtype=numpy.float64)
+    points = numpy.asarray(points)
+    if points.dtype.names is not None:
+        return structured_to_unstructured(points[['x', 'y', 'z']], copy=False)
+    return points[:, :3]
+
+
+def intensity_view(points: numpy.ndarray) -> numpy.ndarray:
+    """(N, 4) xyzi 的第 4 列或结构化数组的 intensity / i 字段，不拷贝"""
+    points = numpy.asarray(points)
+    if points.dtype.names is not None:
+        for field in _INTENSITY_FIELDS:
+            if field in points.dtype.names:
+                return points[field]
+        raise ValueError(f'结构化点云中没有强度字段，可用字段名: {_INTENSITY_FIELDS}')
+    return points[:, 3]
+
+
+def _coordinate_dtype(dtype: numpy.dtype) -> numpy.dtype:
+    """float32 / float64 保持不变，其余类型（整数等）转为 float64"""
+    return dtype if dtype in (numpy.float32, numpy.float64) else numpy.dtype(numpy.float64)
+
+
+def as_xyz(points: list | numpy.ndarray) -> numpy.ndarray:
+    """C 连续的 (N, 3) 坐标，可直接与 vtk 共享内存；输入已连续时不拷贝，否则只拷贝一次"""
+    xyz = xyz_view(points)
+    return numpy.ascontiguousarray(xyz, dtype=_coordinate_dtype(xyz.dtype))
+
+
+def _vtk_points(points: vtkPoints | list | numpy.ndarray) -> vtkPoints:
+    """
+    与 as_xyz 的结果共享内存的 vtkPoints。numpy_to_vtk 把数组的引用挂在 vtk 缓冲区上，
+    数组（及其所在的共享内存 / mmap）在 vtk 不再使用之前一直有效
+    """
+    if isinstance(points, vtkPoints):
+        return points
+    vtk_points = vtkPoints()
+    vtk_points.SetData(numpy_to_vtk(as_xyz(points)))
+    return vtk_points
+
+
+def _to_uint8_colors(colors: numpy.ndarray) -> numpy.ndarray:
+    """浮点颜色按 [0, 1] 放缩到 0–255，整数颜色视为 0–255 直接截断"""
+    colors = numpy.asarray(colors)
+    if colors.dtype == numpy.uint8:
+        return colors
+    if numpy.issubdtype(colors.dtype, numpy.floating) or colors.dtype == bool:
+        colors = colors * 255.0
+    return numpy.clip(colors, 0, 255).astype(numpy.uint8)
+
+
+def _check_point_count(name: str, values, n: int):
+    if len(values) != n:
+        raise ValueError(f'{name} 应为 {n} 个点的值，实际为 {len(values)}')
+
+
+def _vtk_colors(colors: numpy.ndarray) -> vtkUnsignedCharArray:
+    """(N, 3|4) uint8 颜色，连续时与 vtk 共享内存；浮点颜色按 [0, 1] 转换，其他整数类型按 0–255 截断"""
+    colors = numpy.ascontiguousarray(_to_uint8_colors(colors))
+    array = numpy_to_vtk(colors.reshape(len(colors), -1))
+    array.SetName('Colors')
+    return array
+
+
+def point_actor(points: vtkPoints | list | numpy.ndarray,
                 color: tuple[float, float, float] = (1, 1, 1),
-                point_size=3):
-    vtk_points = None
-    if isinstance(points, list):
-        points = numpy.array(points)
-        vtk_points = vtk.vtkPoints()
-        vtk_points.SetData(numpy_to_vtk(points))
-    elif isinstance(points, numpy.ndarray):
-        vtk_points = vtk.vtkPoints()
-        vtk_points.SetData(numpy_to_vtk(points))
-    elif isinstance(points, vtk.vtkPoints):
-        vtk_points = points
-    polydata = vtk.vtkPolyData()
-    polydata.SetPoints(vtk_points)
-    mapper = vtk.vtkPointGaussianMapper()
+                point_size=3, colors: numpy.ndarray = None):
+    """
+    points: (N, >=3) 数组（float32 保持为 float32）、含 x / y / z 字段的结构化数组、列表或 vtkPoints。
+    C 连续的 (N, 3) float32 / float64 数组不拷贝，与 actor 共享内存
+    colors: (N, 3|4) 逐点颜色，整数（0–255）或 [0, 1] 浮点，行数须与点数一致；不给时使用 color
+    """
+    polydata = vtkPolyData()
+    polydata.SetPoints(_vtk_points(points))
+    if colors is not None:
+        _check_point_count('colors', colors, polydata.GetNumberOfPoints())
+        polydata.GetPointData().SetScalars(_vtk_colors(colors))
+    mapper = vtkPointGaussianMapper()
     mapper.SetInputData(polydata)
     mapper.EmissiveOff()
     mapper.SetScaleFactor(0.0)
-    actor = vtk.vtkActor()
+    actor = vtkActor()
     actor.SetMapper(mapper)
     actor.GetProperty().SetColor(color)
     actor.GetProperty().SetPointSize(point_size)
     return actor
 
 
-def point_actor_with_intensity(points: list | numpy.ndarray, point_size=3):
+def _vtk_intensity(intensity: numpy.ndarray) -> vtkDataArray:
+    """保留原始强度的点属性数组 'intensity'，供拾取时读取"""
+    intensity = numpy.asarray(intensity)
+    array = numpy_to_vtk(numpy.ascontiguousarray(intensity, dtype=_coordinate_dtype(intensity.dtype)))
+    array.SetName('intensity')
+    return array
+
+
+def point_actor_with_intensity(points: list | numpy.ndarray, point_size=3, cmap: str = 'cym',
+                               norm: str | tuple[float, float] = 'max', keep_intensity: bool = False,
+                               intensity: numpy.ndarray = None):
+    """
+    points 为 (N, 4) 的 xyzi 数组，或含 x / y / z / intensity（或 i）字段的结构化数组。
+    坐标只拷贝一次到连续内存并保持 float32 / float64，强度按块着色，不产生与点数成正比的临时数组
+    cmap: 色表名称，见 color.available_colormaps()
+    norm: 强度归一化方式，'max' / 'minmax' / 'percentile' 或固定范围 (lo, hi)
+    keep_intensity: 额外保留原始强度（点属性 'intensity'，每点多 4 / 8 字节），拾取结果中可读到强度值
+    intensity: 单独给出的 (N,) 强度，此时 points 只需坐标
+    """
     if isinstance(points, list):
-        points = numpy.array(points)
-    xyz_arr = points[:, :3]
-    i_arr = points[:, 3]
-    colors = vtk_color_from_intensity(i_arr)
-
-    vtk_points = vtk.vtkPoints()
-    vtk_points.SetData(numpy_to_vtk(xyz_arr))
-    polydata = vtk.vtkPolyData()
+        points = numpy.asarray(points, dtype=numpy.float64)
+    if intensity is None:
+        intensity = intensity_view(points)
+    vtk_points = _vtk_points(points)
+    _check_point_count('intensity', intensity, vtk_points.GetNumberOfPoints())
+    colors = vtk_color_from_intensity(numpy.asarray(intensity), cmap, norm)
+
+    polydata = vtkPolyData()
     polydata.SetPoints(vtk_points)
     polydata.GetPointData().SetScalars(colors)
-    mapper = vtk.vtkPointGaussianMapper()
+    if keep_intensity:
+        polydata.GetPointData().AddArray(_vtk_intensity(intensity))
+    mapper = vtkPointGaussianMapper()
     mapper.SetInputData(polydata)
     mapper.EmissiveOff()
     mapper.SetScaleFactor(0.0)
-    actor = vtk.vtkActor()
+    actor = vtkActor()
     actor.SetMapper(mapper)
     actor.GetProperty().SetPointSize(point_size)
     return actor
 
 
-def line_actor(points: vtk.vtkPoints | list | numpy.ndarray,
+def _shares_numpy_memory(array: vtkDataArray):
+    # numpy_to_vtk 在旧版 vtk 中把引用挂在数组上，新版挂在 GetBuffer() 上
+    if hasattr(array, '_numpy_reference'):
+        return True
+    return hasattr(array, 'GetBuffer') and hasattr(array.GetBuffer(), '_numpy_reference')
+
+
+def _writable_array(array: vtkDataArray, n: int, n_comp: int, template: vtkDataArray = None,
+                    dtype: numpy.dtype = None):
+    """
+    返回可就地写入 n 个元组的 vtk 数组。
+    numpy_to_vtk 创建的数组与用户的 numpy 内存共享，不能直接改写，首次更新时换成 vtk 自己持有的数组；
+    点数不超过已分配容量时复用内存，超过时 vtk 的 Resize 会按几何增长重新分配。
+    dtype: 要求的元素类型（如输入的 float32 坐标），与已有数组不同时重新创建
+    """
+    if dtype is not None:
+        template = create_vtk_array(get_vtk_array_type(dtype))
+    if array is None or _shares_numpy_memory(array) or array.GetNumberOfComponents() != n_comp or \
+            (dtype is not None and array.GetDataType() != template.GetDataType()):
+        new_array = (array if template is None else template).NewInstance()
+        new_array.SetNumberOfComponents(n_comp)
+        if array is not None:
+            new_array.SetName(array.GetName())
+        array = new_array
+    array.SetNumberOfTuples(n)
+    return array
+
+
+def update_point_actor(actor: vtkActor, points: list | numpy.ndarray, intensity: numpy.ndarray = None,
+                       colors: numpy.ndarray = None, cmap: str = 'cym', norm: str | tuple[float, float] = 'max'):
+    """
+    就地替换 point_actor / point_actor_with_intensity 创建的 actor 的点数据，复用 vtkPoints 与颜色数组的内存。
+    intensity: (N,) 强度，按 cmap/norm 着色
+    colors: (N, 3|4) 颜色，同 point_actor
+    intensity / colors 只能给出一个，长度须与 points 一致，否则 ValueError；都不给时，点数不变则保留原有颜色，否则去掉逐点颜色
+    """
+    polydata = actor.GetMapper().GetInput() if actor.GetMapper() else None
+    update_point_polydata(polydata, points, intensity, colors, cmap, norm)
+
+
+def update_point_polydata(polydata: vtkPolyData, points: list | numpy.ndarray, intensity: numpy.ndarray = None,
+                          colors: numpy.ndarray = None, cmap: str = 'cym', norm: str | tuple[float, float] = 'max'):
+    """update_point_actor 的实现，直接作用于点云 polydata"""
+    if not isinstance(polydata, vtkPolyData) or polydata.GetPoints() is None:
+        raise TypeError('actor 不是点云 actor，无法更新点')
+    if intensity is not None and colors is not None:
+        raise ValueError('intensity 与 colors 只能给出一个')
+    xyz = xyz_view(points)
+    n = len(xyz)
+    if intensity is not None:
+        _check_point_count('intensity', intensity, n)
+    elif colors is not None:
+        colors = _to_uint8_colors(colors).reshape(len(colors), -1)
+        _check_point_count('colors', colors, n)
+
+    vtk_points = polydata.GetPoints()
+    old_n = vtk_points.GetNumberOfPoints()
+    data = _writable_array(vtk_points.GetData(), n, 3, dtype=_coordinate_dtype(xyz.dtype))
+    if n:
+        vtk_to_numpy(data)[:] = xyz
+    if data is not vtk_points.GetData():
+        vtk_points.SetData(data)
+    data.Modified()
+    vtk_points.Modified()
+
+    point_data = polydata.GetPointData()
+    scalars = point_data.GetScalars()
+    if intensity is not None or colors is not None:
+        template = vtkUnsignedCharArray()
+        n_comp = 3 if intensity is not None else colors.shape[1]
+        scalars = _writable_array(scalars if isinstance(scalars, vtkUnsignedCharArray) else None, n, n_comp,
+                                  template)
+        if not scalars.GetName():
+            scalars.SetName("Colors")
+        if intensity is not None:
+            vtk_color_from_intensity(numpy.asarray(intensity), cmap, norm, colors=scalars)
+        else:
+            if n:
+                vtk_to_numpy(scalars)[:] = colors
+            scalars.Modified()
+        if scalars is not point_data.GetScalars():
+            point_data.SetScalars(scalars)
+    elif scalars is not None and n != old_n:
+        point_data.SetScalars(None)
+
+    # point_actor_with_intensity(keep_intensity=True) 保留的原始强度
+    kept = point_data.GetArray('intensity')
+    if kept is not None:
+        if intensity is not None:
+            intensity = numpy.asarray(intensity)
+            array = _writable_array(kept, n, 1, dtype=_coordinate_dtype(intensity.dtype))
+            if n:
+                vtk_to_numpy(array)[:] = intensity
+            array.Modified()
+            if array is not kept:
+                point_data.AddArray(array)  # 同名数组被替换
+        elif n != old_n:
+            point_data.RemoveArray('intensity')
+    polydata.Modified()
+
+
+def line_actor(points: vtkPoints | list | numpy.ndarray,
                color: tuple[float, float, float] = (1, 1, 1),
                line_width=8):
-    vtk_points = None
-    if isinstance(points, list):
-        points = numpy.array(points)
-        vtk_points = vtk.vtkPoints()
-        vtk_points.SetData(numpy_to_vtk(points))
-    elif isinstance(points, numpy.ndarray):
-        vtk_points = vtk.vtkPoints()
-        vtk_points.SetData(numpy_to_vtk(points))
-    elif isinstance(points, vtk.vtkPoints):
-        vtk_points = points
-    line_source = vtk.vtkPolyLineSource()
-    line_source.SetPoints(vtk_points)
-
-    mapper = vtk.vtkPolyDataMapper()
+    """points 的要求同 point_actor"""
+    line_source = vtkPolyLineSource()
+    line_source.SetPoints(_vtk_points(points))
+
+    mapper = vtkPolyDataMapper()
     mapper.SetInputConnection(line_source.GetOutputPort())
-    actor = vtk.vtkActor()
+    actor = vtkActor()
+    actor.SetMapper(mapper)
+    actor.GetProperty().SetColor(color)
+    actor.GetProperty().SetLineWidth(line_width)
+    return actor
+
+
+def _concat_lines(lines: list | numpy.ndarray, offsets: numpy.ndarray = None) -> tuple[numpy.ndarray, numpy.ndarray]:
+    """返回 (P, 3) 的全部顶点与 L + 1 个边界下标，第 i 条线为 points[offsets[i]:offsets[i + 1]]"""
+    if offsets is None:
+        arrays = [xyz_view(line) for line in lines]
+        offsets = numpy.zeros(len(arrays) + 1, dtype=numpy.int64)
+        numpy.cumsum([len(a) for a in arrays], out=offsets[1:])
+        points = numpy.concatenate(arrays) if arrays else numpy.empty((0, 3))
+        return points, offsets
+    points = xyz_view(lines)
+    offsets = numpy.asarray(offsets, dtype=numpy.int64).ravel()
+    if not len(offsets) or offsets[-1] != len(points):
+        offsets = numpy.append(offsets, len(points))
+    assert offsets[0] == 0 and numpy.all(numpy.diff(offsets) >= 0), 'offsets 应从 0 开始单调不减'
+    return points, offsets
+
+
+def _set_color_array(attributes, colors: numpy.ndarray):
+    """把 uint8 (n, 3|4) 颜色写入 point/cell data 的 scalars，能复用时复用已有数组"""
+    n = len(colors)
+    colors = colors.reshape(n, -1)
+    scalars = attributes.GetScalars()
+    scalars = _writable_array(scalars if isinstance(scalars, vtkUnsignedCharArray) else None, n,
+                              colors.shape[1], vtkUnsignedCharArray())
+    scalars.SetName('Colors')
+    if n:
+        vtk_to_numpy(scalars).reshape(n, -1)[:] = colors
+    scalars.Modified()
+    if scalars is not attributes.GetScalars():
+        attributes.SetScalars(scalars)
+
+
+def lines_actor(lines: list | numpy.ndarray, offsets: numpy.ndarray = None, colors: numpy.ndarray = None,
+                color: tuple[float, float, float] = (1, 1, 1), line_width=2):
+    """
+    一个 polydata / actor 绘制多条折线。
+    lines: (N_i, 3) 数组的列表；或给出 offsets 时为所有线首尾相接的 (P, 3) 顶点
+    offsets: 每条线在 lines 中的起始下标（可以带结尾的 P）
+    colors: (L, 3|4) 逐线颜色或 (P, 3|4) 逐顶点颜色，整数（0–255）或 [0, 1] 浮点；不给时使用 color
+    """
+    vtk_points = vtkPoints()
+    vtk_points.SetDataTypeToDouble()
+    polydata = vtkPolyData()
+    polydata.SetPoints(vtk_points)
+    polydata.SetLines(vtkCellArray())
+    update_lines_polydata(polydata, lines, offsets, colors)
+
+    mapper = vtkPolyDataMapper()
+    mapper.SetInputData(polydata)
+    mapper.SetColorModeToDirectScalars()
+    actor = vtkActor()
     actor.SetMapper(mapper)
     actor.GetProperty().SetColor(color)
     actor.GetProperty().SetLineWidth(line_width)
     return actor
 
 
+def update_lines_actor(actor: vtkActor, lines: list | numpy.ndarray, offsets: numpy.ndarray = None,
+                       colors: numpy.ndarray = None):
+    """就地替换 lines_actor 创建的 actor 的折线，参数同 lines_actor"""
+    polydata = actor.GetMapper().GetInput() if actor.GetMapper() else None
+    if not isinstance(polydata, vtkPolyData) or polydata.GetPoints() is None:
+        raise TypeError('actor 不是 lines_actor 创建的 actor，无法更新折线')
+    update_lines_polydata(polydata, lines, offsets, colors)
+
+
+def update_lines_polydata(polydata: vtkPolyData, lines: list | numpy.ndarray, offsets: numpy.ndarray = None,
+                          colors: numpy.ndarray = None):
+    """
+    顶点、offsets 与 connectivity 数组在容量足够时复用；connectivity 恒为 0..P-1，只补写增长的部分。
+    colors 不给时，线数与顶点数不变则保留原有颜色，否则去掉颜色
+    """
+    points, offsets = _concat_lines(lines, offsets)
+    n_points, n_lines = len(points), len(offsets) - 1
+
+    vtk_points = polydata.GetPoints()
+    old_points = vtk_points.GetNumberOfPoints()
+    data = _writable_array(vtk_points.GetData(), n_points, 3, dtype=_coordinate_dtype(points.dtype))
+    if n_points:
+        vtk_to_numpy(data)[:] = points
+    if data is not vtk_points.GetData():
+        vtk_points.SetData(data)
+    data.Modified()
+    vtk_points.Modified()
+
+    cells = polydata.GetLines()
+    old_lines = cells.GetNumberOfCells()
+    offset_array = _writable_array(cells.GetOffsetsArray(), n_lines + 1, 1, vtkIdTypeArray())
+    vtk_to_numpy(offset_array)[:] = offsets
+    old_connectivity = cells.GetConnectivityArray()
+    connectivity = _writable_array(old_connectivity, n_points, 1, vtkIdTypeArray())
+    filled = old_points if connectivity is old_connectivity else 0
+    if n_points > filled:
+        vtk_to_numpy(connectivity)[filled:] = numpy.arange(filled, n_points)
+    offset_array.Modified()
+    connectivity.Modified()
+    cells.SetData(offset_array, connectivity)
+    cells.Modified()
+
+    point_data, cell_data = polydata.GetPointData(), polydata.GetCellData()
+    if colors is not None:
+        colors = _to_uint8_colors(colors)
+        if len(colors) == n_lines:
+            _set_color_array(cell_data, colors)
+            point_data.SetScalars(None)
+        elif len(colors) == n_points:
+            _set_color_array(point_data, colors)
+            cell_data.SetScalars(None)
+        else:
+            raise ValueError(f'colors 应为 {n_lines} 条线或 {n_points} 个顶点的颜色，实际为 {len(colors)}')
+    elif n_lines != old_lines or n_points != old_points:
+        point_data.SetScalars(None)
+        cell_data.SetScalars(None)
+    polydata.Modified()
+
+
+def boxes_actor(bounds: numpy.ndarray, colors: numpy.ndarray = None, color: tuple[float, float, float] = (1, 1, 1),
+                opacity: float = 1, wireframe: bool = False):
+    """
+    一个 actor 绘制 N 个轴对齐包围盒：单位立方体按每个盒子的中心与尺寸实例化（vtkGlyph3DMapper），只有一次绘制调用。
+    bounds: (N, 6)，每行为 xmin, xmax, ymin, ymax, zmin, zmax
+    colors: (N, 3) / (N, 4) 逐盒颜色，整数（0–255）或 [0, 1] 浮点；不给时使用 color
+    """
+    vtk_points = vtkPoints()
+    vtk_points.SetDataTypeToDouble()
+    polydata = vtkPolyData()
+    polydata.SetPoints(vtk_points)
+    update_boxes_polydata(polydata, bounds, colors)
+
+    cube = vtkCubeSource()  # 单位立方体，中心在原点
+    mapper = vtkGlyph3DMapper()
+    mapper.SetInputData(polydata)
+    mapper.SetSourceConnection(cube.GetOutputPort())
+    mapper.OrientOff()
+    mapper.SetScaleArray('scale')
+    mapper.SetScaleModeToScaleByVectorComponents()
+    mapper.SetColorModeToDirectScalars()
+    actor = vtkActor()
+    actor.SetMapper(mapper)
+    actor.GetProperty().SetColor(color)
+    actor.GetProperty().SetOpacity(opacity)
+    if wireframe:
+        actor.GetProperty().SetRepresentationToWireframe()
+    return actor
+
+
+def update_boxes_actor(actor: vtkActor, bounds: numpy.ndarray, colors: numpy.ndarray = None):
+    """就地替换 boxes_actor 创建的 actor 的盒子，盒子数不超过已分配容量时复用内存"""
+    mapper = actor.GetMapper()
+    if not isinstance(mapper, vtkGlyph3DMapper):
+        raise TypeError('actor 不是 boxes_actor 创建的 actor，无法更新包围盒')
+    update_boxes_polydata(mapper.GetInput(), bounds, colors)
+
+
+def update_boxes_polydata(polydata: vtkPolyData, bounds: numpy.ndarray, colors: numpy.ndarray = None):
+    """
+    点为盒子中心，'scale' 数组为盒子尺寸。
+    colors 不给时，盒子数不变则保留原有颜色，否则去掉逐盒颜色
+    """
+    bounds = numpy.asarray(bounds, dtype=numpy.float64).reshape(-1, 6)
+    n = len(bounds)
+    lower, upper = bounds[:, 0::2], bounds[:, 1::2]
+
+    vtk_points = polydata.GetPoints()
+    old_n = vtk_points.GetNumberOfPoints()
+    centers = _writable_array(vtk_points.GetData(), n, 3)
+    point_data = polydata.GetPointData()
+    sizes = _writable_array(point_data.GetArray('scale'), n, 3, vtkDoubleArray())
+    sizes.SetName('scale')
+    if n:
+        out = vtk_to_numpy(centers)
+        numpy.add(lower, upper, out=out)
+        out *= 0.5
+        numpy.subtract(upper, lower, out=vtk_to_numpy(sizes))
+    if centers is not vtk_points.GetData():
+        vtk_points.SetData(centers)
+    if sizes is not point_data.GetArray('scale'):
+        point_data.AddArray(sizes)
+    centers.Modified()
+    sizes.Modified()
+    vtk_points.Modified()
+
+    if colors is not None:
+        _set_color_array(point_data, _to_uint8_colors(colors))
+    elif point_data.GetScalars() is not None and n != old_n:
+        point_data.SetScalars(None)
+    polydata.Modified()
+
+
 def source_actor(source):
-    mapper = vtk.vtkPolyDataMapper()
+    mapper = vtkPolyDataMapper()
     mapper.SetInputConnection(source.GetOutputPort())
-    actor = vtk.vtkActor()
+    actor = vtkActor()
     actor.SetMapper(mapper)
     return actor
 
 
 def poly_actor(polydata, v_filter=False):
-    mapper = vtk.vtkPolyDataMapper()
-    actor = vtk.vtkActor()
+    mapper = vtkPolyDataMapper()
+    actor = vtkActor()
 
     if v_filter:
-        v_filter = vtk.vtkVertexGlyphFilter()
+        v_filter = vtkVertexGlyphFilter()
         v_filter.SetInputData(polydata)
         mapper.SetInputConnection(v_filter.GetOutputPort())
     else:
@@ -100,17 +479,17 @@ def poly_actor(polydata, v_filter=False):
     return actor
 
 
-def stl_actor(stl_path_or_reader: str | vtk.vtkSTLReader):
+def stl_actor(stl_path_or_reader: str | vtkSTLReader):
     if type(stl_path_or_reader) is str:
-        reader = vtk.vtkSTLReader()
+        reader = vtkSTLReader()
         reader.SetFileName(stl_path_or_reader)
     elif stl_path_or_reader.IsA('vtkSTLReader'):
         reader = stl_path_or_reader
     else:
         raise TypeError(f'输入stl 类型错误')
     reader.Update()
-    mapper = vtk.vtkPolyDataMapper()
+    mapper = vtkPolyDataMapper()
     mapper.SetInputConnection(reader.GetOutputPort())
-    actor = vtk.vtkActor()
+    actor = vtkActor()
     actor.SetMapper(mapper)
     return actor
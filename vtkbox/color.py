@@ -2,8 +2,8 @@ import random
 from typing import overload, Sequence
 
 import numpy
-import vtk
-
+from vtkmodules.vtkCommonCore import vtkUnsignedCharArray
+from vtkmodules.util.numpy_support import vtk_to_numpy
 
 
 _build_in_color = [
@@ -50,26 +50,122 @@ def color255_to_1(*args):
     return r / 255, g / 255, b / 255
 
 
-def vtk_color_from_intensity(intensity: numpy.ndarray):
-    colors = vtk.vtkUnsignedCharArray()
-    colors.SetNumberOfComponents(3)
-    colors.SetName("Colors")
-
-    def intensity_to_rgb(inte_: float):
-        c = numpy.array([0, 255, 255])
-        m = numpy.array([255, 0, 255])
-        y = numpy.array([255, 255, 0])
-        if inte_ < 0:
-            rgb = c
-        elif inte_ < 0.5:
-            rgb = c * (0.5 - inte_) / 0.5 + y * inte_ / 0.5
-        elif inte_ < 1:
-            rgb = y * (1 - inte_) / 0.5 + m * (inte_ - 0.5) / 0.5
+# 内置色表的锚点，均匀分布在 [0, 1] 上，颜色为 0-255
+_build_in_colormap = {
+    'cym': [(0, 255, 255), (255, 255, 0), (255, 0, 255)],  # 青 -> 黄 -> 品红，旧版 intensity 配色
+    'gray': [(0, 0, 0), (255, 255, 255)],
+    'jet': [(0, 0, 128), (0, 0, 255), (0, 255, 255), (255, 255, 0), (255, 0, 0), (128, 0, 0)],
+    'hot': [(0, 0, 0), (255, 0, 0), (255, 255, 0), (255, 255, 255)],
+    'viridis': [(68, 1, 84), (59, 82, 139), (33, 145, 140), (94, 201, 98), (253, 231, 37)],
+    'turbo': [(48, 18, 59), (70, 134, 251), (27, 229, 181), (164, 252, 60), (251, 185, 56), (122, 4, 3)],
+}
+_LUT_SIZE = 256
+_CHUNK = 1 << 20  # 分块着色，临时数组的大小与点数无关
+_lut_cache = {}  # type: dict[str, numpy.ndarray]
+
+
+def register_colormap(name: str, anchors: Sequence[Sequence[int]]):
+    """注册自定义色表，anchors 为均匀分布在 [0, 1] 上的 0-255 RGB 锚点"""
+    if len(anchors) < 2:
+        raise ValueError('colormap 至少需要两个锚点')
+    _build_in_colormap[name] = [tuple(c) for c in anchors]
+    _lut_cache.pop(name, None)
+
+
+def available_colormaps() -> list[str]:
+    return list(_build_in_colormap.keys())
+
+
+def colormap_lut(name: str = 'cym') -> numpy.ndarray:
+    """返回 (256, 3) uint8 查找表"""
+    lut = _lut_cache.get(name)
+    if lut is None:
+        if name not in _build_in_colormap:
+            raise KeyError(f'未知的 colormap: {name}, 可选: {available_colormaps()}')
+        anchors = numpy.asarray(_build_in_colormap[name], dtype=numpy.float64)
+        xp = numpy.linspace(0, 1, len(anchors))
+        x = numpy.linspace(0, 1, _LUT_SIZE)
+        lut = numpy.stack([numpy.interp(x, xp, anchors[:, i]) for i in range(3)], axis=1)
+        lut = numpy.ascontiguousarray(lut.astype(numpy.uint8))
+        _lut_cache[name] = lut
+    return lut
+
+
+def normalize_intensity(intensity: numpy.ndarray, norm: str | tuple[float, float] = 'max',
+                        percentile: tuple[float, float] = (2, 98)) -> numpy.ndarray:
+    """
+    将强度归一化到 [0, 1]，超出范围的值会被截断。
+
+    norm:
+        'max'        除以最大值（旧版行为）
+        'minmax'     按 min/max 线性拉伸
+        'percentile' 按 percentile 给出的上下分位数拉伸，抑制离群点
+        (lo, hi)     固定范围，多帧之间颜色一致
+    """
+    intensity = numpy.asarray(intensity)
+    if intensity.size == 0:
+        return numpy.empty(0, dtype=numpy.float32)
+    return _normalize(intensity, *_intensity_range(intensity, norm, percentile))
+
+
+def _intensity_range(intensity: numpy.ndarray, norm: str | tuple[float, float] = 'max',
+                     percentile: tuple[float, float] = (2, 98)) -> tuple[float, float]:
+    if isinstance(norm, str):
+        if norm == 'max':
+            lo, hi = 0.0, float(intensity.max())
+        elif norm == 'minmax':
+            lo, hi = float(intensity.min()), float(intensity.max())
+        elif norm == 'percentile':
+            lo, hi = (float(v) for v in numpy.percentile(intensity, percentile))
         else:
-            rgb = m
-        return rgb.astype(int)
-
-    unit_i = intensity / intensity.max()
-    for i in unit_i:
-        colors.InsertNextTuple3(*intensity_to_rgb(i))
+            raise ValueError(f'未知的归一化方式: {norm}')
+    else:
+        lo, hi = norm
+    return lo, hi
+
+
+def _normalize(intensity: numpy.ndarray, lo: float, hi: float) -> numpy.ndarray:
+    scale = 1.0 / (hi - lo) if hi != lo else 0.0
+    unit = intensity.astype(numpy.float32, copy=True)
+    unit -= lo
+    unit *= scale
+    numpy.clip(unit, 0, 1, out=unit)
+    return unit
+
+
+def intensity_to_rgb_array(intensity: numpy.ndarray, cmap: str = 'cym', norm: str | tuple[float, float] = 'max',
+                           out: numpy.ndarray = None) -> numpy.ndarray:
+    """
+    向量化查表，返回 (N, 3) uint8；给定 out 时直接写入 out。
+    intensity 可以是带步长的视图（如 xyzi 的第 4 列），按块归一化与查表，不拷贝整列
+    """
+    intensity = numpy.asarray(intensity)
+    lut = colormap_lut(cmap)
+    if out is None:
+        out = numpy.empty((len(intensity), 3), dtype=numpy.uint8)
+    if not len(intensity):
+        return out
+    lo, hi = _intensity_range(intensity, norm)
+    for start in range(0, len(intensity), _CHUNK):
+        unit = _normalize(intensity[start:start + _CHUNK], lo, hi)
+        unit *= _LUT_SIZE - 1
+        index = numpy.rint(unit, out=unit).astype(numpy.intp)
+        numpy.take(lut, index, axis=0, out=out[start:start + _CHUNK])
+    return out
+
+
+def vtk_color_from_intensity(intensity: numpy.ndarray, cmap: str = 'cym', norm: str | tuple[float, float] = 'max',
+                             colors: vtkUnsignedCharArray = None) -> vtkUnsignedCharArray:
+    """
+    强度转 vtk 颜色数组，通过 numpy 视图直接写入 vtkUnsignedCharArray 的内存。
+    传入已有的 colors 时复用其内存（点数变化时重新分配）。
+    """
+    if colors is None:
+        colors = vtkUnsignedCharArray()
+        colors.SetNumberOfComponents(3)
+        colors.SetName("Colors")
+    colors.SetNumberOfTuples(len(intensity))
+    if len(intensity):
+        intensity_to_rgb_array(intensity, cmap, norm, out=vtk_to_numpy(colors))
+    colors.Modified()
     return colors
@@ -0,0 +1,159 @@
+"""
+离屏渲染的帧导出：渲染线程只负责渲染与读回像素，图像编码在线程池中进行（vtk 写图时释放 GIL），
+视频帧通过管道交给 ffmpeg 进程编码。读回用的缓冲区在帧之间循环复用，同时在编码的帧数有上限。
+"""
+import os
+import shutil
+import subprocess
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy
+from vtkmodules.vtkCommonDataModel import vtkImageData
+from vtkmodules.vtkIOImage import vtkBMPWriter, vtkJPEGWriter, vtkPNGWriter, vtkTIFFWriter
+from vtkmodules.util.numpy_support import numpy_to_vtk
+
+_IMAGE_WRITERS = {
+    '.png': vtkPNGWriter,
+    '.jpg': vtkJPEGWriter,
+    '.jpeg': vtkJPEGWriter,
+    '.bmp': vtkBMPWriter,
+    '.tif': vtkTIFFWriter,
+    '.tiff': vtkTIFFWriter,
+}
+VIDEO_EXTENSIONS = ('.mp4', '.mkv', '.avi', '.mov')
+
+
+def write_image(path: str, image: numpy.ndarray):
+    """image 为 (高, 宽, 3|4) uint8，第 0 行为图像顶部"""
+    ext = os.path.splitext(path)[1].lower()
+    writer_type = _IMAGE_WRITERS.get(ext)
+    if writer_type is None:
+        raise ValueError(f'不支持的图片格式: {path}，可用 {", ".join(_IMAGE_WRITERS)}')
+    height, width, n_comp = image.shape
+    # vtk 图像从底部一行开始
+    flipped = numpy.ascontiguousarray(image[::-1]).reshape(-1, n_comp)
+    data = vtkImageData()
+    data.SetDimensions(width, height, 1)
+    data.GetPointData().SetScalars(numpy_to_vtk(flipped))
+    writer = writer_type()
+    writer.SetFileName(path)
+    writer.SetInputData(data)
+    writer.Write()
+
+
+class _FFmpegSink:
+    """把 RGB 帧写入 ffmpeg 的标准输入，由 ffmpeg 进程编码为视频"""
+
+    def __init__(self, path: str, width: int, height: int, fps: float):
+        executable = shutil.which('ffmpeg')
+        if executable is None:
+            raise RuntimeError('导出视频需要 ffmpeg，请安装后重试，或导出为图片序列')
+        command = [
+            executable, '-y', '-loglevel', 'error',
+            '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', f'{width}x{height}', '-r', f'{fps}', '-i', '-',
+            # yuv420p 要求宽高为偶数
+            '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2', '-pix_fmt', 'yuv420p', path,
+        ]
+        self._process = subprocess.Popen(command, stdin=subprocess.PIPE)
+
+    def write(self, frame: numpy.ndarray):
+        self._process.stdin.write(memoryview(frame).cast('B'))
+
+    def close(self):
+        self._process.stdin.close()
+        if self._process.wait() != 0:
+            raise RuntimeError(f'ffmpeg 退出码 {self._process.returncode}')
+
+
+class FrameExporter:
+    """
+    逐帧导出 VTKVisualizer 的画面。每次 write() 渲染当前场景并读回到一个复用的缓冲区，
+    之后交给编码线程；在途帧数达到 max_pending 时等待最早的一帧编码完成。
+    path: 图片序列模板（如 'out/frame_{:06d}.png'，不含 '{}' 时视为目录）或视频文件
+    """
+
+    def __init__(self, viz, path: str, workers: int = 4, fps: float = 30, max_pending: int = None):
+        self.viz = viz
+        self.fps = fps
+        self.frames = 0
+        self.render_seconds = 0.0
+        self.wait_seconds = 0.0  # 等待编码线程的时间
+
+        self._video = path.lower().endswith(VIDEO_EXTENSIONS)
+        if not self._video and '{' not in path:
+            path = os.path.join(path, 'frame_{:06d}.png')
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        # 视频帧必须按顺序写入管道，只用一个线程
+        self._workers = 1 if self._video else max(1, workers)
+        self._executor = ThreadPoolExecutor(max_workers=self._workers)
+        self._max_pending = max_pending or self._workers * 2
+        self._pending = deque()  # type: deque[tuple[Future, numpy.ndarray]]
+        self._free = []  # type: list[numpy.ndarray]
+        self._sink = None  # type: _FFmpegSink | None
+
+    def _reap(self, block: bool):
+        """回收已完成（block 时至少等待一帧）的编码任务的缓冲区，并抛出编码中的异常"""
+        while self._pending and (block or self._pending[0][0].done()):
+            future, buffer = self._pending.popleft()
+            if block:
+                start = time.perf_counter()
+                future.result()
+                self.wait_seconds += time.perf_counter() - start
+                block = False
+            else:
+                future.result()
+            self._free.append(buffer)
+
+    def _acquire(self, shape: tuple) -> numpy.ndarray:
+        self._reap(block=len(self._pending) >= self._max_pending)
+        while self._free:
+            buffer = self._free.pop()
+            if buffer.shape == shape:
+                return buffer
+        return numpy.empty(shape, dtype=numpy.uint8)
+
+    def write(self) -> Future:
+        """渲染当前场景并提交编码，返回该帧编码完成的 Future"""
+        width, height = self.viz._viz.render_window.GetSize()
+        buffer = self._acquire((height, width, 3))
+        start = time.perf_counter()
+        self.viz.render_to_array(out=buffer)
+        self.render_seconds += time.perf_counter() - start
+
+        if self._video:
+            if self._sink is None:
+                self._sink = _FFmpegSink(self.path, width, height, self.fps)
+            future = self._executor.submit(self._sink.write, buffer)
+        else:
+            future = self._executor.submit(write_image, self.path.format(self.frames), buffer)
+        self._pending.append((future, buffer))
+        self.frames += 1
+        return future
+
+    def close(self):
+        try:
+            while self._pending:
+                self._reap(block=True)
+        finally:
+            self._executor.shutdown(wait=True)
+            if self._sink is not None:
+                self._sink.close()
+
+    def stats(self) -> dict:
+        return {
+            'frames': self.frames,
+            'render_seconds': self.render_seconds,
+            'wait_seconds': self.wait_seconds,
+            'workers': self._workers,
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,189 @@
+"""
+可选的运行时统计：每帧渲染耗时、各命令（VTKVisualizer 方法 / 多进程 RPC）耗时、场景中的 actor / 点 / 三角形数量
+与 polydata 占用的内存。关闭时（默认）不注册任何观察者，被统计的方法只多一次属性判断。
+"""
+import functools
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy
+from vtkmodules.vtkCommonCore import vtkCommand
+from vtkmodules.vtkRenderingCore import vtkRenderer, vtkRenderWindow, vtkTextActor
+
+
+class Instrumentation:
+    def __init__(self, render_window: vtkRenderWindow, window: int = 120):
+        """window: 统计渲染耗时与帧率的最近帧数"""
+        self.frames = 0
+        self.frame_times = deque(maxlen=window)  # type: deque[float] # 每帧 Render() 耗时（秒）
+        self._frame_stamps = deque(maxlen=window)  # type: deque[float] # 每帧完成的时刻
+        self.commands = {}  # type: dict[str, list] # name -> [次数, 总耗时, 最大耗时]
+        self._depth = 0
+        self._render_start = 0.0
+        self._render_window = render_window
+        self._observers = [
+            render_window.AddObserver(vtkCommand.StartEvent, self._on_render_start),
+            render_window.AddObserver(vtkCommand.EndEvent, self._on_render_end),
+        ]
+
+    def close(self):
+        for observer in self._observers:
+            self._render_window.RemoveObserver(observer)
+        self._observers.clear()
+
+    def reset(self):
+        self.frames = 0
+        self.frame_times.clear()
+        self._frame_stamps.clear()
+        self.commands.clear()
+
+    def _on_render_start(self, obj, event):
+        self._render_start = time.perf_counter()
+
+    def _on_render_end(self, obj, event):
+        now = time.perf_counter()
+        self.frames += 1
+        self.frame_times.append(now - self._render_start)
+        self._frame_stamps.append(now)
+
+    @contextmanager
+    def command(self, name: str):
+        """统计一次命令的耗时；嵌套的命令（如 update_points_with_intensity 内的 update_points）只计最外层"""
+        self._depth += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            if not self._depth:
+                self.record(name, time.perf_counter() - start)
+
+    def record(self, name: str, seconds: float):
+        entry = self.commands.get(name)
+        if entry is None:
+            entry = self.commands[name] = [0, 0.0, 0.0]
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2] = max(entry[2], seconds)
+
+    def render_stats(self) -> dict:
+        if not self.frame_times:
+            return {'frames': self.frames}
+        times = numpy.array(self.frame_times) * 1e3
+        span = self._frame_stamps[-1] - self._frame_stamps[0]
+        return {
+            'frames': self.frames,
+            # 实际渲染频率：脏标记驱动的循环在场景静止时不渲染，帧率会低于 max_fps
+            'fps': (len(self._frame_stamps) - 1) / span if span > 0 else 0.0,
+            'last_ms': float(times[-1]),
+            'mean_ms': float(times.mean()),
+            'p95_ms': float(numpy.percentile(times, 95)),
+            'max_ms': float(times.max()),
+        }
+
+    def command_stats(self) -> dict:
+        return {
+            name: {'count': count, 'total_ms': total * 1e3, 'mean_ms': total / count * 1e3, 'max_ms': worst * 1e3}
+            for name, (count, total, worst) in self.commands.items()
+        }
+
+
+def timed(method):
+    """VTKVisualizer 方法的装饰器，开启统计时记录耗时"""
+    name = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        stats = self._stats
+        if stats is None:
+            return method(self, *args, **kwargs)
+        with stats.command(name):
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _n_triangles(cells) -> int:
+    # n 个顶点的多边形 / 三角带分别为 n - 2 个三角形
+    return cells.GetNumberOfConnectivityIds() - 2 * cells.GetNumberOfCells()
+
+
+def scene_stats(renderer: vtkRenderer) -> dict:
+    """点与三角形只统计可见的 actor，polydata 内存统计所有 actor（共享的 polydata 只计一次）"""
+    actors = visible = points = triangles = memory = 0
+    seen = set()
+    collection = renderer.GetActors()  # assembly 会展开为其中的 actor
+    collection.InitTraversal()
+    for _ in range(collection.GetNumberOfItems()):
+        actor = collection.GetNextActor()
+        actors += 1
+        mapper = actor.GetMapper()
+        data = mapper.GetInput() if mapper is not None else None
+        if data is None:
+            continue
+        if data.__this__ not in seen:
+            seen.add(data.__this__)
+            memory += data.GetActualMemorySize() * 1024
+        if not actor.GetVisibility():
+            continue
+        visible += 1
+        points += data.GetNumberOfPoints()
+        if mapper.IsA('vtkGlyph3DMapper'):
+            # 实例化绘制：每个输入点一份 source 几何
+            source = mapper.GetSource()
+            if source is not None:
+                triangles += data.GetNumberOfPoints() * (_n_triangles(source.GetPolys()) +
+                                                         _n_triangles(source.GetStrips()))
+        elif data.IsA('vtkPolyData'):
+            triangles += _n_triangles(data.GetPolys()) + _n_triangles(data.GetStrips())
+    return {
+        'actors': actors,
+        'visible_actors': visible,
+        'points': points,
+        'triangles': triangles,
+        'polydata_bytes': memory,
+    }
+
+
+class StatsOverlay:
+    """左上角的统计文字"""
+
+    def __init__(self, renderer: vtkRenderer):
+        # 文字渲染需要 FreeType，只在开启 overlay 时加载
+        import vtkmodules.vtkRenderingFreeType  # noqa: F401
+        self._renderer = renderer
+        self.actor = vtkTextActor()
+        self.actor.GetPositionCoordinate().SetCoordinateSystemToNormalizedViewport()
+        self.actor.GetPositionCoordinate().SetValue(0.01, 0.99)
+        prop = self.actor.GetTextProperty()
+        prop.SetFontFamilyToCourier()
+        prop.SetFontSize(14)
+        prop.SetColor(1.0, 1.0, 0.6)
+        prop.SetVerticalJustificationToTop()
+        renderer.AddViewProp(self.actor)
+
+    def update(self, stats: dict):
+        render = stats['render']
+        scene = stats['scene']
+        lines = []
+        if 'mean_ms' in render:
+            lines.append(f'fps {render["fps"]:5.1f}  render {render["mean_ms"]:.1f} ms '
+                         f'(p95 {render["p95_ms"]:.1f}, max {render["max_ms"]:.1f})')
+        lines.append(f'actors {scene["visible_actors"]}/{scene["actors"]}  points {scene["points"]:,}  '
+                     f'triangles {scene["triangles"]:,}')
+        memory = f'polydata {scene["polydata_bytes"] / (1 << 20):.1f} MB'
+        if 'queue' in stats:
+            memory += f'  queue {stats["queue"]["queue_depth"]}'
+        lines.append(memory)
+        if 'tiles' in stats:
+            tiles = stats['tiles'].values()
+            lines.append(f'tiles {sum(t["resident"] for t in tiles)}/{sum(t["tiles"] for t in tiles)} resident  '
+                         f'{sum(t["loading"] for t in tiles)} loading  '
+                         f'{sum(t["resident_bytes"] for t in tiles) / (1 << 20):.0f} MB')
+        slowest = sorted(stats['commands'].items(), key=lambda item: -item[1]['total_ms'])[:3]
+        for name, command in slowest:
+            lines.append(f'{name} {command["mean_ms"]:.1f} ms x{command["count"]}')
+        self.actor.SetInput('\n'.join(lines))
+
+    def remove(self):
+        self._renderer.RemoveViewProp(self.actor)
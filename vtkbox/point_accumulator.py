@@ -0,0 +1,88 @@
+import numpy
+from vtkmodules.vtkRenderingCore import vtkActor, vtkAssembly
+from vtkmodules.util.numpy_support import vtk_to_numpy
+
+from .actor_creator import point_actor, update_point_polydata
+
+
+class PointAccumulator:
+    """
+    最近 max_frames 帧点云的滚动累积（短时地图）。
+    帧按环形缓冲区存放，每帧占一个槽位（独立的 polydata / actor），追加新帧时只改写最旧的槽位：
+    vtk 的 mapper 在数组 Modified 后会整体重新上传，分槽后每次只上传新的一帧，
+    追加与淘汰的代价与帧大小成正比，与累积的总点数无关。槽位的数组在帧之间复用内存。
+    """
+
+    def __init__(self, max_frames: int, color: tuple[float, float, float] = (1, 1, 1), point_size=3,
+                 cmap: str = 'cym', norm: str | tuple[float, float] = 'max'):
+        """
+        cmap / norm: 带强度的帧的着色方式；各帧单独归一化，需要帧间颜色一致时用固定范围 norm=(lo, hi)
+        """
+        assert max_frames > 0, 'max_frames 必须大于 0'
+        self.max_frames = max_frames
+        self.color = color
+        self.point_size = point_size
+        self.cmap = cmap
+        self.norm = norm
+        self.assembly = vtkAssembly()
+        self._slots = []  # type: list[vtkActor]
+        self._frame_ids = []  # type: list[int] # 各槽位当前帧的序号
+        self._head = 0  # 下一帧写入的槽位
+        self._count = 0
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        """当前累积的帧数"""
+        return self._count
+
+    @property
+    def n_points(self) -> int:
+        return sum(self._polydata(slot).GetNumberOfPoints() for slot in self._order())
+
+    def _polydata(self, slot: int):
+        return self._slots[slot].GetMapper().GetInput()
+
+    def _order(self) -> list[int]:
+        """从旧到新的槽位"""
+        start = (self._head - self._count) % self.max_frames
+        return [(start + i) % self.max_frames for i in range(self._count)]
+
+    def append(self, points: numpy.ndarray, intensity: numpy.ndarray = None, colors: numpy.ndarray = None) -> int:
+        """
+        追加一帧，累积帧数达到 max_frames 时淘汰最旧的一帧，返回该帧的序号。
+        intensity 按 cmap / norm 着色，colors 为 (N, 3) uint8，二者只能给出一个；都不给时使用 color
+        """
+        slot = self._head
+        if slot == len(self._slots):
+            actor = point_actor(numpy.empty((0, 3)), self.color, self.point_size)
+            self._slots.append(actor)
+            self._frame_ids.append(-1)
+            self.assembly.AddPart(actor)
+        actor = self._slots[slot]
+        update_point_polydata(self._polydata(slot), points, intensity, colors, self.cmap, self.norm)
+        actor.VisibilityOn()
+        frame_id = self._next_id
+        self._next_id += 1
+        self._frame_ids[slot] = frame_id
+        self._head = (slot + 1) % self.max_frames
+        self._count = min(self._count + 1, self.max_frames)
+        return frame_id
+
+    def clear(self):
+        """清空累积的帧，保留槽位的内存"""
+        for actor in self._slots:
+            actor.VisibilityOff()
+        self._head = self._count = 0
+
+    def frames(self) -> list[tuple[int, int]]:
+        """从旧到新的 (帧序号, 点数)"""
+        return [(self._frame_ids[slot], self._polydata(slot).GetNumberOfPoints()) for slot in self._order()]
+
+    def polydatas(self) -> list:
+        """从旧到新各帧的 polydata"""
+        return [self._polydata(slot) for slot in self._order()]
+
+    def points(self) -> numpy.ndarray:
+        """按从旧到新的顺序拼接的全部点，(N, 3)"""
+        arrays = [vtk_to_numpy(self._polydata(slot).GetPoints().GetData()) for slot in self._order()]
+        return numpy.concatenate(arrays) if arrays else numpy.empty((0, 3))
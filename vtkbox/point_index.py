@@ -0,0 +1,118 @@
+"""
+点云的空间索引，用于拾取与查询。索引在第一次查询时构建，只在该点云的 vtkPoints 变化（被替换或 MTime 增加）后
+的下一次查询时重建：更新一个点云（或累积点云中的一帧）只使它自己的索引失效，颜色等点属性的变化不会触发重建。
+- 最近邻与射线拾取用 vtkStaticPointLocator：按桶排序，构建 O(N)，查询只访问附近的桶
+- 框选用按 x 排序的下标：二分出 x 落在框内的一段，只在这一段内筛选 y / z
+"""
+import numpy
+from vtkmodules.vtkCommonCore import reference, vtkIdList
+from vtkmodules.vtkCommonDataModel import vtkPolyData, vtkStaticPointLocator
+from vtkmodules.util.numpy_support import vtk_to_numpy
+
+
+def clip_segment(p0, p1, bounds) -> tuple[float, float] | None:
+    """线段 p0 + t (p1 - p0), t ∈ [0, 1] 落在包围盒 (xmin, xmax, ymin, ymax, zmin, zmax) 内的参数区间"""
+    t0, t1 = 0.0, 1.0
+    for axis in range(3):
+        lo, hi = bounds[2 * axis], bounds[2 * axis + 1]
+        d = p1[axis] - p0[axis]
+        if d == 0:
+            if not lo <= p0[axis] <= hi:
+                return None
+            continue
+        a, b = (lo - p0[axis]) / d, (hi - p0[axis]) / d
+        if a > b:
+            a, b = b, a
+        t0, t1 = max(t0, a), min(t1, b)
+        if t0 > t1:
+            return None
+    return t0, t1
+
+
+class PointIndex:
+    """单个点云 polydata 的空间索引"""
+
+    def __init__(self, polydata: vtkPolyData):
+        self.polydata = polydata
+        self.builds = 0  # 索引（重新）构建的次数
+        self._key = None  # 构建时 vtkPoints 的 (地址, MTime)
+        self._locator = None  # type: vtkStaticPointLocator | None
+        self._x_order = None  # type: numpy.ndarray | None # 按 x 排序的点下标
+        self._x_sorted = None  # type: numpy.ndarray | None
+
+    def _validate(self):
+        points = self.polydata.GetPoints()
+        key = None if points is None else (points.__this__, points.GetMTime())
+        if key != self._key:
+            self._key = key
+            self._locator = None
+            self._x_order = self._x_sorted = None
+
+    @property
+    def n_points(self) -> int:
+        return self.polydata.GetNumberOfPoints()
+
+    def xyz(self) -> numpy.ndarray:
+        points = self.polydata.GetPoints()
+        return vtk_to_numpy(points.GetData()) if points is not None else numpy.empty((0, 3))
+
+    def locator(self) -> vtkStaticPointLocator:
+        self._validate()
+        if self._locator is None:
+            locator = vtkStaticPointLocator()
+            locator.SetDataSet(self.polydata)
+            locator.BuildLocator()
+            # 失效由 _validate 判断，避免颜色变化（polydata 的 MTime 增加）时 vtk 在查询中自行重建
+            locator.UseExistingSearchStructureOn()
+            self._locator = locator
+            self.builds += 1
+        return self._locator
+
+    def nearest(self, point, k: int = 1) -> tuple[numpy.ndarray, numpy.ndarray]:
+        """离 point 最近的 k 个点，返回按距离升序的 (下标, 距离)"""
+        if not self.n_points or k <= 0:
+            return numpy.empty(0, dtype=numpy.int64), numpy.empty(0)
+        ids = vtkIdList()
+        self.locator().FindClosestNPoints(k, tuple(map(float, point)), ids)
+        index = numpy.array([ids.GetId(i) for i in range(ids.GetNumberOfIds())], dtype=numpy.int64)
+        distance = numpy.linalg.norm(self.xyz()[index] - numpy.asarray(point, dtype=numpy.float64), axis=1)
+        return index, distance
+
+    def within_box(self, bounds) -> numpy.ndarray:
+        """落在 (xmin, xmax, ymin, ymax, zmin, zmax) 内（含边界）的点的下标，升序"""
+        self._validate()
+        xyz = self.xyz()
+        if not len(xyz):
+            return numpy.empty(0, dtype=numpy.int64)
+        if self._x_order is None:
+            dtype = numpy.int32 if len(xyz) < 2 ** 31 else numpy.int64
+            self._x_order = numpy.argsort(xyz[:, 0], kind='stable').astype(dtype)
+            self._x_sorted = xyz[self._x_order, 0]
+        start = numpy.searchsorted(self._x_sorted, bounds[0], side='left')
+        stop = numpy.searchsorted(self._x_sorted, bounds[1], side='right')
+        index = self._x_order[start:stop]
+        for axis in (1, 2):
+            values = xyz[index, axis]
+            index = index[(values >= bounds[2 * axis]) & (values <= bounds[2 * axis + 1])]
+        return numpy.sort(index).astype(numpy.int64)
+
+    def intersect_segment(self, p0, p1, tolerance: float) -> tuple[float, int] | None:
+        """
+        线段 p0 -> p1 上距离不超过 tolerance 的点中离 p0 最近的一个，返回 (线段参数 t, 点下标)。
+        线段先裁剪到点云包围盒内：vtkStaticPointLocator 对起点远在包围盒外的长线段会漏检
+        """
+        if not self.n_points:
+            return None
+        bounds = numpy.array(self.polydata.GetBounds())
+        bounds[0::2] -= tolerance
+        bounds[1::2] += tolerance
+        clipped = clip_segment(p0, p1, bounds)
+        if clipped is None:
+            return None
+        p0, p1 = numpy.asarray(p0, dtype=numpy.float64), numpy.asarray(p1, dtype=numpy.float64)
+        a0, a1 = p0 + clipped[0] * (p1 - p0), p0 + clipped[1] * (p1 - p0)
+        t, point_id = reference(0.0), reference(0)
+        line_x, point_x = [0.0, 0.0, 0.0], [0.0, 0.0, 0.0]
+        if not self.locator().IntersectWithLine(tuple(a0), tuple(a1), tolerance, t, line_x, point_x, point_id):
+            return None
+        return clipped[0] + float(t) * (clipped[1] - clipped[0]), int(point_id)
@@ -0,0 +1,180 @@
+"""
+点云文件（.npy、KITTI .bin、.pcd）的内存映射读取。文件头单独解析，数据区通过 mmap 映射为 numpy 视图，
+不整体读入内存；按块把（可选降采样后的）点写入预先分配好的输出数组，处理完的块立即释放映射的页面，
+常驻内存只有输出数组加一个块，几十 GB 的地图文件也可以降采样预览。
+"""
+import mmap
+import os
+
+import numpy
+from numpy.lib import format as npy_format
+from numpy.lib.recfunctions import unstructured_to_structured
+
+from .actor_creator import _INTENSITY_FIELDS, xyz_view, _coordinate_dtype
+
+_PCD_TYPES = {('F', 4): 'f4', ('F', 8): 'f8', ('I', 1): 'i1', ('I', 2): 'i2', ('I', 4): 'i4', ('I', 8): 'i8',
+              ('U', 1): 'u1', ('U', 2): 'u2', ('U', 4): 'u4', ('U', 8): 'u8'}
+_KITTI_DTYPE = numpy.dtype([('x', '<f4'), ('y', '<f4'), ('z', '<f4'), ('intensity', '<f4')])
+_CHUNK_POINTS = 1 << 22
+
+
+def _parse_pcd_header(f) -> tuple[dict, int]:
+    """返回 (header 字段, 数据区起始偏移)"""
+    header = {}
+    while True:
+        line = f.readline()
+        if not line:
+            raise ValueError('pcd 文件头不完整，缺少 DATA 行')
+        line = line.decode('ascii', errors='replace').strip()
+        if not line or line.startswith('#'):
+            continue
+        key, *values = line.split()
+        header[key.upper()] = values
+        if key.upper() == 'DATA':
+            return header, f.tell()
+
+
+def _pcd_dtype(header: dict) -> numpy.dtype:
+    fields = header['FIELDS']
+    sizes = [int(v) for v in header['SIZE']]
+    types = header['TYPE']
+    counts = [int(v) for v in header.get('COUNT', ['1'] * len(fields))]
+    descr = []
+    for i, (name, size, kind, count) in enumerate(zip(fields, sizes, types, counts)):
+        if name == '_':  # PCL 的填充字段
+            name = f'_{i}'
+        dtype = '<' + _PCD_TYPES[(kind.upper(), size)]
+        descr.append((name, dtype) if count == 1 else (name, dtype, (count,)))
+    return numpy.dtype(descr)
+
+
+class PointFile:
+    """
+    点云文件的内存映射视图，data 为结构化数组（pcd / KITTI bin / 结构化 npy）或 (N, k) 数组（普通 npy），
+    只在访问时才从磁盘读入对应的页面。ascii 格式的 pcd 不能映射，整体解析进内存
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._mmap = None
+        self._offset = 0  # 数据区在文件中的偏移
+        ext = os.path.splitext(path)[1].lower()
+        with open(path, 'rb') as f:
+            if ext == '.npy':
+                version = npy_format.read_magic(f)
+                read_header = npy_format.read_array_header_1_0 if version == (1, 0) else \
+                    npy_format.read_array_header_2_0
+                shape, fortran_order, dtype = read_header(f)
+                self.data = self._map(f, f.tell(), dtype, int(numpy.prod(shape)))
+                self.data = self.data.reshape(shape[::-1]).T if fortran_order else self.data.reshape(shape)
+            elif ext == '.bin':
+                self.data = self._map(f, 0, _KITTI_DTYPE, os.path.getsize(path) // _KITTI_DTYPE.itemsize)
+            elif ext == '.pcd':
+                header, offset = _parse_pcd_header(f)
+                dtype = _pcd_dtype(header)
+                n = int(header['POINTS'][0]) if 'POINTS' in header else \
+                    int(header['WIDTH'][0]) * int(header['HEIGHT'][0])
+                data_format = header['DATA'][0].lower()
+                if data_format == 'binary':
+                    self.data = self._map(f, offset, dtype, n)
+                elif data_format == 'ascii':
+                    f.seek(offset)
+                    values = numpy.loadtxt(f, dtype=numpy.float64, ndmin=2, max_rows=n)
+                    self.data = unstructured_to_structured(values, dtype)
+                else:
+                    raise ValueError(f'不支持的 pcd 数据格式 {data_format}，请先转为 binary')
+            else:
+                raise ValueError(f'不支持的点云文件: {path}，可用 .npy / .bin (KITTI) / .pcd')
+        if self.data.dtype.names is None and (self.data.ndim != 2 or self.data.shape[1] < 3):
+            raise ValueError(f'{path} 中的数组形状为 {self.data.shape}，应为 (N, >=3)')
+
+    def _map(self, f, offset: int, dtype: numpy.dtype, count: int) -> numpy.ndarray:
+        if count * dtype.itemsize == 0:
+            return numpy.empty(0, dtype=dtype)
+        if offset + count * dtype.itemsize > os.path.getsize(self.path):
+            raise ValueError(f'{self.path} 的数据区不完整')
+        self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._offset = offset
+        return numpy.frombuffer(self._mmap, dtype=dtype, count=count, offset=offset)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    @property
+    def fields(self) -> tuple[str, ...]:
+        return self.data.dtype.names or ()
+
+    def intensity_field(self) -> str | int | None:
+        """强度所在的字段名（结构化数据）或列号，没有强度时为 None"""
+        if self.fields:
+            return next((name for name in _INTENSITY_FIELDS if name in self.fields), None)
+        return 3 if self.data.shape[1] >= 4 else None
+
+    def color_field(self) -> str | None:
+        """pcd 中按 PCL 约定打包的 rgb / rgba 字段"""
+        return next((name for name in ('rgb', 'rgba') if name in self.fields), None)
+
+    def release(self, start: int, stop: int):
+        """让内核回收第 start 到 stop 个点所在的映射页面（文件页面仍在页缓存中，再次访问时重新映射）"""
+        if self._mmap is None or not hasattr(mmap, 'MADV_DONTNEED') or not self.data.flags.c_contiguous:
+            return
+        row = self.data.strides[0]
+        begin = (self._offset + start * row) // mmap.PAGESIZE * mmap.PAGESIZE
+        end = min(self._offset + stop * row, len(self._mmap))
+        if end > begin:
+            self._mmap.madvise(mmap.MADV_DONTNEED, begin, end - begin)
+
+
+def _unpack_rgb(values: numpy.ndarray) -> numpy.ndarray:
+    """PCL 的 rgb：float32 / uint32 中按 0x00RRGGBB 打包"""
+    packed = numpy.ascontiguousarray(values).view(numpy.uint32)
+    colors = numpy.empty((len(packed), 3), dtype=numpy.uint8)
+    for i, shift in enumerate((16, 8, 0)):
+        colors[:, i] = (packed >> shift) & 0xff
+    return colors
+
+
+def load_point_file(path: str, stride: int = 1, max_points: int = None, chunk_points: int = _CHUNK_POINTS,
+                    with_intensity: bool = True, with_color: bool = True) \
+        -> tuple[numpy.ndarray, numpy.ndarray | None, numpy.ndarray | None]:
+    """
+    读取点云文件，返回 (xyz, intensity, colors)，没有对应字段（或不需要）时为 None。
+    stride: 每 stride 个点取一个；max_points: 点数上限，按需增大 stride（沿文件顺序均匀抽取）
+    坐标保持文件中的 float32 / float64。逐块（chunk_points 个输入点）写入连续的输出数组，
+    处理完的块释放映射页面；C 连续的 (N, 3) 浮点 npy 不降采样时直接返回映射视图，不拷贝
+    """
+    assert stride >= 1, 'stride 必须不小于 1'
+    points = PointFile(path)
+    data = points.data
+    n = len(data)
+    if max_points is not None and max_points > 0:
+        stride = max(stride, -(-n // max_points))
+    intensity_field = points.intensity_field() if with_intensity else None
+    color_field = points.color_field() if with_color else None
+
+    if stride == 1 and not points.fields and data.shape[1] == 3 and data.flags.c_contiguous and \
+            data.dtype in (numpy.float32, numpy.float64):
+        return data, None, None
+
+    n_out = -(-n // stride)
+    xyz = numpy.empty((n_out, 3), dtype=_coordinate_dtype(xyz_view(data[:0]).dtype))
+    intensity = None
+    if intensity_field is not None:
+        column = data[intensity_field] if points.fields else data[:, intensity_field]
+        intensity = numpy.empty(n_out, dtype=_coordinate_dtype(column.dtype))
+    colors = numpy.empty((n_out, 3), dtype=numpy.uint8) if color_field is not None else None
+
+    # 块的起点是 stride 的整数倍，块内直接 [::stride]
+    chunk = max(1, chunk_points // stride) * stride
+    out = 0
+    for start in range(0, n, chunk):
+        block = data[start:start + chunk:stride]
+        m = len(block)
+        xyz[out:out + m] = xyz_view(block)
+        if intensity is not None:
+            intensity[out:out + m] = block[intensity_field] if points.fields else block[:, intensity_field]
+        if colors is not None:
+            colors[out:out + m] = _unpack_rgb(block[color_field])
+        out += m
+        points.release(start, min(start + chunk, n))
+    return xyz, intensity, colors
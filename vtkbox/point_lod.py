@@ -0,0 +1,190 @@
+import numpy
+from vtkmodules.vtkCommonCore import vtkPoints
+from vtkmodules.vtkCommonDataModel import vtkPolyData
+from vtkmodules.vtkCommonMath import vtkMatrix4x4
+from vtkmodules.vtkRenderingCore import vtkActor, vtkPointGaussianMapper, vtkRenderer
+from vtkmodules.util.numpy_support import numpy_to_vtk, vtk_to_numpy
+
+_MORTON_BITS = 10  # 每轴 10 位，八叉树最多 10 层，编码为 uint32
+
+
+def _part1by2(x: numpy.ndarray) -> numpy.ndarray:
+    """把 10 位整数的每一位间隔两位展开，用于 morton 编码"""
+    x &= 0x3ff
+    x |= x << 16
+    x &= 0x030000ff
+    x |= x << 8
+    x &= 0x0300f00f
+    x |= x << 4
+    x &= 0x030c30c3
+    x |= x << 2
+    x &= 0x09249249
+    return x
+
+
+def morton_codes(xyz: numpy.ndarray) -> numpy.ndarray:
+    """按包围盒把点量化到 1024^3 网格，返回 uint32 morton 编码"""
+    lo = xyz.min(axis=0)
+    extent = float((xyz.max(axis=0) - lo).max())
+    scale = ((1 << _MORTON_BITS) - 1) / extent if extent > 0 else 0.0
+    codes = numpy.zeros(len(xyz), dtype=numpy.uint32)
+    for axis in range(3):
+        q = ((xyz[:, axis] - lo[axis]) * scale).astype(numpy.uint32)
+        codes |= _part1by2(q) << numpy.uint32(axis)
+    return codes
+
+
+def octree_levels(xyz: numpy.ndarray, budget: int, max_levels: int = 4) -> list[numpy.ndarray]:
+    """
+    八叉树多级降采样，返回由粗到细、点数都不超过 budget 的若干级下标（最多 max_levels 级）。
+    按 morton 序排序一次，第 l 层每个体素（morton 编码的前 3l 位相同）取序中第一个点，相邻层逐级嵌套；
+    点数首次超过 budget 的层在 morton 序上等间隔抽取到 budget 个点作为最细一级，保持空间分布均匀。
+    """
+    n = len(xyz)
+    if n <= budget:
+        return [numpy.arange(n)]
+    codes = morton_codes(xyz)
+    order = numpy.argsort(codes)
+    codes = codes[order]
+    levels = []
+    for level in range(_MORTON_BITS + 1):
+        keys = codes >> numpy.uint32(3 * (_MORTON_BITS - level))
+        first = numpy.concatenate(([0], numpy.flatnonzero(keys[1:] != keys[:-1]) + 1))
+        if len(first) > budget:
+            levels.append(first[numpy.linspace(0, len(first) - 1, budget).astype(numpy.intp)])
+            break
+        if not levels or len(first) > len(levels[-1]):
+            levels.append(first)
+        if len(first) == budget:
+            break
+    return [order[first] for first in levels[-max_levels:]]
+
+
+def octree_subsample(xyz: numpy.ndarray, budget: int) -> numpy.ndarray:
+    """八叉树降采样，返回不超过 budget 个点的下标，即 octree_levels 的最细一级"""
+    return octree_levels(xyz, budget, 1)[-1]
+
+
+def _subset_polydata(polydata: vtkPolyData, index: numpy.ndarray) -> vtkPolyData:
+    xyz = vtk_to_numpy(polydata.GetPoints().GetData())[index]
+    vtk_points = vtkPoints()
+    vtk_points.SetData(numpy_to_vtk(xyz))
+    subset = vtkPolyData()
+    subset.SetPoints(vtk_points)
+    scalars = polydata.GetPointData().GetScalars()
+    if scalars is not None:
+        colors = numpy_to_vtk(vtk_to_numpy(scalars)[index])
+        colors.SetName(scalars.GetName())
+        subset.GetPointData().SetScalars(colors)
+    return subset
+
+
+def _level_actor(actor: vtkActor, polydata: vtkPolyData) -> vtkActor:
+    """与 actor 共用 property 的降采样层 actor，有自己的 mapper，不参与拾取"""
+    source = actor.GetMapper()
+    mapper = vtkPointGaussianMapper()
+    mapper.SetInputData(polydata)
+    mapper.EmissiveOff()
+    mapper.SetScaleFactor(0.0)
+    mapper.SetScalarVisibility(source.GetScalarVisibility())
+    level = vtkActor()
+    level.SetMapper(mapper)
+    level.SetProperty(actor.GetProperty())
+    level.PickableOff()
+    level.VisibilityOff()
+    return level
+
+
+class PointLOD:
+    """
+    点云 actor 的多级细节：静止时显示完整点云，相机交互时每帧选择点数不超过 budget 的最细一级八叉树降采样。
+    每一级是单独的 actor / mapper 并加入 renderer，切换时只改可见性：完整点云与各级的顶点缓冲上传一次后
+    不会因切换而重新上传（mapper 的输入变化会让整个缓冲重新上传）。
+    """
+    def __init__(self, actor: vtkActor, budget: int, renderer: vtkRenderer):
+        self.actor = actor
+        self.budget = budget
+        self.renderer = renderer
+        self.full = actor.GetMapper().GetInput()  # type: vtkPolyData # 完整点云，始终是 actor 的 mapper 输入
+        self.levels = []  # type: list[vtkActor] # 由粗到细
+        self.interactive = False
+        self._active = None  # type: vtkActor | None # 交互中显示的一级
+        self._matrix = vtkMatrix4x4()
+        self.rebuild()
+
+    @property
+    def level_points(self) -> list[int]:
+        return [level.GetMapper().GetInput().GetNumberOfPoints() for level in self.levels]
+
+    def rebuild(self):
+        """点数据或 budget 变化后重新生成各级降采样"""
+        self._show(None)
+        for level in self.levels:
+            self.renderer.RemoveActor(level)
+        self.levels = []
+        n = self.full.GetNumberOfPoints()
+        if n > self.budget:
+            xyz = vtk_to_numpy(self.full.GetPoints().GetData())
+            for index in octree_levels(xyz, self.budget):
+                level = _level_actor(self.actor, _subset_polydata(self.full, index))
+                self.renderer.AddActor(level)
+                self.levels.append(level)
+        self.set_interactive(self.interactive)
+
+    def set_budget(self, budget: int):
+        """
+        调整交互时的点数上限。落在已生成的各级之间时下一帧直接换用更粗的一级，
+        比最细一级还大或比最粗一级还小时重新生成
+        """
+        self.budget = budget
+        points = self.level_points
+        if self.full.GetNumberOfPoints() <= budget:
+            stale = bool(points)
+        else:
+            stale = not points or points[0] > budget or points[-1] < budget
+        if stale:
+            self.rebuild()
+        else:
+            self.update()
+
+    def select(self) -> vtkActor | None:
+        """点数不超过 budget 的最细一级，都超过时为最粗一级"""
+        if not self.levels:
+            return None
+        fitting = [level for level, n in zip(self.levels, self.level_points) if n <= self.budget]
+        return fitting[-1] if fitting else self.levels[0]
+
+    def set_interactive(self, value: bool):
+        self.interactive = value
+        self.update()
+
+    def update(self):
+        """每帧渲染前调用：交互中显示所选一级并同步完整点云 actor 的位姿，否则显示完整点云"""
+        self._show(self.select() if self.interactive else None)
+
+    def set_visible(self, value: bool):
+        if self._active is not None:
+            self._active.SetVisibility(value)
+        else:
+            self.actor.SetVisibility(value)
+
+    def _show(self, level: vtkActor | None):
+        visible = self._active.GetVisibility() if self._active is not None else self.actor.GetVisibility()
+        if level is not self._active:
+            if self._active is not None:
+                self._active.VisibilityOff()
+            self._active = level
+        if level is None:
+            self.actor.SetVisibility(visible)
+            return
+        self.actor.VisibilityOff()
+        level.SetVisibility(visible)
+        self._matrix.DeepCopy(self.actor.GetMatrix())
+        if level.GetUserMatrix() is not self._matrix:
+            level.SetUserMatrix(self._matrix)
+
+    def remove(self):
+        self._show(None)
+        for level in self.levels:
+            self.renderer.RemoveActor(level)
+        self.levels = []
@@ -0,0 +1,288 @@
+"""
+城市级分块点云图层：瓦片（每块一个点云文件）的包围盒构成空间索引，按相机视锥决定哪些瓦片需要常驻。
+进入视野的瓦片由线程池在后台读取（内存映射、可降采样，强度着色也在工作线程完成），主线程只创建 actor；
+离开视野的瓦片立即隐藏，在常驻内存超过预算时按最近一次可见的时间（LRU）淘汰。
+"""
+import json
+import os
+import time
+import warnings
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy
+from vtkmodules.vtkRenderingCore import vtkActor, vtkAssembly, vtkCamera
+
+from .actor_creator import point_actor, xyz_view
+from .color import intensity_to_rgb_array
+from .point_io import PointFile, load_point_file
+
+_BYTES_PER_POINT = 15  # float32 坐标 + uint8 RGB，用于加载前估计瓦片大小
+
+
+def build_tile_index(paths: list[str], index_path: str = None) -> list[dict]:
+    """
+    扫描瓦片文件（内存映射按块读取）计算包围盒与点数，返回 [{'path', 'bounds', 'points'}]。
+    给出 index_path 时写入 JSON（路径相对于索引文件），之后用 load_tile_index 读取，无需再次扫描
+    """
+    tiles = []
+    for path in paths:
+        points = PointFile(path)
+        lo, hi = numpy.full(3, numpy.inf), numpy.full(3, -numpy.inf)
+        chunk = 1 << 22
+        for start in range(0, len(points), chunk):
+            xyz = xyz_view(points.data[start:start + chunk])
+            numpy.minimum(lo, xyz.min(axis=0), out=lo)
+            numpy.maximum(hi, xyz.max(axis=0), out=hi)
+            points.release(start, start + chunk)
+        bounds = [float(v) for pair in zip(lo, hi) for v in pair] if len(points) else [0.0] * 6
+        tiles.append({'path': path, 'bounds': bounds, 'points': len(points)})
+    if index_path is not None:
+        root = os.path.dirname(os.path.abspath(index_path))
+        with open(index_path, 'w') as f:
+            json.dump([dict(tile, path=os.path.relpath(os.path.abspath(tile['path']), root)) for tile in tiles], f)
+    return tiles
+
+
+def load_tile_index(index_path: str) -> list[dict]:
+    root = os.path.dirname(os.path.abspath(index_path))
+    with open(index_path) as f:
+        tiles = json.load(f)
+    return [dict(tile, path=os.path.join(root, tile['path'])) for tile in tiles]
+
+
+def frustum_side_planes(camera: vtkCamera, aspect: float) -> numpy.ndarray:
+    """
+    视锥左右上下四个平面 (4, 4)，法向指向视锥内。不用近、远平面：vtk 按已加载的 actor 自动设置裁剪范围，
+    尚未加载的瓦片会落在远平面之外，远近由 max_distance 控制
+    """
+    planes = [0.0] * 24
+    camera.GetFrustumPlanes(aspect, planes)
+    return numpy.array(planes).reshape(6, 4)[:4]
+
+
+def boxes_in_frustum(bounds: numpy.ndarray, planes: numpy.ndarray) -> numpy.ndarray:
+    """(T, 6) 包围盒与视锥平面求交，对每个平面取沿法向最远的角点，都在平面内侧时视为可见（保守）"""
+    lo, hi = bounds[:, 0::2], bounds[:, 1::2]
+    inside = numpy.ones(len(bounds), dtype=bool)
+    for a, b, c, d in planes:
+        normal = numpy.array([a, b, c])
+        corner = numpy.where(normal >= 0, hi, lo)
+        inside &= corner @ normal + d >= 0
+    return inside
+
+
+def planes_to_local(planes: numpy.ndarray, matrix: numpy.ndarray) -> numpy.ndarray:
+    """
+    世界坐标下的平面 (P, 4) 变换到局部坐标，matrix 为局部到世界的 4x4 变换：
+    n·(M x) + d = ([n, d] M)·x，结果未归一化，只用于判断内外侧
+    """
+    return planes @ matrix
+
+
+def box_distances(bounds: numpy.ndarray, point) -> numpy.ndarray:
+    """点到各包围盒的距离，点在盒内时为 0"""
+    point = numpy.asarray(point)
+    gap = numpy.maximum(numpy.maximum(bounds[:, 0::2] - point, point - bounds[:, 1::2]), 0)
+    return numpy.linalg.norm(gap, axis=1)
+
+
+class _Tile:
+    def __init__(self, entry: dict):
+        self.path = entry['path']
+        self.points = entry.get('points')
+        self.actor = None  # type: vtkActor | None
+        self.future = None  # type: Future | None
+        self.nbytes = 0
+        self.last_seen = 0  # 最近一次在视野内的 update 序号
+        self.failed = False  # 读取失败的瓦片不再重试
+
+
+class TiledPointScene:
+    """
+    分块点云图层，所有瓦片的 actor 放在一个 vtkAssembly 中。update() 根据当前相机调度加载、显示与淘汰，
+    VTKVisualizer.add_tiles 创建的图层在渲染循环中自动调用
+    """
+
+    def __init__(self, tiles: list[dict] | str, memory_budget: int = 2 << 30, workers: int = 4,
+                 max_points_per_tile: int = None, stride: int = 1, max_distance: float = None,
+                 color: tuple[float, float, float] = (1, 1, 1), point_size=3, cmap: str = 'cym',
+                 norm: str | tuple[float, float] = 'max'):
+        """
+        tiles: load_tile_index / build_tile_index 的结果或索引 JSON 文件的路径
+        memory_budget: 常驻瓦片点数据的内存上限（字节），视野内的瓦片不会被淘汰
+        max_points_per_tile / stride: 读取时降采样
+        max_distance: 只加载与相机距离不超过该值的瓦片，None 为不限
+        cmap / norm: 强度着色，各瓦片单独归一化，需要瓦片间颜色一致时用固定范围 norm=(lo, hi)
+        """
+        if isinstance(tiles, str):
+            tiles = load_tile_index(tiles)
+        self.bounds = numpy.array([tile['bounds'] for tile in tiles], dtype=numpy.float64).reshape(-1, 6)
+        self.memory_budget = memory_budget
+        self.max_points_per_tile = max_points_per_tile
+        self.stride = stride
+        self.max_distance = max_distance
+        self.color = color
+        self.point_size = point_size
+        self.cmap = cmap
+        self.norm = norm
+        self.assembly = vtkAssembly()
+
+        self._tiles = [_Tile(tile) for tile in tiles]
+        self._workers = max(1, workers)
+        self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix='vtkbox-tiles')
+        self._in_view = numpy.zeros(len(self._tiles), dtype=bool)
+        self._view_key = None  # 上次调度时的相机 MTime、视口宽高比与 assembly 的变换
+        self._updates = 0
+        self.loads = 0
+        self.evictions = 0
+        self.cancelled = 0
+        self.load_seconds = 0.0
+
+    def __len__(self) -> int:
+        return len(self._tiles)
+
+    def _estimate(self, tile: _Tile) -> int:
+        if tile.points is None:
+            return os.path.getsize(tile.path)
+        n = -(-tile.points // self.stride)
+        if self.max_points_per_tile:
+            n = min(n, self.max_points_per_tile)
+        return n * _BYTES_PER_POINT
+
+    def _load(self, tile: _Tile) -> tuple[numpy.ndarray, numpy.ndarray | None, float]:
+        """工作线程中读取瓦片并完成着色，主线程创建 actor 时不再拷贝"""
+        start = time.perf_counter()
+        xyz, intensity, colors = load_point_file(tile.path, self.stride, self.max_points_per_tile)
+        if colors is None and intensity is not None:
+            colors = intensity_to_rgb_array(intensity, self.cmap, self.norm)
+        return xyz, colors, time.perf_counter() - start
+
+    def _resident_bytes(self) -> int:
+        return sum(tile.nbytes for tile in self._tiles if tile.actor is not None)
+
+    def _evict(self, tile: _Tile):
+        self.assembly.RemovePart(tile.actor)
+        tile.actor = None
+        tile.nbytes = 0
+        self.evictions += 1
+
+    def _collect(self) -> bool:
+        """为读取完成的瓦片创建 actor"""
+        changed = False
+        for i, tile in enumerate(self._tiles):
+            if tile.future is None or not tile.future.done():
+                continue
+            future, tile.future = tile.future, None
+            if future.cancelled():
+                continue
+            try:
+                xyz, colors, seconds = future.result()
+            except Exception as e:
+                warnings.warn(f'读取瓦片 {tile.path} 失败: {e}')
+                tile.failed = True
+                continue
+            tile.actor = point_actor(xyz, self.color, self.point_size, colors)
+            tile.actor.SetVisibility(bool(self._in_view[i]))
+            tile.nbytes = xyz.nbytes + (colors.nbytes if colors is not None else 0)
+            self.assembly.AddPart(tile.actor)
+            self.loads += 1
+            self.load_seconds += seconds
+            changed = True
+        return changed
+
+    def update(self, camera: vtkCamera, aspect: float, wait: bool = False) -> bool:
+        """
+        按相机调度瓦片：收取读取完成的瓦片，显示视野内、隐藏视野外的瓦片，按距离由近到远提交读取，
+        超出内存预算时淘汰最久未在视野内的瓦片。wait 时阻塞到视野内能放进预算的瓦片都加载完成。
+        返回场景是否有变化
+        """
+        changed = self._collect()
+        pending = any(tile.future is not None for tile in self._tiles)
+        matrix = self.assembly.GetMatrix()
+        matrix = numpy.array([matrix.GetElement(i, j) for i in range(4) for j in range(4)]).reshape(4, 4)
+        view_key = (camera.GetMTime(), aspect, matrix.tobytes())
+        if view_key == self._view_key and not changed and not pending and not wait:
+            return False
+        self._view_key = view_key
+        self._updates += 1
+
+        # 瓦片包围盒在 assembly 的局部坐标下，视锥平面与相机位置变换到局部坐标后再判断
+        position = numpy.linalg.solve(matrix, [*camera.GetPosition(), 1.0])[:3]
+        in_view = boxes_in_frustum(self.bounds, planes_to_local(frustum_side_planes(camera, aspect), matrix))
+        # 局部距离按 assembly 的（平均）缩放换算为世界距离，与 max_distance 比较
+        distance = box_distances(self.bounds, position) * numpy.cbrt(abs(numpy.linalg.det(matrix[:3, :3])))
+        if self.max_distance is not None:
+            in_view &= distance <= self.max_distance
+        self._in_view = in_view
+
+        for i, tile in enumerate(self._tiles):
+            if in_view[i]:
+                tile.last_seen = self._updates
+            elif tile.future is not None and tile.future.cancel():
+                tile.future = None
+                self.cancelled += 1
+            if tile.actor is not None and bool(tile.actor.GetVisibility()) != bool(in_view[i]):
+                tile.actor.SetVisibility(bool(in_view[i]))
+                changed = True
+
+        changed = self._schedule(numpy.flatnonzero(in_view)[numpy.argsort(distance[in_view])]) or changed
+        while wait and any(tile.future is not None for tile in self._tiles):
+            for tile in self._tiles:
+                if tile.future is not None:
+                    tile.future.exception()  # 等待完成
+            changed = self._collect() or changed
+            changed = self._schedule(numpy.flatnonzero(in_view)[numpy.argsort(distance[in_view])]) or changed
+        return changed
+
+    def _schedule(self, wanted: numpy.ndarray) -> bool:
+        """按 wanted（由近到远）提交读取，在途读取数不超过 2 倍线程数，必要时淘汰视野外的瓦片腾出预算"""
+        changed = False
+        in_flight = [tile for tile in self._tiles if tile.future is not None]
+        budget_used = self._resident_bytes() + sum(self._estimate(tile) for tile in in_flight)
+        evictable = sorted((tile for i, tile in enumerate(self._tiles)
+                            if tile.actor is not None and not self._in_view[i]), key=lambda t: t.last_seen)
+        for i in wanted:
+            if len(in_flight) >= 2 * self._workers:
+                break
+            tile = self._tiles[i]
+            if tile.actor is not None or tile.future is not None or tile.failed:
+                continue
+            size = self._estimate(tile)
+            while budget_used + size > self.memory_budget and evictable:
+                victim = evictable.pop(0)
+                budget_used -= victim.nbytes
+                self._evict(victim)
+                changed = True
+            if budget_used + size > self.memory_budget:
+                break  # 视野内的瓦片已占满预算，更远的瓦片不再加载
+            tile.future = self._executor.submit(self._load, tile)
+            in_flight.append(tile)
+            budget_used += size
+        # 视野变化后常驻量仍可能超出预算（如预算被调小），淘汰视野外的瓦片
+        resident = self._resident_bytes()
+        while resident > self.memory_budget and evictable:
+            victim = evictable.pop(0)
+            resident -= victim.nbytes
+            self._evict(victim)
+            changed = True
+        return changed
+
+    def stats(self) -> dict:
+        resident = [tile for tile in self._tiles if tile.actor is not None]
+        return {
+            'tiles': len(self._tiles),
+            'in_view': int(self._in_view.sum()),
+            'resident': len(resident),
+            'loading': sum(tile.future is not None for tile in self._tiles),
+            'failed': sum(tile.failed for tile in self._tiles),
+            'resident_bytes': sum(tile.nbytes for tile in resident),
+            'resident_points': sum(tile.actor.GetMapper().GetInput().GetNumberOfPoints() for tile in resident),
+            'memory_budget': self.memory_budget,
+            'loads': self.loads,
+            'evictions': self.evictions,
+            'cancelled': self.cancelled,
+            'mean_load_ms': self.load_seconds / self.loads * 1e3 if self.loads else 0.0,
+        }
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
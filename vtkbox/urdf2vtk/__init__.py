@@ -1 +1,3 @@
 from .vtk_struct import VRobot, VLink, VJoint
+from .mesh_cache import MeshCache, mesh_cache
+from .trajectory import TrajectoryPlayer
@@ -4,11 +4,24 @@ from math import degrees, ceil, sqrt
 from typing import Optional, List
 
 from urdf_parser_py.urdf import Visual, Box, Cylinder, Sphere, Material, Mesh, Collision
-from vtkmodules import all as vtk
+from vtkmodules.vtkCommonCore import vtkPoints
+from vtkmodules.vtkCommonDataModel import vtkCellArray, vtkPolyData, vtkPolyLine
+from vtkmodules.vtkCommonExecutionModel import vtkTrivialProducer
+from vtkmodules.vtkCommonTransforms import vtkTransform
+from vtkmodules.vtkFiltersGeneral import vtkTransformPolyDataFilter
+from vtkmodules.vtkFiltersModeling import vtkRotationalExtrusionFilter
+from vtkmodules.vtkFiltersSources import vtkCubeSource, vtkCylinderSource, vtkSphereSource
+from vtkmodules.vtkRenderingCore import vtkActor, vtkPolyDataMapper, vtkProperty
+# 注册 OpenGL 对象工厂，之后创建的 mapper / actor 才是可渲染的 OpenGL 实现
+import vtkmodules.vtkRenderingOpenGL2  # noqa: F401
+
+from .mesh_cache import mesh_cache
 
 
 class ActorCreator:
     rm_mesh_package_name = False
+    # collision mesh 默认简化到该三角形数以内，0 为不简化
+    collision_max_triangles = 5000
 
     def __init__(self, mesh_root: str):
         self._material_map = {}
@@ -30,12 +43,12 @@ class ActorCreator:
         full_path = os.path.join(self._mesh_root, path)
         return full_path
 
-    def paser_visual(self, visual: Visual) -> Optional[vtk.vtkActor]:
+    def paser_visual(self, visual: Visual) -> Optional[vtkActor]:
         actor = self._create_actor(getattr(visual, "geometry", None), getattr(visual, "origin", None))
         if actor is None:
             return None
         # 染色
-        prop: vtk.vtkProperty = actor.GetProperty()
+        prop: vtkProperty = actor.GetProperty()
         if hasattr(visual, "material") and visual.material:
             if visual.material.color is not None:
                 r, g, b, a = visual.material.color.rgba
@@ -47,16 +60,17 @@ class ActorCreator:
                 prop.SetOpacity(a)
         return actor
 
-    def paser_collision(self, collision: Collision) -> Optional[vtk.vtkActor]:
-        actor = self._create_actor(getattr(collision, "geometry", None), getattr(collision, "origin", None), True)
+    def paser_collision(self, collision: Collision) -> Optional[vtkActor]:
+        actor = self._create_actor(getattr(collision, "geometry", None), getattr(collision, "origin", None), True,
+                                   self.collision_max_triangles)
         if actor is None:
             return None
 
-        prop: vtk.vtkProperty = actor.GetProperty()
+        prop: vtkProperty = actor.GetProperty()
         prop.SetOpacity(0.5)
         return actor
 
-    def _create_actor(self, geometry, origin, capsule=False) -> Optional[vtk.vtkActor]:
+    def _create_actor(self, geometry, origin, capsule=False, max_triangles=0) -> Optional[vtkActor]:
         if isinstance(geometry, Box):
             source = box_source(geometry.size)
         elif isinstance(geometry, Cylinder):
@@ -67,7 +81,7 @@ class ActorCreator:
         elif isinstance(geometry, Sphere):
             source = sphere_source(geometry.radius)
         elif isinstance(geometry, Mesh):
-            source = mesh_source(self.get_mesh_filepath(geometry.filename), geometry.scale)
+            source = mesh_source(self.get_mesh_filepath(geometry.filename), geometry.scale, max_triangles)
         else:
             warnings.warn(f'Unknown geometry type: {type(geometry)}')
             return None
@@ -75,7 +89,7 @@ class ActorCreator:
             return None
 
         # rpy 生效顺序为 zyx
-        transform = vtk.vtkTransform()
+        transform = vtkTransform()
         if hasattr(origin, 'xyz') and origin.xyz:
             transform.Translate(*origin.xyz)
         if hasattr(origin, 'rpy') and origin.rpy:
@@ -84,21 +98,19 @@ class ActorCreator:
             transform.RotateY(degrees(p))
             transform.RotateX(degrees(r))
 
-        transform_filter = vtk.vtkTransformPolyDataFilter()
-        transform_filter.SetTransform(transform)
-        transform_filter.SetInputConnection(source.GetOutputPort())
-
-        mapper = vtk.vtkPolyDataMapper()
-        mapper.SetInputConnection(transform_filter.GetOutputPort())
+        # origin 作为 actor 的变换，不拷贝几何，缓存的 mesh 可在多个 actor 间共享
+        mapper = vtkPolyDataMapper()
+        mapper.SetInputConnection(source.GetOutputPort())
 
-        actor = vtk.vtkActor()
+        actor = vtkActor()
         actor.SetMapper(mapper)
+        actor.SetUserTransform(transform)
 
         return actor
 
 
 def box_source(size: list):
-    source = vtk.vtkCubeSource()
+    source = vtkCubeSource()
     x, y, z = size
     source.SetXLength(x)
     source.SetYLength(y)
@@ -107,32 +119,32 @@ def box_source(size: list):
 
 
 def cylinder_source(length: float, radius: float):
-    source = vtk.vtkCylinderSource()
+    source = vtkCylinderSource()
     source.SetHeight(length)
     source.SetRadius(radius)
     resolution = max(6, ceil(sqrt(radius) // 0.006))
     source.SetResolution(resolution)
 
     # urdf cylinder z轴对称，vtk为y轴对称
-    transform = vtk.vtkTransform()
+    transform = vtkTransform()
     transform.RotateX(90)
 
-    filter = vtk.vtkTransformPolyDataFilter()
+    filter = vtkTransformPolyDataFilter()
     filter.SetInputConnection(source.GetOutputPort())
     filter.SetTransform(transform)
     return filter
 
 
 def capsule_source(length: float, radius: float):
-    import vtk, math
+    import math
 
     # 【构造胶囊体轮廓：在 x-z 平面构造右侧半边轮廓】
     # 轮廓包含三部分：
     # 1. 底部四分之一圆弧，从 (0, -length/2 - radius) 到 (radius, -length/2)
     # 2. 中间竖直线，从 (radius, -length/2) 到 (radius, length/2)
     # 3. 顶部四分之一圆弧，从 (radius, length/2) 到 (0, length/2 + radius)
-    points = vtk.vtkPoints()
-    polyLine = vtk.vtkPolyLine()
+    points = vtkPoints()
+    polyLine = vtkPolyLine()
     point_id = 0
 
     # 底部四分之一圆弧
@@ -167,15 +179,15 @@ def capsule_source(length: float, radius: float):
     for i in range(point_id):
         polyLine.GetPointIds().SetId(i, i)
 
-    cells = vtk.vtkCellArray()
+    cells = vtkCellArray()
     cells.InsertNextCell(polyLine)
 
-    profile = vtk.vtkPolyData()
+    profile = vtkPolyData()
     profile.SetPoints(points)
     profile.SetLines(cells)
 
     # 【旋转生成三维胶囊体】
-    extrude = vtk.vtkRotationalExtrusionFilter()
+    extrude = vtkRotationalExtrusionFilter()
     extrude.SetInputData(profile)
     extrude.SetResolution(60)  # 旋转分辨率，可根据需要调整
     extrude.SetAngle(360)  # 完整旋转 360 度
@@ -185,7 +197,7 @@ def capsule_source(length: float, radius: float):
 
 
 def sphere_source(radius: float):
-    source = vtk.vtkSphereSource()
+    source = vtkSphereSource()
     source.SetRadius(radius)
     phi_resolution = max(6, ceil(sqrt(radius) // 0.012))
     theta_resolution = max(6, ceil(sqrt(radius) // 0.008))
@@ -194,20 +206,18 @@ def sphere_source(radius: float):
     return source
 
 
-def mesh_source(file_path, scale):
+def mesh_source(file_path, scale, max_triangles=0):
     if not file_path.lower().endswith('.stl'):
         warnings.warn('当前版本仅支持stl文件')
         return None
-    reader = vtk.vtkSTLReader()
-    reader.SetFileName(file_path)
-    if scale is None:
-        return reader
-    else:
-        transform = vtk.vtkTransform()
-        transform.Scale(scale)
-
-        transformFilter = vtk.vtkTransformPolyDataFilter()
-        transformFilter.SetInputConnection(reader.GetOutputPort())
-        transformFilter.SetTransform(transform)
-        # transformFilter.Update()
-        return transformFilter
+    try:
+        polydata = mesh_cache.get(file_path, scale)
+    except FileNotFoundError:
+        warnings.warn(f'mesh 文件不存在: {file_path}')
+        return None
+    if max_triangles:
+        polydata = mesh_cache.get_decimated(polydata, max_triangles)
+    # 包装缓存中的 polydata，不拷贝
+    source = vtkTrivialProducer()
+    source.SetOutput(polydata)
+    return source
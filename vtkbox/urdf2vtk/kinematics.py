@@ -0,0 +1,145 @@
+"""
+预编译的运动学链：静态变换、关节轴与类型、mimic 关系均展开为 numpy 数组，
+由一组 q 批量计算所有关节的局部变换与所有 link 相对 root link 的位姿。
+"""
+import numpy
+
+_FIXED, _PRISMATIC, _REVOLUTE = 0, 1, 2
+
+
+def static_matrix(xyz, rpy) -> numpy.ndarray:
+    """URDF origin 对应的 4x4 矩阵，旋转顺序为 Rz(yaw) @ Ry(pitch) @ Rx(roll)"""
+    roll, pitch, yaw = rpy
+    cr, sr = numpy.cos(roll), numpy.sin(roll)
+    cp, sp = numpy.cos(pitch), numpy.sin(pitch)
+    cy, sy = numpy.cos(yaw), numpy.sin(yaw)
+    matrix = numpy.eye(4)
+    matrix[:3, :3] = [
+        [cy * cp, cy * sp * sr - sy * cr, cy * sp * cr + sy * sr],
+        [sy * cp, sy * sp * sr + cy * cr, sy * sp * cr - cy * sr],
+        [-sp, cp * sr, cp * cr],
+    ]
+    matrix[:3, 3] = xyz
+    return matrix
+
+
+def _cross_matrices(axes: numpy.ndarray) -> numpy.ndarray:
+    """(J,3) -> (J,3,3) 叉乘矩阵 K，K v = axis x v"""
+    x, y, z = axes.T
+    zero = numpy.zeros_like(x)
+    return numpy.stack([
+        numpy.stack([zero, -z, y], -1),
+        numpy.stack([z, zero, -x], -1),
+        numpy.stack([-y, x, zero], -1),
+    ], -2)
+
+
+class KinematicChain:
+    """
+    joints 按从 root 开始的拓扑序排列。第 i 个关节的取值为 q[source[i]] * multiplier[i] + offset[i]，
+    source 为 -1 的关节（fixed）不运动。link i 的位姿 = 父关节的父 link 位姿 @ static @ motion。
+    """
+
+    def __init__(self, robot):
+        names = robot.positive_joints
+        q_index = {name: i for i, name in enumerate(names)}
+
+        # 从 root 按广度优先展开，保证父关节排在子关节之前
+        self.link_names = [robot.root.name]  # type: list[str]
+        self.joint_names = []  # type: list[str]
+        joint_parent_link = []
+        frontier = [robot.root.name]
+        while frontier:
+            next_frontier = []
+            for link_name in frontier:
+                for joint_name in robot.link_map[link_name].children:
+                    joint = robot.joint_map[joint_name]
+                    self.joint_names.append(joint_name)
+                    joint_parent_link.append(self.link_names.index(joint.parent))
+                    self.link_names.append(joint.child)
+                    next_frontier.append(joint.child)
+            frontier = next_frontier
+
+        n = len(self.joint_names)
+        self.n_q = len(names)
+        self.static = numpy.empty((n, 4, 4))
+        self.axes = numpy.zeros((n, 3))
+        self.kinds = numpy.full(n, _FIXED, dtype=numpy.int8)
+        self.source = numpy.full(n, -1, dtype=numpy.intp)
+        self.multiplier = numpy.ones(n)
+        self.offset = numpy.zeros(n)
+        for i, joint_name in enumerate(self.joint_names):
+            joint = robot.joint_map[joint_name]
+            self.static[i] = joint.static_matrix
+            if joint.type == 'fixed':
+                continue
+            self.kinds[i] = _PRISMATIC if joint.type == 'prismatic' else _REVOLUTE
+            self.axes[i] = joint.unit_axis
+            # mimic 可能串联，展开到最终的独立关节
+            multiplier, offset = 1.0, 0.0
+            while joint.mimic:
+                multiplier, offset = multiplier * joint.mimic.multiplier, \
+                    offset * joint.mimic.multiplier + joint.mimic.offset
+                joint = robot.joint_map[joint.mimic.joint]
+            if joint.name in q_index:
+                self.source[i] = q_index[joint.name]
+                self.multiplier[i], self.offset[i] = multiplier, offset
+            else:
+                self.kinds[i] = _FIXED
+
+        # 指针倍增：第 k 步后 acc[i] 为 link i 相对其 2^k 级祖先的变换，共 log2(深度) 次批量矩阵乘
+        ancestor = numpy.array([0, *joint_parent_link], dtype=numpy.intp)
+        self._jumps = []  # type: list[numpy.ndarray]
+        while ancestor.any():
+            self._jumps.append(ancestor)
+            ancestor = ancestor[ancestor]
+        self.moving = numpy.flatnonzero(self.kinds != _FIXED)
+        # 位姿随 q 变化的 link（自身或祖先关节可动），其余 link 的位姿固定
+        dynamic = [False]
+        for i, parent in enumerate(joint_parent_link):
+            dynamic.append(dynamic[parent] or self.kinds[i] != _FIXED)
+        self.dynamic_links = numpy.flatnonzero(dynamic)
+
+        # static @ motion 展开为逐元素运算：R = S (I + sin K + (1 - cos) K^2)，t = S_t + d S axis
+        moving = self.moving
+        rotation = self.static[moving, :3, :3]
+        k = _cross_matrices(self.axes[moving])
+        revolute = (self.kinds[moving] == _REVOLUTE)[:, None, None]
+        self._rot_sin = numpy.where(revolute, rotation @ k, 0.0)
+        self._rot_cos = numpy.where(revolute, rotation @ k @ k, 0.0)
+        prismatic = (self.kinds[moving] == _PRISMATIC)[:, None]
+        self._trans_axis = numpy.where(prismatic, numpy.einsum('jab,jb->ja', rotation, self.axes[moving]), 0.0)
+
+    def joint_values(self, q: numpy.ndarray) -> numpy.ndarray:
+        """(..., n_q) -> (..., J)，展开 mimic"""
+        q = numpy.asarray(q, dtype=numpy.float64)
+        assert q.shape[-1] == self.n_q, f'q 长度应为 {self.n_q}，实际为 {q.shape[-1]}'
+        values = numpy.take(q, numpy.maximum(self.source, 0), axis=-1) * self.multiplier + self.offset
+        return numpy.where(self.source >= 0, values, 0.0)
+
+    def moving_transforms(self, q: numpy.ndarray) -> numpy.ndarray:
+        """运动关节（顺序同 moving）的局部变换 static @ motion，(..., M, 4, 4)"""
+        values = self.joint_values(q)[..., self.moving]
+        s = numpy.sin(values)[..., None, None]
+        c = numpy.cos(values)[..., None, None]
+        out = numpy.broadcast_to(self.static[self.moving], values.shape + (4, 4)).copy()
+        out[..., :3, :3] += s * self._rot_sin + (1 - c) * self._rot_cos
+        out[..., :3, 3] += values[..., None] * self._trans_axis
+        return out
+
+    def local_transforms(self, q: numpy.ndarray) -> numpy.ndarray:
+        """所有关节的局部变换 static @ motion，(..., J, 4, 4)"""
+        q = numpy.asarray(q, dtype=numpy.float64)
+        out = numpy.broadcast_to(self.static, q.shape[:-1] + self.static.shape).copy()
+        out[..., self.moving, :, :] = self.moving_transforms(q)
+        return out
+
+    def forward(self, q: numpy.ndarray) -> numpy.ndarray:
+        """所有 link 相对 root link 的位姿，(..., L, 4, 4)，顺序同 link_names"""
+        local = self.local_transforms(q)
+        poses = numpy.empty(local.shape[:-3] + (len(self.link_names), 4, 4))
+        poses[..., 0, :, :] = numpy.eye(4)
+        poses[..., 1:, :, :] = local
+        for ancestor in self._jumps:
+            poses = poses[..., ancestor, :, :] @ poses
+        return poses
@@ -0,0 +1,226 @@
+import os
+import threading
+import time
+import warnings
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+import numpy
+from vtkmodules.vtkCommonCore import vtkPoints
+from vtkmodules.vtkCommonDataModel import vtkCellArray, vtkPolyData
+from vtkmodules.vtkCommonTransforms import vtkTransform
+from vtkmodules.vtkFiltersCore import vtkQuadricDecimation, vtkTriangleFilter
+from vtkmodules.vtkFiltersGeneral import vtkTransformPolyDataFilter
+from vtkmodules.vtkIOGeometry import vtkSTLReader
+from vtkmodules.util.numpy_support import numpy_to_vtk, numpy_to_vtkIdTypeArray, vtk_to_numpy
+
+
+class MeshCache:
+    """
+    进程级 mesh 缓存，按 (真实路径, mtime, 文件大小, scale) 缓存解析并缩放后的 vtkPolyData。
+    缓存的 polydata 在多个 actor 之间共享，不做深拷贝，使用方不应修改它。
+    超出 max_bytes 时按 LRU 淘汰；被淘汰的 polydata 仍由引用它的 actor 持有。
+    每个 mesh 只计入 hits / misses 之一：prefetch 读取的记为 miss，之后第一次 get 取走它时不再记为 hit。
+    """
+
+    def __init__(self, max_bytes: int = 512 << 20):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # type: OrderedDict[tuple, tuple[vtkPolyData, int, vtkPolyData | None]]
+        self._bytes = 0
+        self._prefetched = set()  # prefetch 放入、尚未被 get 取走的 key
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(file_path: str, scale=None) -> tuple:
+        real_path = os.path.realpath(file_path)
+        st = os.stat(real_path)
+        return real_path, st.st_mtime_ns, st.st_size, tuple(scale) if scale is not None else None
+
+    def get(self, file_path: str, scale=None) -> vtkPolyData:
+        key = self.make_key(file_path, scale)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if key in self._prefetched:
+                    self._prefetched.discard(key)  # prefetch 时已记为 miss
+                else:
+                    self.hits += 1
+                return entry[0]
+            self.misses += 1
+        # 解析放在锁外，允许多线程并行读取不同文件
+        polydata = load_stl(key[0], scale)
+        self.put(key, polydata)
+        return polydata
+
+    def get_decimated(self, polydata: vtkPolyData, target_triangles: int) -> vtkPolyData:
+        """
+        返回 polydata 四边形误差简化到约 target_triangles 个三角形的版本，结果同样缓存。
+        同一份（缓存共享的）polydata 在多个 actor / 机器人之间只简化一次。
+        """
+        if polydata.GetNumberOfCells() <= target_triangles:
+            return polydata
+        key = ('decimated', polydata.GetAddressAsString('vtkPolyData'), polydata.GetMTime(), target_triangles)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        decimated = decimate(polydata, target_triangles)
+        # 同时持有原 polydata，保证其地址在条目存在期间不会被复用
+        self.put(key, decimated, source=polydata)
+        return decimated
+
+    def put(self, key: tuple, polydata: vtkPolyData, source: vtkPolyData = None, prefetched: bool = False):
+        size = polydata.GetActualMemorySize() * 1024
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            if prefetched:
+                self._prefetched.add(key)
+                self.misses += 1
+            self._entries[key] = (polydata, size, source)
+            self._bytes += size
+            self._evict()
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            key, (_, size, _) = self._entries.popitem(last=False)
+            self._prefetched.discard(key)
+            self._bytes -= size
+            self.evictions += 1
+
+    def prefetch(self, meshes: list[tuple[str, tuple | None]], workers: int = 0, executor: str = 'thread') \
+            -> dict[str, float]:
+        """
+        并行读取并缓存一批 (file_path, scale)，返回每个 mesh 的加载耗时（秒，命中缓存的为 0）。
+        workers: 并行数，0 为在当前线程依次读取
+        executor: 'thread' 线程池（vtk 读取时释放 GIL）/ 'process' 进程池，解析结果以 numpy 数组传回
+        """
+        assert executor in ('thread', 'process'), f'executor 错误: {executor}'
+        jobs = {}
+        timings = {}
+        for file_path, scale in meshes:
+            try:
+                key = self.make_key(file_path, scale)
+            except FileNotFoundError:
+                continue  # 交给 mesh_source 报告
+            with self._lock:
+                cached = key in self._entries
+            if cached:
+                timings.setdefault(file_path, 0.0)
+            else:
+                jobs.setdefault(key, file_path)
+        if not jobs:
+            return timings
+
+        if workers <= 0:
+            for key, file_path in jobs.items():
+                polydata, timings[file_path] = _timed_load(key[0], key[3])
+                self.put(key, polydata, prefetched=True)
+            return timings
+
+        pool_type = ThreadPoolExecutor if executor == 'thread' else ProcessPoolExecutor
+        load = _timed_load if executor == 'thread' else _timed_load_arrays
+        with pool_type(max_workers=workers) as pool:
+            futures = {key: pool.submit(load, key[0], key[3]) for key in jobs}
+            for key, future in futures.items():
+                try:
+                    result, timings[jobs[key]] = future.result()
+                except Exception as e:
+                    warnings.warn(f'mesh 加载失败: {jobs[key]}: {e}')
+                    continue
+                polydata = result if executor == 'thread' else _polydata_from_arrays(*result)
+                self.put(key, polydata, prefetched=True)
+        return timings
+
+    def set_max_bytes(self, max_bytes: int):
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._prefetched.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+def load_stl(file_path: str, scale=None) -> vtkPolyData:
+    reader = vtkSTLReader()
+    reader.SetFileName(file_path)
+    if scale is None:
+        reader.Update()
+        return reader.GetOutput()
+    transform = vtkTransform()
+    transform.Scale(scale)
+    transform_filter = vtkTransformPolyDataFilter()
+    transform_filter.SetInputConnection(reader.GetOutputPort())
+    transform_filter.SetTransform(transform)
+    transform_filter.Update()
+    return transform_filter.GetOutput()
+
+
+def decimate(polydata: vtkPolyData, target_triangles: int) -> vtkPolyData:
+    triangles = vtkTriangleFilter()
+    triangles.SetInputData(polydata)
+    triangles.Update()
+    n = triangles.GetOutput().GetNumberOfCells()
+    if n <= target_triangles:
+        return triangles.GetOutput()
+    decimation = vtkQuadricDecimation()
+    decimation.SetInputConnection(triangles.GetOutputPort())
+    decimation.SetTargetReduction(1 - target_triangles / n)
+    decimation.VolumePreservationOn()
+    decimation.Update()
+    return decimation.GetOutput()
+
+
+def _timed_load(file_path: str, scale=None):
+    start = time.perf_counter()
+    polydata = load_stl(file_path, scale)
+    return polydata, time.perf_counter() - start
+
+
+def _timed_load_arrays(file_path: str, scale=None):
+    """进程池中执行，vtk 对象不能跨进程，返回点与三角面的 numpy 数组"""
+    start = time.perf_counter()
+    polydata = load_stl(file_path, scale)
+    polys = polydata.GetPolys()
+    arrays = (vtk_to_numpy(polydata.GetPoints().GetData()).copy(),
+              vtk_to_numpy(polys.GetOffsetsArray()).copy(),
+              vtk_to_numpy(polys.GetConnectivityArray()).copy())
+    return arrays, time.perf_counter() - start
+
+
+def _polydata_from_arrays(points: numpy.ndarray, offsets: numpy.ndarray, connectivity: numpy.ndarray) \
+        -> vtkPolyData:
+    vtk_points = vtkPoints()
+    vtk_points.SetData(numpy_to_vtk(points, deep=True))
+    polys = vtkCellArray()
+    polys.SetData(numpy_to_vtkIdTypeArray(offsets.astype(numpy.int64), deep=True),
+                  numpy_to_vtkIdTypeArray(connectivity.astype(numpy.int64), deep=True))
+    polydata = vtkPolyData()
+    polydata.SetPoints(vtk_points)
+    polydata.SetPolys(polys)
+    return polydata
+
+
+mesh_cache = MeshCache()
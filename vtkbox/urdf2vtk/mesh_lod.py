@@ -0,0 +1,132 @@
+from typing import TYPE_CHECKING
+
+from vtkmodules.vtkRenderingCore import vtkActor, vtkPolyDataMapper, vtkProp3D, vtkRenderer
+
+from .mesh_cache import mesh_cache
+
+if TYPE_CHECKING:
+    from .vjoint import VLink
+
+
+class _ActorLevels:
+    """
+    一个 visual actor 的两级细节。简化版本是单独的 actor / mapper，与原 actor 共用 property 与变换，
+    由所在 VLink 切换两者的可见性：mapper 的输入不变，两级的顶点缓冲都只上传一次
+    """
+    def __init__(self, actor: vtkActor, target_triangles: int):
+        mapper = actor.GetMapper()
+        mapper.GetInputAlgorithm().Update()
+        self.actor = actor
+        decimated = mesh_cache.get_decimated(mapper.GetInput(), target_triangles)
+        coarse_mapper = vtkPolyDataMapper()
+        coarse_mapper.SetInputData(decimated)
+        coarse_mapper.SetScalarVisibility(mapper.GetScalarVisibility())
+        self.coarse = vtkActor()
+        self.coarse.SetMapper(coarse_mapper)
+        self.coarse.SetProperty(actor.GetProperty())
+        if actor.GetUserTransform() is not None:
+            self.coarse.SetUserTransform(actor.GetUserTransform())
+        else:
+            self.coarse.SetUserMatrix(actor.GetUserMatrix())
+        self.coarse.SetPosition(actor.GetPosition())
+        self.coarse.SetOrientation(actor.GetOrientation())
+        self.coarse.SetScale(actor.GetScale())
+        self.triangles = (mapper.GetInput().GetNumberOfCells(), decimated.GetNumberOfCells())
+
+
+class MeshLOD:
+    """
+    机器人 visual mesh 的两级细节。triangle_budget 按各 mesh 的三角形数比例分配，
+    link_budgets 可单独指定某些 link 的预算。相机交互时或机器人在屏幕上的投影对角线小于 min_pixels 时
+    使用简化版本，其余情况显示原始 mesh。
+    """
+    def __init__(self, links: dict[str, 'VLink'], triangle_budget: int = 0,
+                 link_budgets: dict[str, int] = None, min_pixels: float = 150, min_triangles: int = 100):
+        self.min_pixels = min_pixels
+        self._levels = []  # type: list[_ActorLevels]
+        self._links = []  # type: list[VLink] # 有简化版本的 link
+        self._interactive = False
+        self._small = False
+        self._coarse = False
+
+        link_budgets = link_budgets or {}
+        groups = []  # type: list[tuple[int, list[tuple[vtkActor, int]]]]
+        global_actors = []
+        owner = {}
+        for name, link in links.items():
+            owner.update((actor, link) for actor in link._visual)
+            counted = [(actor, _triangle_count(actor)) for actor in link._visual]
+            if name in link_budgets:
+                groups.append((link_budgets[name], counted))
+            else:
+                global_actors.extend(counted)
+        if triangle_budget:
+            groups.append((triangle_budget, global_actors))
+
+        for budget, counted in groups:
+            total = sum(n for _, n in counted)
+            if total <= budget:
+                continue
+            for actor, n in counted:
+                target = max(min_triangles, int(n * budget / total))
+                if n > target:
+                    level = _ActorLevels(actor, target)
+                    self._levels.append(level)
+                    link = owner[actor]
+                    link.add_coarse_actor(actor, level.coarse)
+                    if link not in self._links:
+                        self._links.append(link)
+
+    def stats(self) -> dict:
+        return {
+            'meshes': len(self._levels),
+            'full_triangles': sum(level.triangles[0] for level in self._levels),
+            'coarse_triangles': sum(level.triangles[1] for level in self._levels),
+            'coarse': self._coarse,
+        }
+
+    def set_interactive(self, value: bool):
+        self._interactive = value
+        self._apply()
+
+    def update_screen_size(self, renderer: vtkRenderer, prop: vtkProp3D):
+        """根据 prop 包围盒在屏幕上的投影大小选择级别，在每帧渲染前调用"""
+        if not self._levels:
+            return
+        bounds = prop.GetBounds()
+        if bounds is None or bounds[0] > bounds[1]:
+            return
+        xs, ys = [], []
+        for x in bounds[0:2]:
+            for y in bounds[2:4]:
+                for z in bounds[4:6]:
+                    renderer.SetWorldPoint(x, y, z, 1.0)
+                    renderer.WorldToDisplay()
+                    dx, dy, _ = renderer.GetDisplayPoint()
+                    xs.append(dx)
+                    ys.append(dy)
+        diagonal = ((max(xs) - min(xs)) ** 2 + (max(ys) - min(ys)) ** 2) ** 0.5
+        self._small = diagonal < self.min_pixels
+        self._apply()
+
+    def _apply(self):
+        coarse = self._interactive or self._small
+        if coarse == self._coarse:
+            return
+        self._coarse = coarse
+        for link in self._links:
+            link.set_coarse(coarse)
+
+    def remove(self):
+        """恢复原始 mesh 并从 link 中移除简化版本"""
+        for link in self._links:
+            link.clear_coarse_actors()
+        self._links = []
+        self._levels = []
+        self._coarse = False
+
+
+def _triangle_count(actor: vtkActor) -> int:
+    mapper = actor.GetMapper()
+    mapper.GetInputAlgorithm().Update()
+    return mapper.GetInput().GetNumberOfCells()
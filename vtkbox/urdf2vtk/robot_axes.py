@@ -1,4 +1,4 @@
-from vtk import vtkAxesActor
+from vtkmodules.vtkRenderingAnnotation import vtkAxesActor
 from .vjoint import VLink
 
 
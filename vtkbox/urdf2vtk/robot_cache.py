@@ -0,0 +1,245 @@
+"""
+机器人编译缓存：把 link/joint 树、静态变换、mimic 关系，以及 visual/collision 几何写入一个 .npz 文件。
+几何按内容去重，每个不同的 mesh 只存一份（未变换的三角网格），每个 visual/collision 只记录所用 mesh、
+4x4 变换与颜色，加载时变换设置在 actor 上。再次加载时不需要解析 URDF 和 STL，
+npz 不压缩，各数组直接内存映射（写时复制），不整体读入内存。
+文件头记录 URDF 与所有 mesh 的 mtime/size，任何一个变化都视为过期。
+"""
+import hashlib
+import json
+import os
+import struct
+import zipfile
+
+import numpy
+from numpy.lib import format as npy_format
+from vtkmodules.vtkCommonCore import vtkPoints
+from vtkmodules.vtkCommonDataModel import vtkCellArray, vtkPolyData
+from vtkmodules.vtkFiltersCore import vtkTriangleFilter
+from vtkmodules.vtkRenderingCore import vtkActor
+from vtkmodules.util.numpy_support import numpy_to_vtk, vtk_to_numpy
+
+from .actor_from_visual import ActorCreator
+
+FORMAT_VERSION = 2
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'vtkbox', 'robots')
+
+
+def default_cache_path(urdf_path: str, mesh_root_path: str) -> str:
+    key = f'{os.path.realpath(urdf_path)}|{os.path.realpath(mesh_root_path)}'
+    digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+    return os.path.join(DEFAULT_CACHE_DIR, f'{os.path.splitext(os.path.basename(urdf_path))[0]}_{digest}.npz')
+
+
+def _file_signature(path: str) -> list:
+    st = os.stat(path)
+    return [os.path.realpath(path), st.st_mtime_ns, st.st_size]
+
+
+def _source_signature(urdf_path: str, mesh_root_path: str, mesh_files: list[str]) -> dict:
+    return {
+        'version': FORMAT_VERSION,
+        'mesh_root': os.path.realpath(mesh_root_path),
+        'rm_mesh_package_name': ActorCreator.rm_mesh_package_name,
+        'collision_max_triangles': ActorCreator.collision_max_triangles,
+        'files': [_file_signature(p) for p in [urdf_path, *sorted(set(mesh_files))]],
+    }
+
+
+def _is_fresh(signature: dict, urdf_path: str, mesh_root_path: str) -> bool:
+    if signature.get('version') != FORMAT_VERSION:
+        return False
+    if signature.get('mesh_root') != os.path.realpath(mesh_root_path):
+        return False
+    if signature.get('rm_mesh_package_name') != ActorCreator.rm_mesh_package_name:
+        return False
+    if signature.get('collision_max_triangles') != ActorCreator.collision_max_triangles:
+        return False
+    files = signature.get('files', [])
+    if not files or files[0][0] != os.path.realpath(urdf_path):
+        return False
+    for path, mtime, size in files:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        if st.st_mtime_ns != mtime or st.st_size != size:
+            return False
+    return True
+
+
+def _triangulated(polydata: vtkPolyData) -> vtkPolyData:
+    """三角带等转为三角形，不应用任何变换"""
+    triangle_filter = vtkTriangleFilter()
+    triangle_filter.SetInputData(polydata)
+    triangle_filter.Update()
+    return triangle_filter.GetOutput()
+
+
+class _MeshTable:
+    """
+    按内容去重的几何表。mesh_cache 返回的 polydata 在多个 actor 间共享，先按对象去重，
+    不同对象再按点与三角形数据的摘要去重
+    """
+    def __init__(self):
+        self.arrays = {}  # type: dict[str, numpy.ndarray]
+        self._by_object = {}  # type: dict[str, str]
+        self._by_digest = {}  # type: dict[str, str]
+
+    def key(self, actor: vtkActor) -> str | None:
+        actor.GetMapper().GetInputAlgorithm().Update()
+        polydata = actor.GetMapper().GetInput()
+        address = polydata.GetAddressAsString('vtkPolyData')
+        if address in self._by_object:
+            return self._by_object[address]
+        triangles = _triangulated(polydata)
+        if triangles.GetNumberOfPoints() == 0:
+            key = None
+        else:
+            arrays = _polydata_arrays(triangles)
+            digest = hashlib.sha1()
+            for name in sorted(arrays):
+                digest.update(name.encode())
+                digest.update(numpy.ascontiguousarray(arrays[name]).tobytes())
+            digest = digest.hexdigest()
+            key = self._by_digest.get(digest)
+            if key is None:
+                key = self._by_digest[digest] = f'm{len(self._by_digest)}'
+                for name, array in arrays.items():
+                    self.arrays[f'{key}_{name}'] = array
+                self.arrays.setdefault(f'{key}_normals', numpy.empty((0, 3), numpy.float32))
+        # 持有 polydata 的地址只在本次保存期间有效，actor 仍引用它，不会被复用
+        self._by_object[address] = key
+        return key
+
+
+def _polydata_arrays(polydata: vtkPolyData) -> dict[str, numpy.ndarray]:
+    polys = polydata.GetPolys()
+    # 点数不超过 int32 时用 32 位索引，vtkCellArray 可直接使用 32 位存储
+    index_type = numpy.int32 if polydata.GetNumberOfPoints() < 2 ** 31 else numpy.int64
+    arrays = {
+        'points': vtk_to_numpy(polydata.GetPoints().GetData()).astype(numpy.float32),
+        'offsets': vtk_to_numpy(polys.GetOffsetsArray()).astype(index_type),
+        'conn': vtk_to_numpy(polys.GetConnectivityArray()).astype(index_type),
+    }
+    normals = polydata.GetPointData().GetNormals()
+    if normals is not None:
+        arrays['normals'] = vtk_to_numpy(normals).astype(numpy.float32)
+    return arrays
+
+
+def _polydata_from_arrays(arrays: dict[str, numpy.ndarray]) -> vtkPolyData:
+    vtk_points = vtkPoints()
+    vtk_points.SetData(numpy_to_vtk(arrays['points']))
+    polys = vtkCellArray()
+    polys.SetData(numpy_to_vtk(arrays['offsets']), numpy_to_vtk(arrays['conn']))
+    polydata = vtkPolyData()
+    polydata.SetPoints(vtk_points)
+    polydata.SetPolys(polys)
+    if 'normals' in arrays:
+        normals = numpy_to_vtk(arrays['normals'])
+        normals.SetName('Normals')
+        polydata.GetPointData().SetNormals(normals)
+    return polydata
+
+
+def save(robot, cache_path: str, urdf_path: str, mesh_root_path: str, mesh_files: list[str]):
+    """把已构建的 VRobot 写入缓存文件"""
+    meshes = _MeshTable()
+    links = []
+    for link in robot.link_map.values():
+        entry = {'name': link.name, 'visual': [], 'collision': []}
+        for kind, actors in (('visual', link._visual), ('collision', link._collision)):
+            for actor in actors:
+                key = meshes.key(actor)
+                if key is None:
+                    continue
+                prop = actor.GetProperty()
+                matrix = actor.GetMatrix()
+                entry[kind].append({
+                    'mesh': key,
+                    'matrix': [matrix.GetElement(i, j) for i in range(4) for j in range(4)],
+                    'rgba': [*prop.GetColor(), prop.GetOpacity()],
+                })
+        links.append(entry)
+    arrays = meshes.arrays
+    joints = []
+    for joint in robot.joint_map.values():
+        mimic = None
+        if joint.mimic:
+            mimic = [joint.mimic.joint, joint.mimic.multiplier, joint.mimic.offset]
+        joints.append({
+            'name': joint.name, 'type': joint.type, 'parent': joint.parent, 'child': joint.child,
+            'xyz': joint.origin_xyz.tolist(), 'rpy': joint.origin_rpy.tolist(), 'axis': joint.axis.tolist(),
+            'mimic': mimic,
+        })
+    header = {
+        'source': _source_signature(urdf_path, mesh_root_path, mesh_files),
+        'name': robot.name,
+        'links': links,
+        'joints': joints,
+    }
+    arrays['header'] = numpy.frombuffer(json.dumps(header).encode(), dtype=numpy.uint8)
+    os.makedirs(os.path.dirname(os.path.abspath(cache_path)), exist_ok=True)
+    # 先写临时文件再替换，避免并发读到半个文件
+    tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        numpy.savez(f, **arrays)
+    os.replace(tmp_path, cache_path)
+
+
+def _map_npz(path: str) -> dict[str, numpy.ndarray]:
+    """
+    把不压缩的 npz（numpy.savez）中的各数组内存映射为只读写时复制的视图：
+    zip 中每个成员是一个连续存放的 .npy，跳过 zip 本地文件头与 npy 头即为数据区
+    """
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, 'rb') as f:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f'{info.filename} 是压缩的，无法内存映射')
+            f.seek(info.header_offset)
+            local = f.read(30)
+            name_length, extra_length = struct.unpack('<HH', local[26:30])
+            f.seek(info.header_offset + 30 + name_length + extra_length)
+            version = npy_format.read_magic(f)
+            read_header = npy_format.read_array_header_1_0 if version == (1, 0) else \
+                npy_format.read_array_header_2_0
+            shape, fortran_order, dtype = read_header(f)
+            name = info.filename[:-4] if info.filename.endswith('.npy') else info.filename
+            if int(numpy.prod(shape)) == 0:
+                arrays[name] = numpy.empty(shape, dtype=dtype)
+            else:
+                arrays[name] = numpy.memmap(path, dtype=dtype, mode='c', offset=f.tell(), shape=shape,
+                                            order='F' if fortran_order else 'C')
+    return arrays
+
+
+def load(cache_path: str, urdf_path: str, mesh_root_path: str) -> dict | None:
+    """
+    读取缓存，过期或不存在时返回 None。
+    返回的 links 中每个几何为 {'polydata', 'matrix', 'rgba'}，同一 mesh 的几何共用一个 polydata；
+    joints 与写入时相同。
+    """
+    if not os.path.exists(cache_path):
+        return None
+    try:
+        data = _map_npz(cache_path)
+        header = json.loads(data['header'].tobytes().decode())
+        if not _is_fresh(header['source'], urdf_path, mesh_root_path):
+            return None
+        polydatas = {}  # type: dict[str, vtkPolyData]
+        for link in header['links']:
+            for kind in ('visual', 'collision'):
+                for geometry in link[kind]:
+                    key = geometry.pop('mesh')
+                    if key not in polydatas:
+                        arrays = {name: data[f'{key}_{name}'] for name in ('points', 'offsets', 'conn', 'normals')}
+                        if not len(arrays['normals']):
+                            arrays.pop('normals')
+                        polydatas[key] = _polydata_from_arrays(arrays)
+                    geometry['polydata'] = polydatas[key]
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile) as e:
+        print(f'机器人缓存 {cache_path} 读取失败，重新编译: {e}')
+        return None
+    return header
@@ -0,0 +1,140 @@
+import time
+
+import numpy
+
+
+class TrajectoryPlayer:
+    """
+    按时间戳回放 (T, n) 关节轨迹。link 位姿用运动学链一次性批量预计算（超出 max_bytes 时分块计算）；
+    每次 update 只显示当前墙钟对应的最新一帧，跟不上时直接跳过中间帧。
+    """
+
+    def __init__(self, robot, q: numpy.ndarray, t: numpy.ndarray = None, fps: float = None, speed: float = 1.0,
+                 loop: bool = False, max_bytes: int = 256 << 20):
+        """
+        q: (T, n)，列顺序同 robot.positive_joints
+        t: (T,) 单调递增的时间戳（秒），为空时按 fps 等间隔生成；两者都为空时 fps=30
+        speed: 回放速度倍数
+        max_bytes: 预计算位姿的内存上限，轨迹更长时按块计算，同时只保留相邻两块
+        """
+        self.robot = robot
+        # 拷贝一份，不持有调用方（或共享内存）的数组
+        self.q = numpy.array(q, dtype=numpy.float64, ndmin=2)
+        assert self.q.shape[1] == robot.kinematics.n_q, \
+            f'q 应为 (T, {robot.kinematics.n_q})，实际为 {self.q.shape}'
+        if t is None:
+            t = numpy.arange(len(self.q)) / (fps or 30.0)
+        self.t = numpy.array(t, dtype=numpy.float64)
+        assert self.t.shape == (len(self.q),), f't 应为 ({len(self.q)},)，实际为 {self.t.shape}'
+        assert len(self.t) < 2 or numpy.all(numpy.diff(self.t) >= 0), 't 必须单调递增'
+        self.speed = speed
+        self.loop = loop
+        frame_bytes = max(1, len(robot.kinematics.dynamic_links)) * 16 * 8
+        self.chunk_frames = max(1, min(len(self.q), max_bytes // 2 // frame_bytes))
+
+        self.frame = -1  # 当前显示的帧
+        self.shown_frames = 0
+        self.skipped_frames = 0
+        self._chunks = {}  # type: dict[int, numpy.ndarray]
+        self._paused = False
+        self._time = float(self.t[0]) if len(self.t) else 0.0  # 暂停时或 _wall 时刻对应的轨迹时间
+        if len(self.q):
+            self._chunk(0)
+        self._wall = time.perf_counter()
+
+    @property
+    def duration(self) -> float:
+        return float(self.t[-1] - self.t[0]) if len(self.t) else 0.0
+
+    @property
+    def paused(self) -> bool:
+        return self._paused
+
+    @property
+    def finished(self) -> bool:
+        return not self.loop and self.frame == len(self.t) - 1 and self.current_time() >= self.t[-1]
+
+    def current_time(self, now: float = None) -> float:
+        """当前墙钟对应的轨迹时间"""
+        if self._paused:
+            return self._time
+        now = time.perf_counter() if now is None else now
+        position = self._time + (now - self._wall) * self.speed
+        if self.loop and self.duration > 0:
+            position = self.t[0] + (position - self.t[0]) % self.duration
+        return position
+
+    def _rebase(self, position: float):
+        self._time = position
+        self._wall = time.perf_counter()
+
+    def pause(self):
+        if not self._paused:
+            self._rebase(self.current_time())
+            self._paused = True
+
+    def resume(self):
+        if self._paused:
+            self._paused = False
+            self._rebase(self._time)
+
+    def seek(self, position: float):
+        """跳到轨迹时间 position（秒，与 t 同一时间轴）"""
+        self._rebase(float(numpy.clip(position, self.t[0], self.t[-1])))
+
+    def seek_frame(self, frame: int):
+        self.seek(self.t[frame])
+
+    def set_speed(self, speed: float):
+        self._rebase(self.current_time())
+        self.speed = speed
+
+    def target_frame(self, now: float = None) -> int:
+        position = self.current_time(now)
+        return int(numpy.clip(numpy.searchsorted(self.t, position, side='right') - 1, 0, len(self.t) - 1))
+
+    def due(self) -> bool:
+        """是否有新的帧需要显示"""
+        return len(self.t) > 0 and self.target_frame() != self.frame
+
+    def _chunk(self, index: int) -> numpy.ndarray:
+        """第 index 块的 (帧数, 动态 link 数, 16) 位姿"""
+        chunk = self._chunks.get(index)
+        if chunk is None:
+            kinematics = self.robot.kinematics
+            start = index * self.chunk_frames
+            poses = kinematics.forward(self.q[start:start + self.chunk_frames])[:, kinematics.dynamic_links]
+            chunk = poses.reshape(len(poses), -1, 16)
+            # 只保留当前与上一块，顺序回放时不会重复计算
+            self._chunks = {key: value for key, value in self._chunks.items() if abs(key - index) <= 1}
+            self._chunks[index] = chunk
+        return chunk
+
+    def update(self, now: float = None) -> bool:
+        """把机器人设置到当前时间对应的帧，返回是否有变化"""
+        if not len(self.t):
+            return False
+        frame = self.target_frame(now)
+        if frame == self.frame:
+            return False
+        if self.frame >= 0 and frame > self.frame:
+            self.skipped_frames += frame - self.frame - 1
+        self.shown_frames += 1
+        self.frame = frame
+        poses = self._chunk(frame // self.chunk_frames)[frame % self.chunk_frames]
+        self.robot._set_frame(self.q[frame], poses)
+        return True
+
+    def state(self) -> dict:
+        return {
+            'frame': self.frame,
+            'frames': len(self.t),
+            'time': self.current_time(),
+            'duration': self.duration,
+            'speed': self.speed,
+            'paused': self._paused,
+            'loop': self.loop,
+            'finished': self.finished,
+            'shown_frames': self.shown_frames,
+            'skipped_frames': self.skipped_frames,
+        }
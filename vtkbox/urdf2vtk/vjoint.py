@@ -1,17 +1,27 @@
-from vtkmodules import all as vtk
+import warnings
+
+from vtkmodules.vtkCommonMath import vtkMatrix4x4
+from vtkmodules.vtkRenderingCore import vtkActor, vtkAssembly
 import numpy
 from urdf_parser_py.urdf import Robot as URobot, Joint as UJoint, Link as ULink
 
+from .kinematics import static_matrix
+
 
 class VLink:
-    def __init__(self, name, visual: list[vtk.vtkActor], collision: list[vtk.vtkActor]):
+    def __init__(self, name, visual: list[vtkActor], collision: list[vtkActor]):
         self.name = name
-        self.prop = vtk.vtkAssembly()
+        self.prop = vtkAssembly()
+        # link 相对 root link 的位姿，由 VRobot 根据运动学链设置
+        self._matrix = vtkMatrix4x4()
+        self.prop.SetUserMatrix(self._matrix)
         self.parent: str = None
         self.children = []  # type: list[str]
 
         self._visual = visual
         self._collision = collision
+        self._coarse_actors = {}  # type: dict[vtkActor, vtkActor] # visual actor -> 简化版本，见 MeshLOD
+        self._coarse = False
 
         for actor in self._visual:
             self.prop.AddPart(actor)
@@ -31,9 +41,31 @@ class VLink:
         self._collision_visible = value
         self._update_visibility()
 
+    def add_coarse_actor(self, actor: vtkActor, coarse: vtkActor):
+        self._coarse_actors[actor] = coarse
+        self.prop.AddPart(coarse)
+        self._update_visibility()
+
+    def clear_coarse_actors(self):
+        for coarse in self._coarse_actors.values():
+            self.prop.RemovePart(coarse)
+        self._coarse_actors.clear()
+        self._coarse = False
+        self._update_visibility()
+
+    def set_coarse(self, value: bool):
+        """有简化版本的 visual 显示简化版本，两级都是独立 actor，只切换可见性"""
+        self._coarse = value
+        self._update_visibility()
+
     def _update_visibility(self):
         for actor in self._visual:
-            actor.SetVisibility(self._total_visible)
+            coarse = self._coarse_actors.get(actor)
+            if coarse is None:
+                actor.SetVisibility(self._total_visible)
+            else:
+                actor.SetVisibility(self._total_visible and not self._coarse)
+                coarse.SetVisibility(self._total_visible and self._coarse)
         for actor in self._collision:
             actor.SetVisibility(self._collision_visible and self._total_visible)
 
@@ -46,8 +78,6 @@ class _MimicData:
 class VJoint:
     TYPE = ['continuous', 'revolute', 'prismatic', 'fixed', 'floating', 'planar']
 
-    prop: vtk.vtkAssembly
-
     name: str
     type: str
     parent: str
@@ -57,54 +87,68 @@ class VJoint:
     axis: numpy.ndarray
     # optional
     mimic: _MimicData = None
-
-    def __init__(self):
-        self.prop = vtk.vtkAssembly()
+    # 所属的 VRobot，由 VRobot 组装时设置；关节位置保存在机器人的 q 中，由运动学链统一计算位姿
+    robot = None
 
     def set_input(self, ujoint: UJoint):
-        assert ujoint.type in VJoint.TYPE, f'Joint {ujoint.name} type error: {type}'
-        self.name = ujoint.name
-        self.type = ujoint.type
-        self.parent = ujoint.parent
-        self.child = ujoint.child
-        self.origin_xyz = numpy.array(ujoint.origin.xyz)
-        self.origin_rpy = numpy.array(ujoint.origin.rpy)
-        self.axis = numpy.array(ujoint.axis)
-        self._set_static_transform(self.origin_xyz, self.origin_rpy)
-        #
+        mimic = None
         if ujoint.mimic:
+            mimic = (ujoint.mimic.joint, ujoint.mimic.multiplier, ujoint.mimic.offset)
+        self.set_params(ujoint.name, ujoint.type, ujoint.parent, ujoint.child,
+                        ujoint.origin.xyz, ujoint.origin.rpy, ujoint.axis, mimic)
+
+    def set_params(self, name: str, type: str, parent: str, child: str, xyz, rpy, axis,
+                   mimic: tuple[str, float, float] = None):
+        """mimic 为 (joint, multiplier, offset)"""
+        assert type in VJoint.TYPE, f'Joint {name} type error: {type}'
+        self.name = name
+        self.type = type
+        self.parent = parent
+        self.child = child
+        self.origin_xyz = numpy.array(xyz)
+        self.origin_rpy = numpy.array(rpy)
+        self.axis = numpy.array(axis)
+        self.static_matrix = static_matrix(self.origin_xyz, self.origin_rpy)
+        #
+        if mimic:
             self.mimic = _MimicData()
-            self.mimic.joint = ujoint.mimic.joint
-            self.mimic.multiplier = ujoint.mimic.multiplier
-            self.mimic.offset = ujoint.mimic.offset
-
-    def _set_static_transform(self, xyz, rpy):
-        x, y, z = xyz
-        roll, pitch, yaw = numpy.degrees(rpy)
-        trans = vtk.vtkTransform()
-        trans.Translate(x, y, z)
-        trans.RotateZ(yaw)
-        trans.RotateY(pitch)
-        trans.RotateX(roll)
-        self.prop.SetUserTransform(trans)
-
-    def _update(self, pos: float):
-        if self.type == 'prismatic':
-            vector = self.axis * pos
-            self.prop.SetPosition(vector)
-        else:
-            vector = self.axis * numpy.rad2deg(pos)
-            self.prop.SetOrientation(vector)
+            self.mimic.joint, self.mimic.multiplier, self.mimic.offset = mimic
+
+    @property
+    def unit_axis(self) -> numpy.ndarray:
+        if self.axis.shape != (3,):
+            return numpy.array([1.0, 0.0, 0.0])
+        norm = numpy.linalg.norm(self.axis)
+        return self.axis / norm if norm > 0 else numpy.array([1.0, 0.0, 0.0])
 
     def update(self, pos: float):
+        """已弃用，等价于 robot.set_joint_pos(name, pos)"""
+        warnings.warn('VJoint.update 已弃用，请使用 VRobot.set_joint_pos / set_q', DeprecationWarning, stacklevel=2)
         if self.mimic:
             print(f'Warning Mimic {self.name} to {self.mimic.joint}; Cannot update self')
             return
-        self._update(pos)
+        self._owner().set_joint_pos(self.name, pos)
 
     def update_mimic(self, pos: float):
+        """
+        已弃用。pos 为被 mimic 的关节的位置：mimic 关节的位姿由源关节决定，因此把 pos（沿 mimic 链反推）
+        写入最终的源关节，本关节按 multiplier / offset 随之更新
+        """
+        warnings.warn('VJoint.update_mimic 已弃用，请设置被 mimic 的关节: VRobot.set_joint_pos',
+                      DeprecationWarning, stacklevel=2)
         if not self.mimic:
             print(f'Warning Joint {self.name} has no mimic')
             return
-        target = pos * self.mimic.multiplier + self.mimic.offset
-        self._update(target)
\ No newline at end of file
+        robot = self._owner()
+        source = robot.joint_map[self.mimic.joint]
+        while source.mimic:
+            if source.mimic.multiplier == 0:
+                print(f'Warning Mimic {source.name} multiplier is 0; Cannot update {self.name}')
+                return
+            pos = (pos - source.mimic.offset) / source.mimic.multiplier
+            source = robot.joint_map[source.mimic.joint]
+        robot.set_joint_pos(source.name, pos)
+
+    def _owner(self):
+        assert self.robot is not None, f'Joint {self.name} 不属于任何 VRobot'
+        return self.robot
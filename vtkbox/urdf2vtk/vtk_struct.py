@@ -1,9 +1,20 @@
+import os
 import numpy
 from typing import overload
 
-from urdf_parser_py.urdf import Robot as URobot, Joint as UJoint, Link as ULink
+from vtkmodules.vtkCommonMath import vtkMatrix4x4
+from vtkmodules.vtkRenderingCore import vtkActor, vtkPolyDataMapper
+# 注册 OpenGL 对象工厂，之后创建的 mapper / actor 才是可渲染的 OpenGL 实现
+import vtkmodules.vtkRenderingOpenGL2  # noqa: F401
+
+from urdf_parser_py.urdf import Robot as URobot, Joint as UJoint, Link as ULink, Mesh
 
 from .actor_from_visual import ActorCreator
+from .mesh_cache import mesh_cache
+from .mesh_lod import MeshLOD
+from .kinematics import KinematicChain
+from .trajectory import TrajectoryPlayer
+from . import robot_cache
 from .vjoint import VLink, VJoint
 from .robot_axes import RobotAxes
 
@@ -14,20 +25,70 @@ class VRobot:
     joint_map: dict[str, VJoint]
     root: VLink
 
-    def __init__(self, urdf_path: str, mesh_root_path: str):
-        urdf: URobot = URobot.from_xml_file(urdf_path)
-
-        self.name = urdf.name
+    def __init__(self, urdf_path: str, mesh_root_path: str, load_workers: int = 0, load_executor: str = 'thread',
+                 cache: bool | str = False):
+        """
+        load_workers: 并行读取 mesh 的线程/进程数，0 为依次读取
+        load_executor: 'thread' 或 'process'
+        每个 mesh 的加载耗时记录在 mesh_load_times 中
+        cache: 编译缓存，True 使用 ~/.cache/vtkbox/robots 下的默认路径，也可直接给出文件路径。
+               缓存有效时不解析 URDF 和 mesh；URDF 或任何 mesh 变化后自动重新编译
+        """
         self.link_map = {}
         self.joint_map = {}
-        self._mimic_map = {}  # type: dict[str, list[str]] # mimiced -> mimicing
 
         self.positive_joints = []  # type: list[str]
+        self.mesh_load_times = {}  # type: dict[str, float]
+        self.from_cache = False
+        self.mesh_lod = None  # type: MeshLOD | None
+        self.kinematics = None  # type: KinematicChain | None
+
+        cache_path = None
+        if cache:
+            cache_path = cache if isinstance(cache, str) else robot_cache.default_cache_path(urdf_path, mesh_root_path)
+            compiled = robot_cache.load(cache_path, urdf_path, mesh_root_path)
+            if compiled is not None:
+                self._build_from_cache(compiled)
+                self.from_cache = True
+                self._assemble()
+                return
+
+        mesh_files = self._build_from_urdf(urdf_path, mesh_root_path, load_workers, load_executor)
+        self._assemble()
+        if cache_path is not None:
+            try:
+                robot_cache.save(self, cache_path, urdf_path, mesh_root_path, mesh_files)
+            except OSError as e:
+                print(f'机器人缓存 {cache_path} 写入失败: {e}')
+
+    @staticmethod
+    def compile(urdf_path: str, mesh_root_path: str, cache_path: str = None, load_workers: int = 0) -> str:
+        """强制重新编译机器人缓存文件，返回缓存路径"""
+        cache_path = cache_path or robot_cache.default_cache_path(urdf_path, mesh_root_path)
+        if os.path.exists(cache_path):
+            os.remove(cache_path)
+        VRobot(urdf_path, mesh_root_path, load_workers, cache=cache_path)
+        return cache_path
+
+    def _build_from_urdf(self, urdf_path: str, mesh_root_path: str, load_workers: int, load_executor: str) \
+            -> list[str]:
+        """解析 URDF 创建 link 与 joint，返回用到的 mesh 文件"""
+        urdf: URobot = URobot.from_xml_file(urdf_path)
+        self.name = urdf.name
 
         # register materials
         actor_creator = ActorCreator(mesh_root_path)
         actor_creator.register_material(urdf.materials)
 
+        # 先并行读取所有 mesh 到缓存，之后在主线程组装 link/joint
+        meshes = []
+        for ulink in urdf.links:
+            for element in (*ulink.visuals, *ulink.collisions):
+                geometry = getattr(element, 'geometry', None)
+                if isinstance(geometry, Mesh) and geometry.filename.lower().endswith('.stl'):
+                    meshes.append((actor_creator.get_mesh_filepath(geometry.filename), geometry.scale))
+        self.mesh_load_times = mesh_cache.prefetch(meshes, load_workers, load_executor)
+
         # create links
         for ulink in urdf.links:
             ulink: ULink
@@ -49,14 +110,38 @@ class VRobot:
             joint = VJoint()
             joint.set_input(ujoint)
             self.joint_map[joint.name] = joint
+        return [file_path for file_path, _ in meshes]
+
+    def _build_from_cache(self, compiled: dict):
+        self.name = compiled['name']
+        for entry in compiled['links']:
+            actors = {}
+            for kind in ('visual', 'collision'):
+                actors[kind] = []
+                for geometry in entry[kind]:
+                    mapper = vtkPolyDataMapper()
+                    mapper.SetInputData(geometry['polydata'])
+                    actor = vtkActor()
+                    actor.SetMapper(mapper)
+                    matrix = vtkMatrix4x4()
+                    matrix.DeepCopy(geometry['matrix'])
+                    actor.SetUserMatrix(matrix)
+                    r, g, b, a = geometry['rgba']
+                    actor.GetProperty().SetColor(r, g, b)
+                    actor.GetProperty().SetOpacity(a)
+                    actors[kind].append(actor)
+            link = VLink(entry['name'], actors['visual'], actors['collision'])
+            self.link_map[link.name] = link
+        for entry in compiled['joints']:
+            joint = VJoint()
+            joint.set_params(entry['name'], entry['type'], entry['parent'], entry['child'],
+                             entry['xyz'], entry['rpy'], entry['axis'], entry['mimic'])
+            self.joint_map[joint.name] = joint
 
-        # check mimic
-        for joint in self.joint_map.values():
-            if joint.mimic:
-                self._mimic_map.setdefault(joint.mimic.joint, []).append(joint.name)
-
+    def _assemble(self):
         # check positive
         for joint in self.joint_map.values():
+            joint.robot = self
             if joint.type not in ['fixed'] and joint.mimic is None:
                 self.positive_joints.append(joint.name)
 
@@ -68,8 +153,6 @@ class VRobot:
             assert c_link is not None, f'Child link: {joint.child} of joint {joint.name} not found'
             p_link.children.append(joint.name)
             c_link.parent = joint.name
-            p_link.prop.AddPart(joint.prop)
-            joint.prop.AddPart(c_link.prop)
 
         # find root
         root_link = None
@@ -79,29 +162,90 @@ class VRobot:
                 break
         assert root_link is not None, 'Root link not found'
         self.root = root_link
+        # 所有 link 直接挂在 root 下，位姿由运动学链计算后整体设置，避免多层 assembly 逐层计算矩阵
+        for link in self.link_map.values():
+            if link is not root_link:
+                root_link.prop.AddPart(link.prop)
 
         # add axes
         self.axes = RobotAxes(self.link_map)
 
-    def _update(self, j_name: str, pos: float):
-        joint = self.joint_map.get(j_name)
-        if joint is None:
+        self.kinematics = KinematicChain(self)
+        self._q = numpy.zeros(self.kinematics.n_q)
+        self._q_index = {name: i for i, name in enumerate(self.positive_joints)}
+        self._dynamic_matrices = [self.link_map[self.kinematics.link_names[i]]._matrix
+                                  for i in self.kinematics.dynamic_links]
+        poses = self.kinematics.forward(self._q)
+        for name, pose in zip(self.kinematics.link_names, poses):
+            self.link_map[name]._matrix.DeepCopy(pose.ravel().tolist())
+
+    def enable_mesh_lod(self, triangle_budget: int = 0, link_budgets: dict[str, int] = None,
+                        min_pixels: float = 150) -> MeshLOD:
+        """
+        为 visual mesh 生成简化版本（结果进程内缓存），相机交互或机器人在屏幕上很小时切换到简化版本。
+        triangle_budget: 整个机器人的三角形预算；link_budgets: 单个 link 的预算，优先于整体预算
+        """
+        if self.mesh_lod is not None:
+            self.mesh_lod.remove()
+        self.mesh_lod = MeshLOD(self.link_map, triangle_budget, link_budgets, min_pixels)
+        return self.mesh_lod
+
+    def _update(self, j_name: str, pos: float) -> bool:
+        if j_name not in self.joint_map:
             print(f'Joint {j_name} not found')
-            return
-        joint.update(pos)
-
-        if j_name in self._mimic_map:
-            for mimic in self._mimic_map[j_name]:
-                mimicking_joint = self.joint_map.get(mimic)
-                mimicking_joint.update_mimic(pos)
+            return False
+        if j_name not in self._q_index:
+            print(f'Warning Joint {j_name} is not a positive joint; Cannot update self')
+            return False
+        self._q[self._q_index[j_name]] = pos
+        return True
+
+    def _apply(self):
+        """由当前 q 批量计算所有 link 的位姿，每个随 q 变化的 link 设置一次矩阵"""
+        poses = self.kinematics.forward(self._q)[self.kinematics.dynamic_links]
+        self._push_poses(poses.reshape(-1, 16))
+
+    def _push_poses(self, poses: numpy.ndarray):
+        """poses 为 (动态 link 数, 16)，顺序同 kinematics.dynamic_links"""
+        for matrix, elements in zip(self._dynamic_matrices, poses.tolist()):
+            matrix.DeepCopy(elements)
+
+    def _set_frame(self, q: numpy.ndarray, poses: numpy.ndarray):
+        """设置预计算好的一帧，供 TrajectoryPlayer 使用"""
+        self._q[:] = q
+        self._push_poses(poses)
 
     def set_q(self, q: numpy.ndarray):
-        for name, pos in zip(self.positive_joints, q):
-            self._update(name, pos)
+        q = numpy.asarray(q, dtype=numpy.float64)
+        n = min(len(q), len(self._q))
+        self._q[:n] = q[:n]
+        self._apply()
+
+    def get_q(self) -> numpy.ndarray:
+        return self._q.copy()
 
     def set_joint_pos(self, joint_name: str, pos: float):
-        self._update(joint_name, pos)
+        if self._update(joint_name, pos):
+            self._apply()
 
     def set_joints_pos(self, names: list[str], pos_seq):
         for name, pos in zip(names, pos_seq):
             self._update(name, pos)
+        self._apply()
+
+    def play(self, q: numpy.ndarray, t: numpy.ndarray = None, fps: float = None, speed: float = 1.0,
+             loop: bool = False, max_bytes: int = 256 << 20) -> TrajectoryPlayer:
+        """
+        创建轨迹回放器，之后周期调用 player.update() 推进；VTKVisualizer.play_trajectory 会自动驱动
+        """
+        return TrajectoryPlayer(self, q, t, fps, speed, loop, max_bytes)
+
+    def link_poses(self, q: numpy.ndarray = None) -> dict[str, numpy.ndarray]:
+        """
+        各 link 相对 root link 的 4x4 位姿。q 为空时使用当前关节位置；给出 q 时只计算，不改变显示
+        """
+        poses = self.kinematics.forward(self._q if q is None else q)
+        return dict(zip(self.kinematics.link_names, poses))
+
+    def link_pose(self, link_name: str, q: numpy.ndarray = None) -> numpy.ndarray:
+        return self.link_poses(q)[link_name]
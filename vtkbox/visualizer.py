@@ -1,40 +1,65 @@
+import math
 import os
 import sys
+import time
 import numpy
 
-from typing import overload, TypeVar
+from typing import Iterable, overload, TypeVar
 from uuid import uuid4
 
-import vtkmodules.all as vtk
-
-from .urdf2vtk import VRobot
+from vtkmodules.vtkCommonCore import vtkCommand, vtkUnsignedCharArray
+from vtkmodules.vtkCommonExecutionModel import vtkPolyDataAlgorithm
+from vtkmodules.vtkCommonMath import vtkMatrix4x4
+from vtkmodules.vtkFiltersSources import vtkCubeSource
+from vtkmodules.vtkInteractionStyle import vtkInteractorStyleMultiTouchCamera
+from vtkmodules.vtkRenderingCore import vtkActor, vtkAssembly, vtkPolyDataMapper, vtkProp, vtkProp3D, \
+    vtkRenderWindow, vtkRenderWindowInteractor, vtkRenderer
+# 注册 OpenGL 对象工厂，之后创建的 mapper / actor 才是可渲染的 OpenGL 实现
+import vtkmodules.vtkRenderingOpenGL2  # noqa: F401
+from vtkmodules.util.numpy_support import vtk_to_numpy
+
+from .urdf2vtk import VRobot, TrajectoryPlayer
 from .color import color255_to_1, get_a_great_color
-from .actor_creator import point_actor, point_actor_with_intensity, source_actor, line_actor
+from .actor_creator import point_actor, point_actor_with_intensity, source_actor, line_actor, update_point_actor, \
+    intensity_view, boxes_actor, update_boxes_actor, lines_actor, update_lines_actor
+from .point_lod import PointLOD
+from .point_accumulator import PointAccumulator
+from .point_index import PointIndex
+from .point_io import load_point_file
+from .tiled_scene import TiledPointScene
+from .frame_exporter import FrameExporter, write_image
+from .instrumentation import Instrumentation, StatsOverlay, scene_stats, timed
 
-T = TypeVar('T', vtk.vtkActor, vtk.vtkProp3D)
+T = TypeVar('T', vtkActor, vtkProp3D)
 
 
 class _DisplayComponent:
-    def __init__(self):
+    def __init__(self, offscreen: bool = False, size: tuple[int, int] = None):
         # renderer
-        self.renderer = vtk.vtkRenderer()
+        self.renderer = vtkRenderer()
         self.renderer.SetBackground(*color255_to_1(0x0a, 0x19, 0x2f))
 
         # 初始使用透视投影
         self.is_perspective = True
 
         # RenderWindow
-        self.render_window = vtk.vtkRenderWindow()
-        self.render_window.SetPosition(0, 3000)
-        self.render_window.SetSize(3000, 1600)
+        self.offscreen = offscreen
+        self.render_window = vtkRenderWindow()
+        if offscreen:
+            # 没有显示器时 vtk 自动选择 EGL / OSMesa 离屏上下文，不创建窗口
+            self.render_window.SetOffScreenRendering(True)
+            self.render_window.SetSize(*(size or (1280, 720)))
+        else:
+            self.render_window.SetPosition(0, 3000)
+            self.render_window.SetSize(*(size or (3000, 1600)))
 
         # interactor
-        self.interactor = vtk.vtkRenderWindowInteractor()
+        self.interactor = vtkRenderWindowInteractor()
 
         # connect vtk part
         self.render_window.AddRenderer(self.renderer)
         self.interactor.SetRenderWindow(self.render_window)
-        self.interactor.SetInteractorStyle(vtk.vtkInteractorStyleMultiTouchCamera())
+        self.interactor.SetInteractorStyle(vtkInteractorStyleMultiTouchCamera())
 
         # 设置按键观察者，处理键盘事件
         self.interactor.AddObserver("KeyPressEvent", self._key_press_event)
@@ -69,11 +94,96 @@ class _DisplayComponent:
         print(f"已切换到{mode}投影模式")
 
 
-_global_display_component = _DisplayComponent()
+class _RenderLoop:
+    """
+    脏标记驱动的渲染循环：只有场景变化时才渲染，并限制最大帧率。
+    通过 one-shot timer 轮询 tick 回调，空闲时轮询间隔按倍数退避到 max_poll_ms，有工作时恢复到 min_poll_ms。
+    任何一次 Render（包括交互器在相机交互时的渲染）都会清除脏标记。
+    """
+    def __init__(self, display: _DisplayComponent, max_fps: float = 60, min_poll_ms: int = 5, max_poll_ms: int = 100):
+        self._display = display
+        self.max_fps = max_fps
+        self.min_poll_ms = min_poll_ms
+        self.max_poll_ms = max_poll_ms
+
+        self.dirty = True
+        self._last_render = 0.0
+        self._poll_ms = min_poll_ms
+        self._timer_id = None
+        self._tick_callbacks = []
+        self._render_callbacks = []
+
+        display.render_window.AddObserver(vtkCommand.EndEvent, self._on_render_end)
+        display.renderer.GetActiveCamera().AddObserver(vtkCommand.ModifiedEvent, self._on_camera_modified)
+        display.interactor.AddObserver(vtkCommand.TimerEvent, self._on_timer)
+
+    def mark_dirty(self):
+        self.dirty = True
+
+    def add_tick_callback(self, callback):
+        """callback() 在每次轮询时调用，返回真值表示有新工作（同时标记为脏）"""
+        self._tick_callbacks.append(callback)
+
+    def add_render_callback(self, callback):
+        """callback() 在每次渲染完成后调用"""
+        self._render_callbacks.append(callback)
+
+    def start(self):
+        """在 interactor.Initialize() 之后调用"""
+        self._schedule(self.min_poll_ms)
+
+    def _schedule(self, ms: float):
+        self._timer_id = self._display.interactor.CreateOneShotTimer(max(1, int(ms)))
+
+    def _on_camera_modified(self, obj, event):
+        self.dirty = True
+
+    def _on_render_end(self, obj, event):
+        self.dirty = False
+        self._last_render = time.perf_counter()
+        for callback in self._render_callbacks:
+            callback()
+
+    def _on_timer(self, obj, event):
+        if self._timer_id is None or obj.GetTimerEventId() != self._timer_id:
+            return
+        busy = False
+        for callback in self._tick_callbacks:
+            busy = bool(callback()) or busy
+        if busy:
+            self.dirty = True
+
+        if self.dirty:
+            wait = 0.0
+            if self.max_fps:
+                wait = self._last_render + 1.0 / self.max_fps - time.perf_counter()
+            if wait <= 0:
+                self._display.render_window.Render()
+                self._poll_ms = self.min_poll_ms
+            else:
+                # 帧率受限，等到下一帧允许的时间再渲染
+                self._poll_ms = min(self.min_poll_ms, wait * 1000)
+        elif busy:
+            self._poll_ms = self.min_poll_ms
+        else:
+            self._poll_ms = min(self._poll_ms * 2, self.max_poll_ms)
+        self._schedule(self._poll_ms)
+
+
+_global_display_component = None  # type: _DisplayComponent | None
+
+
+def _get_global_display_component() -> _DisplayComponent:
+    """第一次 vtk_show 时才创建窗口，import 时不创建"""
+    global _global_display_component
+    if _global_display_component is None:
+        _global_display_component = _DisplayComponent()
+    return _global_display_component
 
 
 def vtk_show(*args, with_color=False):
-    _global_display_component.renderer.RemoveAllViewProps()
+    display = _get_global_display_component()
+    display.renderer.RemoveAllViewProps()
     # init color
     if with_color:
         color = get_a_great_color()
@@ -83,61 +193,324 @@ def vtk_show(*args, with_color=False):
     for item in args:
         if isinstance(item, (list, numpy.ndarray)):
             actor = point_actor(item, color)
-        elif issubclass(type(item), vtk.vtkPolyDataAlgorithm):
+        elif issubclass(type(item), vtkPolyDataAlgorithm):
             actor = source_actor(item)
         else:
             actor = item
-        _global_display_component.renderer.AddActor(actor)
-    _global_display_component.interactor.Initialize()
-    _global_display_component.interactor.Start()
+        display.renderer.AddActor(actor)
+    display.interactor.Initialize()
+    display.interactor.Start()
 
 
 class VTKVisualizer:
-    def __init__(self):
-        self._viz = _DisplayComponent()
+    def __init__(self, max_fps: float = 60, min_poll_ms: int = 5, max_poll_ms: int = 100, headless: bool = False,
+                 size: tuple[int, int] = None):
+        """
+        max_fps: 最大帧率，0 为不限
+        min_poll_ms / max_poll_ms: 渲染循环的轮询间隔范围，空闲时逐步退避到 max_poll_ms
+        headless: 离屏渲染，不创建窗口也不进入事件循环，用 render_to_array / screenshot / export_frames 取图
+        size: 窗口或离屏图像大小 (宽, 高)
+        """
+        self._viz = _DisplayComponent(headless, size)
+        self._pixels = vtkUnsignedCharArray()  # 读回像素的缓冲区，各帧复用
+        self._render_loop = _RenderLoop(self._viz, max_fps, min_poll_ms, max_poll_ms)
 
         self.robot = None  # type: None | VRobot
         # actor 检索表
-        self._actor_map = {}  # type: dict[int, vtk.vtkProp] # actor 检索表， 不包括robot
+        self._actor_map = {}  # type: dict[int, vtkProp] # actor 检索表， 不包括robot
         self._actor_name_map = {}  # type: dict[str, int]
+        self._lod_map = {}  # type: dict[int, PointLOD] # 开启 LOD 的点云
+        self._accumulator_map = {}  # type: dict[int, PointAccumulator] # 多帧累积点云
+        self._tiles_map = {}  # type: dict[int, TiledPointScene] # 分块点云图层
+        self._player = None  # type: None | TrajectoryPlayer
+        self._render_loop.add_tick_callback(self._tick_trajectory)
+        self._render_loop.add_tick_callback(self._tick_tiles)
+
+        # 运行时统计，默认关闭
+        self._stats = None  # type: None | Instrumentation
+        self._stats_callback = None
+        self._stats_interval = 1.0
+        self._stats_last = 0.0
+        self._stats_overlay = None  # type: None | StatsOverlay
+        self._stats_sources = {}  # type: dict[str, callable] # 额外的统计项，如多进程的命令队列
+        self._render_loop.add_tick_callback(self._tick_stats)
+
+        # 点云空间索引与鼠标拾取
+        self._point_index_map = {}  # type: dict[int, dict[str, PointIndex]] # uid -> {polydata 地址: 索引}，按需构建
+        self._picking = None  # type: None | dict # enable_picking 的设置
+        self._pick_observers = []
+        self._pick_press = None  # type: None | tuple[int, int] # 左键按下的位置
+        self._pick_marker = None  # type: None | vtkActor # 高亮拾取到的点
+        self._last_pick = None  # type: None | dict
+
+        style = self._viz.interactor.GetInteractorStyle()
+        style.AddObserver(vtkCommand.StartInteractionEvent, self._on_start_interaction)
+        style.AddObserver(vtkCommand.EndInteractionEvent, self._on_end_interaction)
+        self._viz.renderer.AddObserver(vtkCommand.StartEvent, self._on_render_start)
+
+    @property
+    def headless(self) -> bool:
+        return self._viz.offscreen
 
     def show(self):
+        """打开窗口并进入事件循环；headless 模式下只渲染一次"""
+        if self.headless:
+            self.render()
+            return
         self._viz.interactor.Initialize()
+        self._render_loop.start()
         self._viz.interactor.Start()
 
-    def set_robot(self, urdf_path: str, mesh_root_path: str):
+    def render(self, force: bool = False):
+        """场景有变化（或 force）时立即渲染一次，用于 headless 模式或自行驱动的循环"""
+        if self._player is not None:
+            self._player.update()
+        # 两个 tick 都要执行：短路求值会在统计刷新的帧里跳过瓦片调度
+        changed = self._tick_stats()
+        changed = self._tick_tiles() or changed
+        if changed:
+            self.mark_dirty()
+        if force or self._render_loop.dirty or self._viz.render_window.GetNeverRendered():
+            self._viz.render_window.Render()
+
+    def render_to_array(self, out: numpy.ndarray = None) -> numpy.ndarray:
+        """
+        渲染并读回 (高, 宽, 3) uint8 RGB 图像，第 0 行为图像顶部。
+        out 为同形状的 uint8 数组时写入其中，连续取图时可复用同一块内存
+        """
+        self.render()
+        width, height = self._viz.render_window.GetSize()
+        self._viz.render_window.GetPixelData(0, 0, width - 1, height - 1, 0, self._pixels, 0)
+        # vtk 的像素从底部一行开始，翻转为图像顺序
+        pixels = vtk_to_numpy(self._pixels).reshape(height, width, 3)[::-1]
+        if out is None:
+            return pixels.copy()
+        assert out.shape == pixels.shape and out.dtype == numpy.uint8, \
+            f'out 应为 {pixels.shape} uint8，实际为 {out.shape} {out.dtype}'
+        numpy.copyto(out, pixels)
+        return out
+
+    def screenshot(self, path: str):
+        """渲染并保存为图片，格式由扩展名决定（png / jpg / bmp / tif）"""
+        write_image(path, self.render_to_array())
+
+    def export_frames(self, updates: Iterable, path: str, workers: int = 4, fps: float = 30) -> int:
+        """
+        updates 每产生一项输出一帧：项为可调用对象时先以 viz 为参数调用它更新场景，否则认为生成器已自行更新。
+        path 为图片序列模板（如 'out/frame_{:06d}.png'）或视频文件（.mp4 / .mkv / .avi / .mov，需要 ffmpeg）。
+        图像在 workers 个线程中编码，不阻塞渲染。返回输出的帧数
+        """
+        with FrameExporter(self, path, workers, fps) as exporter:
+            for update in updates:
+                if callable(update):
+                    update(self)
+                exporter.write()
+        return exporter.frames
+
+    def set_size(self, width: int, height: int):
+        self._viz.render_window.SetSize(width, height)
+        self.mark_dirty()
+
+    def reset_camera(self):
+        self._viz.renderer.ResetCamera()
+        self.mark_dirty()
+
+    def set_camera(self, position=None, focal_point=None, view_up=None):
+        camera = self._viz.renderer.GetActiveCamera()
+        if position is not None:
+            camera.SetPosition(*position)
+        if focal_point is not None:
+            camera.SetFocalPoint(*focal_point)
+        if view_up is not None:
+            camera.SetViewUp(*view_up)
+        self._viz.renderer.ResetCameraClippingRange()
+        self.mark_dirty()
+
+    def mark_dirty(self):
+        """直接修改了 actor（如 GetProperty().SetColor）后调用，通知渲染循环重新渲染"""
+        self._render_loop.mark_dirty()
+
+    def add_tick_callback(self, callback):
+        """
+        注册 show() 期间周期调用的回调，可在其中更新场景；返回真值表示场景有变化。
+        通过 VTKVisualizer 方法修改场景会自动标记，无需返回值。
+        """
+        self._render_loop.add_tick_callback(callback)
+
+    def set_max_fps(self, max_fps: float):
+        self._render_loop.max_fps = max_fps
+
+    def enable_stats(self, enabled: bool = True, interval: float = 1.0, overlay: bool = False, callback=None):
+        """
+        开启运行时统计：渲染耗时、各方法耗时、场景规模与 polydata 内存，见 stats()。
+        每 interval 秒以 stats() 的结果调用一次 callback，overlay 为真时在窗口左上角显示
+        """
+        if not enabled:
+            if self._stats is not None:
+                self._stats.close()
+            if self._stats_overlay is not None:
+                self._stats_overlay.remove()
+            self._stats = self._stats_callback = self._stats_overlay = None
+            self.mark_dirty()
+            return
+        if self._stats is None:
+            self._stats = Instrumentation(self._viz.render_window)
+        self._stats_interval = interval
+        self._stats_callback = callback
+        if overlay and self._stats_overlay is None:
+            self._stats_overlay = StatsOverlay(self._viz.renderer)
+        elif not overlay and self._stats_overlay is not None:
+            self._stats_overlay.remove()
+            self._stats_overlay = None
+        self._stats_last = 0.0
+        self.mark_dirty()
+
+    def stats(self) -> dict:
+        """
+        render: 最近帧的渲染耗时与实际帧率；commands: 各方法的调用次数与耗时；
+        scene: actor / 可见 actor / 点 / 三角形数量与 polydata 内存（字节）。未开启统计时 render、commands 为空
+        """
+        result = {
+            'enabled': self._stats is not None,
+            'render': self._stats.render_stats() if self._stats is not None else {},
+            'commands': self._stats.command_stats() if self._stats is not None else {},
+            'scene': scene_stats(self._viz.renderer),
+        }
+        for name, source in self._stats_sources.items():
+            result[name] = source()
+        return result
+
+    def reset_stats(self):
+        if self._stats is not None:
+            self._stats.reset()
+
+    def _tick_stats(self) -> bool:
+        if self._stats is None or (self._stats_callback is None and self._stats_overlay is None):
+            return False
+        now = time.perf_counter()
+        if now - self._stats_last < self._stats_interval:
+            return False
+        self._stats_last = now
+        stats = self.stats()
+        if self._stats_callback is not None:
+            self._stats_callback(stats)
+        if self._stats_overlay is not None:
+            self._stats_overlay.update(stats)
+            return True
+        return False
+
+    def _robot_lod(self):
+        return self.robot.mesh_lod if self.robot is not None else None
+
+    def _on_start_interaction(self, obj, event):
+        for lod in self._lod_map.values():
+            lod.set_interactive(True)
+        if self._robot_lod() is not None:
+            self._robot_lod().set_interactive(True)
+
+    def _on_end_interaction(self, obj, event):
+        if not self._lod_map and self._robot_lod() is None:
+            return
+        for lod in self._lod_map.values():
+            lod.set_interactive(False)
+        if self._robot_lod() is not None:
+            self._robot_lod().set_interactive(False)
+        self.mark_dirty()
+
+    def _on_render_start(self, obj, event):
+        # 渲染前再推进一次，受帧率限制延后的渲染也显示渲染时刻墙钟对应的帧
+        if self._player is not None:
+            self._player.update()
+        # 交互中每帧按当前 budget 选择点云的降采样级别，并同步其位姿
+        for lod in self._lod_map.values():
+            if lod.interactive:
+                lod.update()
+        if self._robot_lod() is not None:
+            self._robot_lod().update_screen_size(self._viz.renderer, self.robot.root.prop)
+
+    def _uid(self, arg) -> int | None:
+        if isinstance(arg, str):
+            return self._actor_name_map.get(arg, None)
+        return arg
+
+    @timed
+    def set_robot(self, urdf_path: str, mesh_root_path: str, load_workers: int = 0, load_executor: str = 'thread',
+                  cache: bool | str = False, triangle_budget: int = 0):
+        """triangle_budget > 0 时开启 visual mesh 简化 LOD，见 VRobot.enable_mesh_lod"""
         if self.robot is not None:
             self._viz.renderer.RemoveActor(self.robot.root.prop)
-        self.robot = VRobot(urdf_path, mesh_root_path)
+        self._player = None
+        self.robot = VRobot(urdf_path, mesh_root_path, load_workers, load_executor, cache)
+        if triangle_budget:
+            self.robot.enable_mesh_lod(triangle_budget)
         self._viz.renderer.AddActor(self.robot.root.prop)
+        self.mark_dirty()
         return self.robot
 
+    def _tick_trajectory(self) -> bool:
+        return self._player is not None and self._player.update()
+
+    @timed
+    def play_trajectory(self, q: numpy.ndarray, t: numpy.ndarray = None, fps: float = None, speed: float = 1.0,
+                        loop: bool = False) -> TrajectoryPlayer:
+        """
+        回放机器人关节轨迹，q 为 (T, n)，t 为时间戳（秒）或由 fps 生成。
+        按 speed 倍实时回放，渲染跟不上时跳帧；之后用 pause/resume/seek_trajectory 等控制
+        """
+        assert self.robot is not None, '请先 set_robot'
+        self._player = self.robot.play(q, t, fps, speed, loop)
+        self.mark_dirty()
+        return self._player
+
+    def pause_trajectory(self):
+        if self._player is not None:
+            self._player.pause()
+
+    def resume_trajectory(self):
+        if self._player is not None:
+            self._player.resume()
+
+    def seek_trajectory(self, position: float):
+        """跳到轨迹时间 position（秒）"""
+        if self._player is not None:
+            self._player.seek(position)
+            self.mark_dirty()
+
+    def set_trajectory_speed(self, speed: float):
+        if self._player is not None:
+            self._player.set_speed(speed)
+
+    def stop_trajectory(self):
+        """停止回放，机器人停在当前帧"""
+        self._player = None
+
+    def trajectory_state(self) -> dict | None:
+        return self._player.state() if self._player is not None else None
+
+    @timed
     def add_actor(self, actor: T, name: str = None) -> tuple[int, T]:
         uid = uuid4().int
         if name is not None:
             if name in self._actor_name_map:
                 print(f"actor name already exist: {name} add actor failed")
-                return -1, vtk.vtkActor()
+                return -1, vtkActor()
             self._actor_name_map[name] = uid
 
         self._actor_map[uid] = actor
         self._viz.renderer.AddActor(actor)
+        self.mark_dirty()
         return uid, actor
 
     @overload
-    def get_actor(self, name: str) -> vtk.vtkActor | None:
+    def get_actor(self, name: str) -> vtkActor | None:
         ...
 
     @overload
-    def get_actor(self, uid: int) -> vtk.vtkActor | None:
+    def get_actor(self, uid: int) -> vtkActor | None:
         ...
 
     def get_actor(self, arg):
-        if isinstance(arg, str):
-            uid = self._actor_name_map.get(arg, None)
-        else:
-            uid = arg
-        actor = self._actor_map.get(uid, None)
+        actor = self._actor_map.get(self._uid(arg), None)
         return actor
 
     @overload
@@ -148,6 +521,7 @@ class VTKVisualizer:
     def remove_actor(self, uid: int) -> None:
         ...
 
+    @timed
     def remove_actor(self, arg):
         if isinstance(arg, str):
             uid = self._actor_name_map.pop(arg, None)
@@ -157,34 +531,276 @@ class VTKVisualizer:
         if actor is None:
             print(f'无法移除 {arg}, 对象不存在')
             return
+        lod = self._lod_map.pop(uid, None)
+        if lod is not None:
+            lod.remove()
+        self._accumulator_map.pop(uid, None)
+        self._point_index_map.pop(uid, None)
+        scene = self._tiles_map.pop(uid, None)
+        if scene is not None:
+            scene.close()
+            if not self._tiles_map:
+                self._stats_sources.pop('tiles', None)
+        if self._last_pick is not None and self._last_pick['uid'] == uid:
+            self._last_pick = None
+            self._show_pick_marker(None)
         self._viz.renderer.RemoveActor(actor)
+        self.mark_dirty()
+
+    def _add_point_actor(self, actor: vtkActor, name: str, lod_budget: int) -> tuple[int, vtkActor]:
+        uid, actor = self.add_actor(actor, name)
+        if lod_budget and uid != -1:
+            self._lod_map[uid] = PointLOD(actor, lod_budget, self._viz.renderer)
+        return uid, actor
 
+    @timed
     def add_points(self, points: list | numpy.ndarray, color: tuple[float, float, float] = (1, 1, 1), point_size=3,
-                   name: str = None) -> tuple[int, vtk.vtkActor]:
-        actor = point_actor(points, color, point_size)
-        return self.add_actor(actor, name)
+                   name: str = None, lod_budget: int = 0, colors: numpy.ndarray = None) -> tuple[int, vtkActor]:
+        """
+        points 为 (N, >=3) 数组或含 x / y / z 字段的结构化数组，float32 保持为 float32，连续的 (N, 3) 数组不拷贝。
+        colors 为 (N, 3|4) uint8 逐点颜色。
+        lod_budget > 0 时开启 LOD：相机交互时只显示不超过 lod_budget 个八叉树降采样点，停止后恢复完整点云
+        """
+        actor = point_actor(points, color, point_size, colors)
+        return self._add_point_actor(actor, name, lod_budget)
+
+    @timed
+    def add_points_with_intensity(self, points: list | numpy.ndarray, point_size=3, name: str = None,
+                                  cmap: str = 'cym', norm: str | tuple[float, float] = 'max', lod_budget: int = 0,
+                                  keep_intensity: bool = False) -> tuple[int, vtkActor]:
+        """keep_intensity: 保留原始强度，pick 的结果中可读到强度值（每点多占 4 / 8 字节）"""
+        actor = point_actor_with_intensity(points, point_size, cmap, norm, keep_intensity)
+        return self._add_point_actor(actor, name, lod_budget)
+
+    @timed
+    def add_points_from_file(self, path: str, stride: int = 1, max_points: int = None,
+                             color: tuple[float, float, float] = (1, 1, 1), point_size=3, name: str = None,
+                             cmap: str = 'cym', norm: str | tuple[float, float] = 'max', keep_intensity: bool = False,
+                             lod_budget: int = 0) -> tuple[int, vtkActor]:
+        """
+        从 .npy / KITTI .bin / .pcd 文件添加点云。文件内存映射后按块读取，stride / max_points 在读取时降采样，
+        文件不会整体读入内存，可用于预览超大的地图文件。
+        pcd 的 rgb 字段作为逐点颜色，否则有强度时按 cmap / norm 着色，都没有时使用 color
+        """
+        xyz, intensity, colors = load_point_file(path, stride, max_points)
+        if colors is None and intensity is not None:
+            actor = point_actor_with_intensity(xyz, point_size, cmap, norm, keep_intensity, intensity)
+        else:
+            actor = point_actor(xyz, color, point_size, colors)
+        return self._add_point_actor(actor, name, lod_budget)
+
+    @timed
+    def add_accumulator(self, max_frames: int = 10, color: tuple[float, float, float] = (1, 1, 1), point_size=3,
+                        cmap: str = 'cym', norm: str | tuple[float, float] = 'max', name: str = None) \
+            -> tuple[int, vtkAssembly]:
+        """
+        添加显示最近 max_frames 帧点云的累积 actor，用 append_points 追加帧，超出时自动淘汰最旧的一帧。
+        带强度的帧各自归一化，需要帧间颜色一致时用固定范围 norm=(lo, hi)
+        """
+        accumulator = PointAccumulator(max_frames, color, point_size, cmap, norm)
+        uid, assembly = self.add_actor(accumulator.assembly, name)
+        if uid != -1:
+            self._accumulator_map[uid] = accumulator
+        return uid, assembly
+
+    def get_accumulator(self, arg) -> PointAccumulator | None:
+        return self._accumulator_map.get(self._uid(arg))
+
+    @timed
+    def append_points(self, arg, points: list | numpy.ndarray, intensity: numpy.ndarray = None,
+                      colors: numpy.ndarray = None) -> int:
+        """向 add_accumulator 创建的累积 actor 追加一帧，只上传这一帧的点，返回帧序号"""
+        accumulator = self.get_accumulator(arg)
+        if accumulator is None:
+            print(f'append_points failed, {arg} 不是累积点云')
+            return -1
+        frame_id = accumulator.append(points, intensity, colors)
+        self.mark_dirty()
+        return frame_id
+
+    def clear_accumulator(self, arg):
+        accumulator = self.get_accumulator(arg)
+        if accumulator is not None:
+            accumulator.clear()
+            self.mark_dirty()
+
+    @timed
+    def add_tiles(self, tiles: list[dict] | str, memory_budget: int = 2 << 30, workers: int = 4,
+                  max_points_per_tile: int = None, stride: int = 1, max_distance: float = None,
+                  color: tuple[float, float, float] = (1, 1, 1), point_size=3, cmap: str = 'cym',
+                  norm: str | tuple[float, float] = 'max', name: str = None) -> tuple[int, vtkAssembly]:
+        """
+        添加分块点云图层（城市级地图），tiles 为瓦片索引 JSON 的路径或 build_tile_index 的结果。
+        进入视锥的瓦片由 workers 个线程在后台读取，视野外的瓦片隐藏，常驻数据超过 memory_budget（字节）时
+        按 LRU 淘汰视野外的瓦片。参数见 TiledPointScene，tile_stats 查询常驻情况
+        """
+        scene = TiledPointScene(tiles, memory_budget, workers, max_points_per_tile, stride, max_distance,
+                                color, point_size, cmap, norm)
+        uid, assembly = self.add_actor(scene.assembly, name)
+        if uid == -1:
+            scene.close()
+            return uid, assembly
+        self._tiles_map[uid] = scene
+        self._stats_sources['tiles'] = self._tile_stats
+        return uid, assembly
+
+    def get_tiles(self, arg) -> TiledPointScene | None:
+        return self._tiles_map.get(self._uid(arg))
+
+    def _tick_tiles(self) -> bool:
+        if not self._tiles_map:
+            return False
+        renderer = self._viz.renderer
+        camera, aspect = renderer.GetActiveCamera(), renderer.GetTiledAspectRatio()
+        changed = False
+        for scene in self._tiles_map.values():
+            changed = scene.update(camera, aspect) or changed
+        return changed
+
+    @timed
+    def update_tiles(self, arg, wait: bool = False) -> bool:
+        """按当前相机立即调度分块图层；wait 时阻塞到视野内的瓦片加载完成，用于 headless 渲染前"""
+        scene = self.get_tiles(arg)
+        if scene is None:
+            print(f'update_tiles failed, {arg} 不是分块点云图层')
+            return False
+        renderer = self._viz.renderer
+        changed = scene.update(renderer.GetActiveCamera(), renderer.GetTiledAspectRatio(), wait)
+        if changed:
+            self.mark_dirty()
+        return changed
+
+    def tile_stats(self, arg) -> dict | None:
+        """瓦片总数、视野内、常驻、加载中的瓦片数，常驻字节数 / 点数，累计加载、淘汰、取消次数与平均读取耗时"""
+        scene = self.get_tiles(arg)
+        return scene.stats() if scene is not None else None
+
+    def _tile_stats(self) -> dict:
+        names = {uid: name for name, uid in self._actor_name_map.items()}
+        return {names.get(uid, str(uid)): scene.stats() for uid, scene in self._tiles_map.items()}
 
-    def add_points_with_intensity(self, points: list | numpy.ndarray, point_size=3, name: str = None) \
-            -> tuple[int, vtk.vtkActor]:
-        actor = point_actor_with_intensity(points, point_size)
-        return self.add_actor(actor, name)
+    @overload
+    def update_points(self, name: str, points: list | numpy.ndarray, intensity: numpy.ndarray = None,
+                      cmap: str = 'cym', norm: str | tuple[float, float] = 'max') -> None:
+        ...
 
+    @overload
+    def update_points(self, uid: int, points: list | numpy.ndarray, intensity: numpy.ndarray = None,
+                      cmap: str = 'cym', norm: str | tuple[float, float] = 'max') -> None:
+        ...
+
+    @timed
+    def update_points(self, arg, points, intensity=None, cmap='cym', norm='max', colors=None):
+        """就地更新已有点云 actor 的点，适合流式数据，避免每帧 remove_actor/add_points"""
+        actor = self.get_actor(arg)
+        if actor is None:
+            print(f'update_points failed, {arg} 对象不存在')
+            return
+        update_point_actor(actor, points, intensity, colors, cmap, norm)
+        lod = self._lod_map.get(self._uid(arg))
+        if lod is not None:
+            lod.rebuild()
+        self.mark_dirty()
+
+    @timed
+    def set_lod_budget(self, arg, budget: int):
+        """调整点云交互时每帧的点数上限，在已生成的级别之间切换不需要重新降采样"""
+        lod = self._lod_map.get(self._uid(arg))
+        if lod is None:
+            print(f'set_lod_budget failed, {arg} 不是开启 LOD 的点云')
+            return
+        lod.set_budget(budget)
+        self.mark_dirty()
+
+    @timed
+    def update_points_with_intensity(self, arg, points: list | numpy.ndarray, cmap: str = 'cym',
+                                     norm: str | tuple[float, float] = 'max') -> None:
+        """与 add_points_with_intensity 对应，points 为 (N, 4) 的 xyzi 或含 intensity 字段的结构化数组"""
+        points = numpy.asarray(points)
+        self.update_points(arg, points, intensity_view(points), cmap, norm)
+
+    @timed
+    def update_points_with_color(self, arg, points: list | numpy.ndarray, colors: numpy.ndarray) -> None:
+        """colors 为 (N, 3) uint8 逐点颜色"""
+        self.update_points(arg, points, colors=colors)
+
+    @timed
     def add_box(self, xmin, xmax, ymin, ymax, zmin, zmax, opacity: float = 1, name: str = None) \
-            -> tuple[int, vtk.vtkActor]:
-        cube_source = vtk.vtkCubeSource()
+            -> tuple[int, vtkActor]:
+        cube_source = vtkCubeSource()
         cube_source.SetBounds([xmin, xmax, ymin, ymax, zmin, zmax])
-        mapper = vtk.vtkPolyDataMapper()
+        mapper = vtkPolyDataMapper()
         mapper.SetInputConnection(cube_source.GetOutputPort())
-        actor = vtk.vtkActor()
+        actor = vtkActor()
         actor.SetMapper(mapper)
         actor.GetProperty().SetOpacity(opacity)
         return self.add_actor(actor, name)
 
+    @timed
+    def add_boxes(self, bounds: numpy.ndarray, colors: numpy.ndarray = None, color: tuple[float, float, float] = (1, 1, 1),
+                  opacity: float = 1, wireframe: bool = False, name: str = None) -> tuple[int, vtkActor]:
+        """
+        bounds 为 (N, 6) 的 xmin, xmax, ymin, ymax, zmin, zmax，所有盒子作为一个实例化 actor 绘制，
+        适合大量检测框 / 占据栅格；colors 为 (N, 3|4) 逐盒颜色。之后用 update_boxes 就地更新
+        """
+        actor = boxes_actor(bounds, colors, color, opacity, wireframe)
+        return self.add_actor(actor, name)
+
+    @overload
+    def update_boxes(self, name: str, bounds: numpy.ndarray, colors: numpy.ndarray = None) -> None:
+        ...
+
+    @overload
+    def update_boxes(self, uid: int, bounds: numpy.ndarray, colors: numpy.ndarray = None) -> None:
+        ...
+
+    @timed
+    def update_boxes(self, arg, bounds, colors=None):
+        """就地替换 add_boxes 的盒子，盒子数可以变化"""
+        actor = self.get_actor(arg)
+        if actor is None:
+            print(f'update_boxes failed, {arg} 对象不存在')
+            return
+        update_boxes_actor(actor, bounds, colors)
+        self.mark_dirty()
+
+    @timed
     def add_line(self, points: list | numpy.ndarray, color: tuple[float, float, float] = (1, 1, 1), 
-                 line_width: int = 8, name: str = None) -> tuple[int, vtk.vtkActor]:
+                 line_width: int = 8, name: str = None) -> tuple[int, vtkActor]:
         actor = line_actor(points, color, line_width)
         return self.add_actor(actor, name)
 
+    @timed
+    def add_lines(self, lines: list | numpy.ndarray, offsets: numpy.ndarray = None, colors: numpy.ndarray = None,
+                  color: tuple[float, float, float] = (1, 1, 1), line_width: int = 2, name: str = None) \
+            -> tuple[int, vtkActor]:
+        """
+        多条折线合成一个 actor：lines 为 (N_i, 3) 数组的列表，或 (P, 3) 顶点加每条线的起始下标 offsets。
+        colors 为 (L, 3|4) 逐线或 (P, 3|4) 逐顶点颜色。之后用 update_lines 就地更新
+        """
+        actor = lines_actor(lines, offsets, colors, color, line_width)
+        return self.add_actor(actor, name)
+
+    @overload
+    def update_lines(self, name: str, lines: list | numpy.ndarray, offsets: numpy.ndarray = None,
+                     colors: numpy.ndarray = None) -> None:
+        ...
+
+    @overload
+    def update_lines(self, uid: int, lines: list | numpy.ndarray, offsets: numpy.ndarray = None,
+                     colors: numpy.ndarray = None) -> None:
+        ...
+
+    @timed
+    def update_lines(self, arg, lines, offsets=None, colors=None):
+        """就地替换 add_lines 的折线，线数与顶点数可以变化"""
+        actor = self.get_actor(arg)
+        if actor is None:
+            print(f'update_lines failed, {arg} 对象不存在')
+            return
+        update_lines_actor(actor, lines, offsets, colors)
+        self.mark_dirty()
+
     @overload
     def set_visible(self, name: str, visible: bool) -> None:
         ...
@@ -193,9 +809,211 @@ class VTKVisualizer:
     def set_visible(self, uid: int, visible: bool) -> None:
         ...
 
+    @timed
     def set_visible(self, arg, visible: bool):
         actor = self.get_actor(arg)
         if actor is not None:
-            actor.SetVisibility(visible)
+            lod = self._lod_map.get(self._uid(arg))
+            if lod is not None:
+                lod.set_visible(visible)  # 交互中显示的是降采样级别
+            else:
+                actor.SetVisibility(visible)
+            self.mark_dirty()
+        else:
+            print(f'set_visible failed, {arg} 对象不存在')
+
+    def _point_indices(self, uid) -> list[PointIndex] | None:
+        """
+        点云的空间索引，累积点云为从旧到新各帧的索引，不是点云时返回 None。
+        索引在查询时按需构建，并在点数据变化后的下一次查询时重建，见 PointIndex
+        """
+        accumulator = self._accumulator_map.get(uid)
+        if accumulator is not None:
+            polydatas = accumulator.polydatas()
         else:
-            print(f'set_visible failed, {arg} 对象不存在')
\ No newline at end of file
+            actor = self._actor_map.get(uid)
+            mapper = actor.GetMapper() if isinstance(actor, vtkActor) else None
+            if mapper is None or not mapper.IsA('vtkPointGaussianMapper'):
+                return None
+            polydatas = [mapper.GetInput()]
+        cache = self._point_index_map.setdefault(uid, {})
+        indices = []
+        for polydata in polydatas:
+            index = cache.get(polydata.__this__)
+            if index is None:
+                index = cache[polydata.__this__] = PointIndex(polydata)
+            indices.append(index)
+        return indices
+
+    @timed
+    def nearest(self, arg, point, k: int = 1) -> tuple[numpy.ndarray, numpy.ndarray] | None:
+        """
+        点云中离 point（点云自身坐标系）最近的 k 个点，返回按距离升序的 (下标, 距离)。
+        累积点云的下标对应 get_accumulator(arg).points() 中的顺序
+        """
+        indices = self._point_indices(self._uid(arg))
+        if indices is None:
+            print(f'nearest failed, {arg} 不是点云')
+            return None
+        ids, distances, offset = [numpy.empty(0, dtype=numpy.int64)], [numpy.empty(0)], 0
+        for index in indices:
+            index_ids, index_distances = index.nearest(point, k)
+            ids.append(index_ids + offset)
+            distances.append(index_distances)
+            offset += index.n_points
+        ids, distances = numpy.concatenate(ids), numpy.concatenate(distances)
+        order = numpy.argsort(distances, kind='stable')[:k]
+        return ids[order], distances[order]
+
+    @timed
+    def within_box(self, arg, bounds) -> numpy.ndarray | None:
+        """点云中落在 (xmin, xmax, ymin, ymax, zmin, zmax)（点云自身坐标系，含边界）内的点的下标，升序"""
+        indices = self._point_indices(self._uid(arg))
+        if indices is None:
+            print(f'within_box failed, {arg} 不是点云')
+            return None
+        ids, offset = [numpy.empty(0, dtype=numpy.int64)], 0
+        for index in indices:
+            ids.append(index.within_box(bounds) + offset)
+            offset += index.n_points
+        return numpy.concatenate(ids)
+
+    def _display_ray(self, x: float, y: float) -> tuple[numpy.ndarray, numpy.ndarray]:
+        """显示坐标 (x, y) 处的视线在近、远裁剪面上的世界坐标"""
+        renderer = self._viz.renderer
+        ends = []
+        for z in (0.0, 1.0):
+            renderer.SetDisplayPoint(x, y, z)
+            renderer.DisplayToWorld()
+            world = renderer.GetWorldPoint()
+            ends.append(numpy.array(world[:3]) / world[3])
+        return ends[0], ends[1]
+
+    def _pixel_size(self) -> float:
+        """焦点处一个像素对应的世界距离"""
+        camera = self._viz.renderer.GetActiveCamera()
+        height = max(self._viz.renderer.GetSize()[1], 1)
+        if camera.GetParallelProjection():
+            return 2 * camera.GetParallelScale() / height
+        return 2 * camera.GetDistance() * math.tan(math.radians(camera.GetViewAngle()) / 2) / height
+
+    @staticmethod
+    def _to_local(prop: vtkProp3D, *world: numpy.ndarray) -> list[numpy.ndarray]:
+        matrix = prop.GetMatrix()
+        if matrix.IsIdentity():
+            return list(world)
+        inverse = vtkMatrix4x4()
+        vtkMatrix4x4.Invert(matrix, inverse)
+        return [numpy.array(inverse.MultiplyPoint((*p, 1.0))[:3]) for p in world]
+
+    @timed
+    def pick(self, x: float, y: float, tolerance: float = 5) -> dict | None:
+        """
+        拾取显示坐标 (x, y)（像素，原点在左下角）处最靠前的可见点云中的点，tolerance 为像素容差，
+        按焦点处的像素大小换算为世界距离。返回 {'uid', 'name', 'index', 'position', 'values'}，
+        position 为点云自身坐标系下的坐标，values 为该点的点属性（颜色 'Colors'、保留的强度 'intensity' 等）；
+        没有拾取到时返回 None
+        """
+        near, far = self._display_ray(x, y)
+        distance = tolerance * self._pixel_size()
+        best = None
+        for uid, prop in self._actor_map.items():
+            if not prop.GetVisibility():
+                continue
+            indices = self._point_indices(uid)
+            if not indices:
+                continue
+            p0, p1 = self._to_local(prop, near, far)
+            offset = 0
+            for index in indices:
+                hit = index.intersect_segment(p0, p1, distance)
+                # 仿射变换不改变线段参数，各 actor 的 t 可以直接比较
+                if hit is not None and (best is None or hit[0] < best[0]):
+                    best = (hit[0], uid, index, hit[1], offset + hit[1])
+                offset += index.n_points
+        if best is None:
+            return None
+        _, uid, index, point_id, global_id = best
+        point_data = index.polydata.GetPointData()
+        values = {}
+        for i in range(point_data.GetNumberOfArrays()):
+            array = point_data.GetArray(i)
+            if array is not None:
+                value = array.GetTuple(point_id)
+                values[array.GetName() or str(i)] = value[0] if len(value) == 1 else value
+        names = {v: k for k, v in self._actor_name_map.items()}
+        return {
+            'uid': uid,
+            'name': names.get(uid),
+            'index': global_id,
+            'position': tuple(float(v) for v in index.xyz()[point_id]),
+            'values': values,
+        }
+
+    def enable_picking(self, mode: str = 'click', tolerance: float = 5, highlight: bool = True, *, callback=None):
+        """
+        鼠标拾取点云中的点：mode='click' 时左键单击（按下与松开之间没有拖动）拾取，'hover' 时鼠标悬停即拾取。
+        每次拾取调用 callback(result)，result 同 pick()，没拾取到时为 None；highlight 时用黄色大点标出拾取到的点。
+        callback 只能按关键字传入，位置参数与 VTKVisualizerRemote.enable_picking（不能传回调）一致。
+        大点云的第一次拾取需要构建空间索引（千万点约 2 秒），之后每次拾取为毫秒级
+        """
+        assert mode in ('click', 'hover'), 'mode 为 click 或 hover'
+        self.disable_picking()
+        self._picking = {'mode': mode, 'callback': callback, 'tolerance': tolerance, 'highlight': highlight}
+        interactor = self._viz.interactor
+        self._pick_observers = [
+            interactor.AddObserver(vtkCommand.LeftButtonPressEvent, self._on_pick_press),
+            interactor.AddObserver(vtkCommand.LeftButtonReleaseEvent, self._on_pick_release),
+            interactor.AddObserver(vtkCommand.MouseMoveEvent, self._on_pick_move),
+        ]
+
+    def disable_picking(self):
+        for observer in self._pick_observers:
+            self._viz.interactor.RemoveObserver(observer)
+        self._pick_observers.clear()
+        self._picking = None
+        self._pick_press = None
+        self._show_pick_marker(None)
+
+    def last_pick(self) -> dict | None:
+        """鼠标最近一次拾取的结果"""
+        return self._last_pick
+
+    def _on_pick_press(self, obj, event):
+        self._pick_press = self._viz.interactor.GetEventPosition()
+
+    def _on_pick_release(self, obj, event):
+        press, self._pick_press = self._pick_press, None
+        position = self._viz.interactor.GetEventPosition()
+        if self._picking['mode'] == 'click' and press is not None and \
+                abs(position[0] - press[0]) <= 2 and abs(position[1] - press[1]) <= 2:
+            self._pick_at(*position)
+
+    def _on_pick_move(self, obj, event):
+        # 拖动相机时不拾取
+        if self._picking['mode'] == 'hover' and self._pick_press is None:
+            self._pick_at(*self._viz.interactor.GetEventPosition())
+
+    def _pick_at(self, x: int, y: int):
+        result = self.pick(x, y, self._picking['tolerance'])
+        self._last_pick = result
+        if self._picking['highlight']:
+            self._show_pick_marker(result)
+        if self._picking['callback'] is not None:
+            self._picking['callback'](result)
+
+    def _show_pick_marker(self, result: dict | None):
+        if result is None:
+            if self._pick_marker is not None and self._pick_marker.GetVisibility():
+                self._pick_marker.VisibilityOff()
+                self.mark_dirty()
+            return
+        if self._pick_marker is None:
+            self._pick_marker = point_actor(numpy.zeros((1, 3)), (1, 1, 0), point_size=12)
+            self._viz.renderer.AddActor(self._pick_marker)
+        matrix = vtkMatrix4x4()
+        matrix.DeepCopy(self._actor_map[result['uid']].GetMatrix())
+        self._pick_marker.SetUserMatrix(matrix)
+        update_point_actor(self._pick_marker, numpy.array([result['position']]))
+        self._pick_marker.VisibilityOn()
+        self.mark_dirty()
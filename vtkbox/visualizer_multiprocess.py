@@ -1,63 +1,739 @@
-from multiprocessing import Process, Queue
-from queue import Empty
-from typing import Any, Union
-import vtk
+import asyncio
+import atexit
+import collections
+import functools
+import itertools
+import pickle
+import threading
+import traceback
+import weakref
+from concurrent.futures import Future, InvalidStateError
+from contextlib import contextmanager
+from multiprocessing import Process, Queue, Value, resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from queue import Empty, Full
+from typing import TYPE_CHECKING, Any, ContextManager, NamedTuple, Union
+from vtkmodules.vtkCommonCore import vtkObjectBase
 import numpy
-from .visualizer import VTKVisualizer
-from .urdf2vtk.vtk_struct import VRobot
+
+if TYPE_CHECKING:
+    # 父进程只负责转发命令，渲染相关模块只在子进程中导入
+    from .visualizer import VTKVisualizer
+    from .urdf2vtk.vtk_struct import VRobot
 
 
 class VTKVisualizerRemote:
     """接口类，不应直接实例化。使用 create_visualizer_subprocess() 获取实例。"""
-    robot: VRobot
+    robot: 'VRobot'
     def __new__(cls, *args, **kwargs):
         raise TypeError("VTKVisualizerRemote 不应直接实例化，请使用 create_visualizer_subprocess()")
-    def show(self) -> None: pass
-    def set_robot(self, urdf_path: str, mesh_root_path: str) -> None: pass
-    def add_actor(self, actor: Any, name: str = None) -> None: pass
-    def get_actor(self, name: str) -> None: pass
-    def remove_actor(self, name: str) -> None: pass
-    def add_points(self, points: Union[list, numpy.ndarray], color: tuple[float, float, float] = (1, 1, 1), point_size: int = 3, name: str = None) -> None: pass
-    def add_points_with_intensity(self, points: Union[list, numpy.ndarray], point_size: int = 3, name: str = None) -> None: pass
-    def add_box(self, xmin: float, xmax: float, ymin: float, ymax: float, zmin: float, zmax: float, opacity: float = 1, name: str = None) -> None: pass
-    def add_line(self, points: Union[list, numpy.ndarray], color: tuple[float, float, float] = (1, 1, 1), line_width: int = 8, name: str = None) -> None: pass
-    def set_visible(self, name: str, visible: bool) -> None: pass
+    def show(self) -> Future: pass
+    def set_robot(self, urdf_path: str, mesh_root_path: str, load_workers: int = 0, load_executor: str = 'thread', cache: Union[bool, str] = False, triangle_budget: int = 0) -> Future: pass
+    def add_actor(self, actor: Any, name: str = None) -> Future: pass
+    def get_actor(self, name: str) -> Future: pass
+    def remove_actor(self, name: str) -> Future: pass
+    def add_points(self, points: Union[list, numpy.ndarray], color: tuple[float, float, float] = (1, 1, 1), point_size: int = 3, name: str = None, lod_budget: int = 0, colors: numpy.ndarray = None) -> Future: pass
+    def add_points_with_intensity(self, points: Union[list, numpy.ndarray], point_size: int = 3, name: str = None, cmap: str = 'cym', norm: Union[str, tuple[float, float]] = 'max', lod_budget: int = 0, keep_intensity: bool = False) -> Future: pass
+    def add_points_from_file(self, path: str, stride: int = 1, max_points: int = None, color: tuple[float, float, float] = (1, 1, 1), point_size: int = 3, name: str = None, cmap: str = 'cym', norm: Union[str, tuple[float, float]] = 'max', keep_intensity: bool = False, lod_budget: int = 0) -> Future: pass
+    def add_accumulator(self, max_frames: int = 10, color: tuple[float, float, float] = (1, 1, 1), point_size: int = 3, cmap: str = 'cym', norm: Union[str, tuple[float, float]] = 'max', name: str = None) -> Future: pass
+    def append_points(self, name: str, points: Union[list, numpy.ndarray], intensity: numpy.ndarray = None, colors: numpy.ndarray = None) -> Future: pass
+    def clear_accumulator(self, name: str) -> Future: pass
+    def add_tiles(self, tiles: Union[list, str], memory_budget: int = 2 << 30, workers: int = 4, max_points_per_tile: int = None, stride: int = 1, max_distance: float = None, color: tuple[float, float, float] = (1, 1, 1), point_size: int = 3, cmap: str = 'cym', norm: Union[str, tuple[float, float]] = 'max', name: str = None) -> Future: pass
+    def update_tiles(self, name: str, wait: bool = False) -> Future: pass
+    def tile_stats(self, name: str) -> Future: pass
+    def update_points(self, name: str, points: Union[list, numpy.ndarray], intensity: numpy.ndarray = None, cmap: str = 'cym', norm: Union[str, tuple[float, float]] = 'max', colors: numpy.ndarray = None) -> Future: pass
+    def set_lod_budget(self, name: str, budget: int) -> Future: pass
+    def update_points_with_intensity(self, name: str, points: Union[list, numpy.ndarray], cmap: str = 'cym', norm: Union[str, tuple[float, float]] = 'max') -> Future: pass
+    def update_points_with_color(self, name: str, points: Union[list, numpy.ndarray], colors: numpy.ndarray) -> Future: pass
+    def add_box(self, xmin: float, xmax: float, ymin: float, ymax: float, zmin: float, zmax: float, opacity: float = 1, name: str = None) -> Future: pass
+    def add_boxes(self, bounds: numpy.ndarray, colors: numpy.ndarray = None, color: tuple[float, float, float] = (1, 1, 1), opacity: float = 1, wireframe: bool = False, name: str = None) -> Future: pass
+    def update_boxes(self, name: str, bounds: numpy.ndarray, colors: numpy.ndarray = None) -> Future: pass
+    def add_lines(self, lines: Union[list, numpy.ndarray], offsets: numpy.ndarray = None, colors: numpy.ndarray = None, color: tuple[float, float, float] = (1, 1, 1), line_width: int = 2, name: str = None) -> Future: pass
+    def update_lines(self, name: str, lines: Union[list, numpy.ndarray], offsets: numpy.ndarray = None, colors: numpy.ndarray = None) -> Future: pass
+    def add_line(self, points: Union[list, numpy.ndarray], color: tuple[float, float, float] = (1, 1, 1), line_width: int = 8, name: str = None) -> Future: pass
+    def set_visible(self, name: str, visible: bool) -> Future: pass
+    def nearest(self, name: str, point: tuple[float, float, float], k: int = 1) -> Future: pass
+    def within_box(self, name: str, bounds: tuple[float, float, float, float, float, float]) -> Future: pass
+    def pick(self, x: float, y: float, tolerance: float = 5) -> Future: pass
+    def enable_picking(self, mode: str = 'click', tolerance: float = 5, highlight: bool = True) -> Future: pass
+    def disable_picking(self) -> Future: pass
+    def last_pick(self) -> Future: pass
+    def mark_dirty(self) -> Future: pass
+    def set_max_fps(self, max_fps: float) -> Future: pass
+    def play_trajectory(self, q: numpy.ndarray, t: numpy.ndarray = None, fps: float = None, speed: float = 1.0, loop: bool = False) -> Future: pass
+    def pause_trajectory(self) -> Future: pass
+    def resume_trajectory(self) -> Future: pass
+    def seek_trajectory(self, position: float) -> Future: pass
+    def set_trajectory_speed(self, speed: float) -> Future: pass
+    def stop_trajectory(self) -> Future: pass
+    def trajectory_state(self) -> Future: pass
+    def enable_stats(self, enabled: bool = True, interval: float = 1.0, overlay: bool = False) -> Future: pass
+    def stats(self) -> Future: pass
+    def reset_stats(self) -> Future: pass
+    def render(self, force: bool = False) -> Future: pass
+    def render_to_array(self) -> Future: pass
+    def screenshot(self, path: str) -> Future: pass
+    def set_size(self, width: int, height: int) -> Future: pass
+    def reset_camera(self) -> Future: pass
+    def set_camera(self, position: tuple[float, float, float] = None, focal_point: tuple[float, float, float] = None, view_up: tuple[float, float, float] = None) -> Future: pass
+    def queue_stats(self) -> dict: pass
+    def batch(self) -> ContextManager[None]: pass
+    def flush(self) -> None: pass
+    aio: Any  # 与本接口相同，但调用返回 asyncio.Future
+
+
+class _SharedArrayRef(NamedTuple):
+    """通过队列传递的共享内存数组描述"""
+    name: str
+    shape: tuple
+    dtype: str | list  # dtype.str，结构化数组为 dtype.descr
+
+
+class _BatchMessage(NamedTuple):
+    """一批命令，子进程在同一次 timer 中依次执行，之后只 Render 一次"""
+    messages: list
+
+
+def _iter_shared_refs(message):
+    if isinstance(message, _BatchMessage):
+        for m in message.messages:
+            yield from _iter_shared_refs(m)
+        return
+    _, _, args, kwargs = message
+    for value in (*args, *kwargs.values()):
+        if isinstance(value, _SharedArrayRef):
+            yield value
+
+
+def _expand(message) -> list:
+    if isinstance(message, _BatchMessage):
+        return message.messages
+    return [message]
+
+
+class _SharedMemoryPool:
+    """
+    客户端侧的共享内存池。大于 threshold 的 numpy 参数拷贝进池中的共享内存段，只通过队列发送 _SharedArrayRef。
+    子进程用完（重建的数组被回收）后把段名放回 release 队列，客户端再复用该段；
+    unlink 的段名通过 unlinked 队列通知子进程关闭映射。
+    pack 在调用线程、discard 在转发线程与回复线程中执行，都在 _lock 内进行
+    """
+    _MIN_SEGMENT = 1 << 20
+
+    def __init__(self, release: Queue, threshold: int = 1 << 16, max_bytes: int = 1 << 30,
+                 unlinked: Queue = None):
+        self.threshold = threshold
+        self.max_bytes = max_bytes
+        self._release = release
+        self._unlinked = unlinked
+        self._segments = {}  # type: dict[str, SharedMemory]
+        self._free = []  # type: list[str]
+        self._busy = {}  # type: dict[str, _SharedArrayRef] # 正在被某条命令使用的段
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def pack(self, value):
+        if not isinstance(value, numpy.ndarray) or value.nbytes < self.threshold or value.dtype.hasobject:
+            return value
+        with self._lock:
+            shm = self._acquire(value.nbytes)
+            if shm is None:  # 超出内存上限，退回 pickle
+                return value
+            # 结构化 dtype 的 str 不含字段名，用 descr 传输
+            dtype = value.dtype.str if value.dtype.names is None else value.dtype.descr
+            ref = self._busy[shm.name] = _SharedArrayRef(shm.name, value.shape, dtype)
+        # 段已登记为使用中，拷贝不需要持锁
+        view = numpy.ndarray(value.shape, value.dtype, buffer=shm.buf)
+        numpy.copyto(view, value)
+        return ref
+
+    def _free_segment(self, name: str):
+        if self._busy.pop(name, None) is not None:
+            self._free.append(name)
+
+    def _collect(self):
+        while True:
+            try:
+                name = self._release.get_nowait()
+            except Empty:
+                break
+            self._free_segment(name)
+
+    def _acquire(self, nbytes: int) -> SharedMemory | None:
+        self._collect()
+        fits = [name for name in self._free if self._segments[name].size >= nbytes]
+        if fits:
+            name = min(fits, key=lambda n: self._segments[n].size)
+            self._free.remove(name)
+            return self._segments[name]
+        size = max(self._MIN_SEGMENT, 1 << (nbytes - 1).bit_length())
+        # 空闲段都太小，按从小到大释放，腾出上限
+        for name in sorted(self._free, key=lambda n: self._segments[n].size):
+            if self._total + size <= self.max_bytes:
+                break
+            self._free.remove(name)
+            self._unlink(name)
+        if self._total + size > self.max_bytes:
+            return None
+        shm = SharedMemory(create=True, size=size)
+        self._segments[shm.name] = shm
+        self._total += shm.size
+        return shm
+
+    def discard(self, message):
+        """被丢弃、未发送到子进程的命令，直接归还其占用的段；重复 discard 同一条命令不会重复归还"""
+        with self._lock:
+            for ref in _iter_shared_refs(message):
+                if self._busy.get(ref.name) is ref:
+                    self._free_segment(ref.name)
+
+    def _unlink(self, name: str):
+        shm = self._segments.pop(name)
+        self._busy.pop(name, None)
+        self._total -= shm.size
+        shm.close()
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+        if self._unlinked is not None:
+            self._unlinked.put(name)
+
+    def close(self):
+        """unlink 所有段，应在子进程退出后调用"""
+        with self._lock:
+            for name in list(self._segments):
+                self._unlink(name)
+            self._free.clear()
+
+
+class _SharedMemoryReceiver:
+    """
+    子进程侧，按 _SharedArrayRef 重建零拷贝数组，数组被回收时通知客户端复用该段。
+    段的所有权在客户端，子进程只 attach，不 unlink；客户端 unlink 某段后，在其上的数组都回收时关闭映射，
+    映射的总量因此不超过客户端池的 shm_max_bytes
+    """
+    def __init__(self, release: Queue, unlinked: Queue = None):
+        self._release = release
+        self._unlinked = unlinked
+        self._attached = {}  # type: dict[str, SharedMemory]
+        self._live = {}  # type: dict[str, int] # 各段上尚未回收的数组数
+        self._closing = set()  # type: set[str] # 客户端已 unlink、等待关闭映射的段
+
+    def unpack(self, value):
+        if not isinstance(value, _SharedArrayRef):
+            return value
+        self.close_unlinked()
+        shm = self._attached.get(value.name)
+        if shm is None:
+            shm = self._attached[value.name] = SharedMemory(name=value.name)
+        array = numpy.ndarray(value.shape, numpy.dtype(value.dtype), buffer=shm.buf)
+        self._live[value.name] = self._live.get(value.name, 0) + 1
+        # 数组可能被 actor 继续引用（numpy_to_vtk 不拷贝），因此在数组回收时才归还该段
+        weakref.finalize(array, self._finalized, value.name)
+        return array
+
+    def _finalized(self, name: str):
+        self._live[name] -= 1
+        self._release.put(name)
+
+    def close_unlinked(self):
+        """关闭客户端已 unlink 且没有存活数组的段的映射"""
+        if self._unlinked is not None:
+            while True:
+                try:
+                    self._closing.add(self._unlinked.get_nowait())
+                except Empty:
+                    break
+        for name in list(self._closing):
+            if self._live.get(name, 0):
+                continue
+            shm = self._attached.pop(name, None)
+            if shm is not None:
+                try:
+                    shm.close()
+                except BufferError:  # 数组刚回收，导出的 buffer 尚未释放，下次再关
+                    self._attached[name] = shm
+                    continue
+            self._live.pop(name, None)
+            self._closing.discard(name)
+
+    def discard(self, message):
+        """被合并、不会执行的命令，直接归还其占用的段"""
+        for ref in _iter_shared_refs(message):
+            self._release.put(ref.name)
+
+
+
+class _CommandStats:
+    """跨进程共享的命令计数：dropped 在客户端按溢出策略丢弃时累加，coalesced 在子进程合并时累加"""
+    def __init__(self):
+        self.dropped = Value('Q', 0)
+        self.coalesced = Value('Q', 0)
+
+    @staticmethod
+    def add(counter, n: int = 1):
+        with counter.get_lock():
+            counter.value += n
+
+
+class _RemoteChannel:
+    OVERFLOW = ['block', 'drop_oldest', 'drop_newest']
+
+    def __init__(self, request: Queue, pool: _SharedMemoryPool = None, stats: _CommandStats = None,
+                 overflow: str = 'block', reply: Queue = None, max_queue: int = 0):
+        assert overflow in _RemoteChannel.OVERFLOW, f'overflow 策略错误: {overflow}'
+        self.request = request
+        self.pool = pool
+        self.stats = stats or _CommandStats()
+        self.overflow = overflow
+        self.max_queue = max_queue
+        # drop_oldest：请求队列无法查看队中内容，命令先进入客户端的有序发送缓冲，由转发线程按序放入请求队列，
+        # 缓冲满时在缓冲内挑最旧的可丢弃命令
+        self._outbox = collections.deque()
+        self._outbox_cond = threading.Condition()
+        if overflow == 'drop_oldest' and max_queue > 0:
+            threading.Thread(target=self._forward, daemon=True).start()
+        self._batch = []
+        self._batch_depth = 0
+        self._ids = itertools.count()
+        self._futures = {}  # type: dict[int, Future]
+        self._futures_lock = threading.Lock()
+        self._reply = reply
+        self.process = None  # type: Process | None # 子进程启动后设置，用于检测其退出
+        self._closed = None  # type: RuntimeError | None # 子进程退出后，所有未完成与之后的调用以此失败
+        if reply is not None:
+            threading.Thread(target=self._receive_replies, daemon=True).start()
+
+    def send(self, path: tuple, args: tuple, kwargs: dict) -> Future:
+        future = Future()
+        if self._closed is not None:
+            future.set_exception(self._closed)
+            return future
+        if self.pool is not None:
+            args = tuple(self.pool.pack(a) for a in args)
+            kwargs = {k: self.pool.pack(v) for k, v in kwargs.items()}
+        req_id = next(self._ids)
+        if self._reply is not None:
+            with self._futures_lock:
+                if self._closed is None:
+                    self._futures[req_id] = future
+            if self._closed is not None and not future.done():
+                future.set_exception(self._closed)
+        else:
+            future.set_result(None)
+        message = (req_id, path, args, kwargs)
+        if self._batch_depth:
+            self._batch.append(message)
+        else:
+            self._put(message)
+        return future
+
+    def _receive_replies(self) -> None:
+        while True:
+            try:
+                reply = self._reply.get(timeout=0.5)
+            except Empty:
+                if self._check_alive():
+                    continue
+                # 子进程退出前放入的回复可能还在管道中，先收完再让其余调用失败
+                while True:
+                    try:
+                        self._resolve(self._reply.get(timeout=0.1))
+                    except (Empty, EOFError, OSError):
+                        break
+                self._fail_all()
+                break
+            except (EOFError, OSError):
+                self._fail_all()
+                break
+            self._resolve(reply)
+
+    def _resolve(self, reply) -> None:
+        req_id, result, error = reply
+        with self._futures_lock:
+            future = self._futures.pop(req_id, None)
+        if future is None or future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def _check_alive(self) -> bool:
+        return self._closed is None and (self.process is None or self.process.is_alive())
+
+    def _fail_all(self) -> None:
+        """子进程已退出：未完成的调用以 RuntimeError 失败，之后的 send 也立即失败"""
+        exitcode = self.process.exitcode if self.process is not None else None
+        with self._futures_lock:
+            if self._closed is None:
+                self._closed = RuntimeError(f'可视化子进程已退出（exitcode={exitcode}），无法执行命令')
+            futures, self._futures = self._futures, {}
+        for future in futures.values():
+            try:
+                future.set_exception(self._closed)
+            except InvalidStateError:  # 已被取消
+                pass
+        with self._outbox_cond:
+            for message in self._outbox:
+                if self.pool is not None:
+                    self.pool.discard(message)
+            self._outbox.clear()
+            self._outbox_cond.notify_all()
+
+    def _blocking_put(self, message) -> None:
+        """阻塞放入请求队列，子进程退出后不再等待（对应的调用已由 _fail_all 置为失败）"""
+        while True:
+            try:
+                self.request.put(message, timeout=0.5)
+                return
+            except Full:
+                if not self._check_alive():
+                    self._fail_all()
+                    if self.pool is not None:
+                        self.pool.discard(message)
+                    return
+
+    def _resolve_dropped(self, message) -> None:
+        for req_id, *_ in _expand(message):
+            with self._futures_lock:
+                future = self._futures.pop(req_id, None)
+            if future is not None:
+                future.cancel()
+
+    @contextmanager
+    def batch(self):
+        self._batch_depth += 1
+        try:
+            yield
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self.flush()
+
+    def flush(self) -> None:
+        if self._batch:
+            message, self._batch = _BatchMessage(self._batch), []
+            self._put(message)
+
+    def _put(self, message) -> None:
+        if self.overflow == 'block' or self.max_queue <= 0:
+            self._blocking_put(message)
+        elif self.overflow == 'drop_newest':
+            try:
+                self.request.put_nowait(message)
+            except Full:
+                if _droppable(message):
+                    self._discard(message)
+                else:
+                    self._blocking_put(message)
+        else:
+            self._put_drop_oldest(message)
+
+    def _put_drop_oldest(self, message) -> None:
+        """
+        缓冲满时丢弃缓冲中最旧的可合并更新（_COALESCE_GROUP 中的命令）；缓冲中全是结构性命令时，
+        新命令若可丢弃则丢弃新命令，否则阻塞到转发线程腾出空间。add_* / set_robot / remove_actor / batch 永不丢弃
+        """
+        with self._outbox_cond:
+            while len(self._outbox) >= self.max_queue and self._closed is None:
+                victim = next((m for m in self._outbox if _droppable(m)), None)
+                if victim is not None:
+                    self._outbox.remove(victim)
+                    self._discard(victim)
+                elif _droppable(message):
+                    self._discard(message)
+                    return
+                else:
+                    self._outbox_cond.wait(0.5)
+                    if not self._check_alive():
+                        self._fail_all()  # Condition 默认使用 RLock，可重入
+            if self._closed is not None:
+                if self.pool is not None:
+                    self.pool.discard(message)
+                return
+            self._outbox.append(message)
+            self._outbox_cond.notify_all()
+
+    def _forward(self) -> None:
+        while True:
+            with self._outbox_cond:
+                while not self._outbox:
+                    self._outbox_cond.wait()
+                message = self._outbox.popleft()
+                self._outbox_cond.notify_all()
+            self._blocking_put(message)
+
+    def _discard(self, message) -> None:
+        if self.pool is not None:
+            self.pool.discard(message)
+        self._resolve_dropped(message)
+        _CommandStats.add(self.stats.dropped)
+
+    def queue_stats(self) -> dict:
+        try:
+            depth = self.request.qsize() + len(self._outbox)
+        except NotImplementedError:  # macOS 不支持 qsize
+            depth = -1
+        return {
+            'queue_depth': depth,
+            'dropped': self.stats.dropped.value,
+            'coalesced': self.stats.coalesced.value,
+        }
 
 
 class _RemoteProcedureCallClient:
-    def __init__(self, request: Queue, path: tuple = ()):
-        self.__request = request
+    def __init__(self, channel: _RemoteChannel, path: tuple = ()):
+        self.__channel = channel
         self.__path = path
     def __getattr__(self, item: str):
-        return _RemoteProcedureCallClient(self.__request, self.__path + (item,))
-    def __call__(self, *args, **kwargs) -> None:
-        self.__request.put((self.__path, args, kwargs))
+        return _RemoteProcedureCallClient(self.__channel, self.__path + (item,))
+    def __call__(self, *args, **kwargs) -> Future:
+        return self.__channel.send(self.__path, args, kwargs)
+    def queue_stats(self) -> dict:
+        return self.__channel.queue_stats()
+    def batch(self) -> ContextManager[None]:
+        """with viz.batch(): 内的调用合并为一条消息，退出时发送，子进程在同一帧内全部执行后再渲染"""
+        return self.__channel.batch()
+    def flush(self) -> None:
+        """立即发送 batch 中已缓存的调用"""
+        self.__channel.flush()
+    @property
+    def aio(self) -> '_AsyncRemoteProcedureCallClient':
+        """asyncio 版本，调用返回可 await 的 asyncio.Future"""
+        return _AsyncRemoteProcedureCallClient(self.__channel, self.__path)
+
+
+class _AsyncRemoteProcedureCallClient:
+    def __init__(self, channel: _RemoteChannel, path: tuple = ()):
+        self.__channel = channel
+        self.__path = path
+    def __getattr__(self, item: str):
+        return _AsyncRemoteProcedureCallClient(self.__channel, self.__path + (item,))
+    def __call__(self, *args, **kwargs) -> asyncio.Future:
+        return asyncio.wrap_future(self.__channel.send(self.__path, args, kwargs))
+
+
+# 同一 actor 的这些更新在一次 drain 内只保留最新一条
+_COALESCE_GROUP = {
+    'update_points': 'points',
+    'update_points_with_intensity': 'points',
+    'update_points_with_color': 'points',
+    'update_boxes': 'boxes',
+    'update_lines': 'lines',
+    'set_visible': 'visible',
+}
 
 
-def sub_main(request: Queue) -> None:
-    viz = VTKVisualizer()
-    def handle_timer_event(obj, event) -> None:
+def _droppable(message) -> bool:
+    """溢出时可以丢弃的命令：只有 _COALESCE_GROUP 中的更新，丢掉后会被同一 actor 的下一条更新取代"""
+    if isinstance(message, _BatchMessage):
+        return False
+    path = message[1]
+    return len(path) == 1 and path[0] in _COALESCE_GROUP
+
+
+def _coalesce_key(message):
+    _, path, args, kwargs = message
+    if len(path) != 1 or path[0] not in _COALESCE_GROUP:
+        return None
+    target = args[0] if args else kwargs.get('arg')
+    if not isinstance(target, (str, int)):
+        return None
+    return _COALESCE_GROUP[path[0]], target
+
+
+def _coalesce(messages: list) -> tuple[list, list]:
+    """返回 (保留的命令, 被更新的命令覆盖的命令)"""
+    kept = []
+    superseded = []
+    seen = set()
+    for message in reversed(messages):
+        key = _coalesce_key(message)
+        if key is not None:
+            if key in seen:
+                superseded.append(message)
+                continue
+            seen.add(key)
+        kept.append(message)
+    kept.reverse()
+    return kept, superseded
+
+
+_REPLY_SCALARS = (type(None), bool, int, float, str, bytes, numpy.generic)
+
+
+@functools.cache
+def _local_only_types() -> tuple[type, ...]:
+    """只在子进程中有意义的句柄对象（set_robot 返回的 VRobot 等），回复时替换为 None"""
+    from .point_accumulator import PointAccumulator
+    from .tiled_scene import TiledPointScene
+    from .urdf2vtk.trajectory import TrajectoryPlayer
+    from .urdf2vtk.vtk_struct import VRobot
+    return vtkObjectBase, VRobot, TrajectoryPlayer, PointAccumulator, TiledPointScene
+
+
+def _to_reply(value):
+    """
+    把返回值转为可跨进程传输的对象，不做试探性的 pickle。vtk 对象与子进程内的句柄替换为 None，
+    add_* 返回的 (uid, actor) 因此变为 (uid, None)；其他无法传输的类型抛出 TypeError，作为错误回复
+    """
+    if isinstance(value, _REPLY_SCALARS):
+        return value
+    if isinstance(value, numpy.ndarray):
+        if value.dtype.hasobject:
+            raise TypeError('object 类型的 numpy 数组无法传回主进程')
+        return value
+    if isinstance(value, (tuple, list)):
+        return type(value)(_to_reply(v) for v in value)
+    if isinstance(value, dict):
+        return {k: _to_reply(v) for k, v in value.items()}
+    if isinstance(value, _local_only_types()):
+        return None
+    raise TypeError(f'返回值类型 {type(value).__name__} 无法传回主进程')
+
+
+def _call(viz: 'VTKVisualizer', receiver: _SharedMemoryReceiver, path: tuple, args: tuple, kwargs: dict):
+    args = tuple(receiver.unpack(a) for a in args)
+    kwargs = {k: receiver.unpack(v) for k, v in kwargs.items()}
+    target = viz
+    for p in path:
+        target = getattr(target, p)
+    return target(*args, **kwargs)
+
+
+def _dispatch(viz: 'VTKVisualizer', receiver: _SharedMemoryReceiver, message) -> tuple:
+    """执行一条命令，返回 (req_id, result, error) 作为回复"""
+    req_id, path, args, kwargs = message
+    try:
+        if viz._stats is None:
+            result = _call(viz, receiver, path, args, kwargs)
+        else:
+            # 包含参数重建（共享内存映射）的耗时，内部被统计的方法不重复计入
+            with viz._stats.command('.'.join(path)):
+                result = _call(viz, receiver, path, args, kwargs)
+        result = _to_reply(result)
+    except Exception as e:
+        traceback.print_exc()
+        try:
+            pickle.dumps(e)
+        except Exception:
+            e = RuntimeError(repr(e))
+        return req_id, None, e
+    return req_id, result, None
+
+
+def sub_main(request: Queue, release: Queue = None, stats: _CommandStats = None, coalesce: bool = False,
+             reply: Queue = None, viz_kwargs: dict = None, unlinked: Queue = None) -> None:
+    from .visualizer import VTKVisualizer
+    viz = VTKVisualizer(**(viz_kwargs or {}))
+    receiver = _SharedMemoryReceiver(release, unlinked)
+    stats = stats or _CommandStats()
+    def queue_stats() -> dict:
+        try:
+            depth = request.qsize()
+        except NotImplementedError:
+            depth = -1
+        return {'queue_depth': depth, 'dropped': stats.dropped.value, 'coalesced': stats.coalesced.value}
+    viz._stats_sources['queue'] = queue_stats
+    pending_replies = []
+    def send_replies(replies: list) -> None:
+        if reply is not None:
+            for r in replies:
+                reply.put(r)
+        replies.clear()
+    def handle_requests(messages: list = None) -> bool:
+        messages = messages or []
         while True:
             try:
-                path, args, kwargs = request.get_nowait()
+                message = request.get_nowait()
             except Empty:
                 break
-            target = viz
-            for p in path:
-                target = getattr(target, p)
-            target(*args, **kwargs)
-        obj.Render()
-    viz._viz.interactor.AddObserver(vtk.vtkCommand.TimerEvent, handle_timer_event)
-    viz._viz.interactor.CreateRepeatingTimer(20)
+            if message is None:
+                # 退出标记留给 headless 主循环处理
+                request.put(None)
+                break
+            messages.extend(_expand(message))
+        if not messages:
+            return False
+        if coalesce:
+            messages, superseded = _coalesce(messages)
+            if superseded:
+                _CommandStats.add(stats.coalesced, len(superseded))
+            for message in superseded:
+                receiver.discard(message)
+                pending_replies.append((message[0], None, None))
+        for message in messages:
+            pending_replies.append(_dispatch(viz, receiver, message))
+        receiver.close_unlinked()
+        # 任何命令都可能改变场景（如 robot.set_q），一律标记为脏
+        return True
+    if viz.headless:
+        # 没有事件循环：阻塞等待命令，执行后立即回复；只在 render_to_array / screenshot 时渲染
+        while True:
+            message = request.get()
+            if message is None:
+                break
+            if handle_requests(_expand(message)):
+                viz.mark_dirty()
+            send_replies(pending_replies)
+        return
+    viz.add_tick_callback(handle_requests)
+    # 渲染完成后再回复，future 完成即表示该命令已显示
+    viz._render_loop.add_render_callback(lambda: send_replies(pending_replies))
     while viz._viz.render_window.GetNeverRendered():
-        path, args, kwargs = request.get()
-        target = viz
-        for p in path:
-            target = getattr(target, p)
-        target(*args, **kwargs)
+        send_replies([_dispatch(viz, receiver, message) for message in _expand(request.get())])
+
+
+def _shutdown(process: Process, pool: _SharedMemoryPool = None, request: Queue = None) -> None:
+    if request is not None and process.is_alive():
+        request.put(None)  # headless 子进程没有窗口可关闭，通知其退出
+    process.join()
+    if pool is not None:
+        pool.close()
+
 
+def create_visualizer_subprocess(shared_memory: bool = True, shm_threshold: int = 1 << 16,
+                                 shm_max_bytes: int = 1 << 30, coalesce: bool = False,
+                                 max_queue: int = 0, overflow: str = 'block', max_fps: float = 60,
+                                 min_poll_ms: int = 5, max_poll_ms: int = 100, headless: bool = False,
+                                 size: tuple[int, int] = None) -> VTKVisualizerRemote:
+    """
+    max_fps / min_poll_ms / max_poll_ms: 见 VTKVisualizer，子进程只在场景变化时渲染，空闲时轮询间隔逐步退避
+    headless / size: 见 VTKVisualizer，headless 子进程不创建窗口，用 render_to_array / screenshot 取图，
+    主进程退出时自动结束
+    shared_memory: 大于 shm_threshold 字节的 numpy 参数通过共享内存传输，队列中只传描述
+    shm_max_bytes: 共享内存池上限，超出后退回 pickle
+    coalesce: 子进程每次 drain 时，同一 actor 的 update_points*/set_visible 只执行最新一条
+    max_queue: 请求队列上限，0 为不限
+    overflow: 队列满时的策略，'block' 阻塞 / 'drop_oldest' 丢弃最旧命令 / 'drop_newest' 丢弃新命令。
+    只有 update_points* / update_boxes / update_lines / set_visible 这类会被下一条更新取代的命令可能被丢弃，
+    add_* / set_robot / remove_actor 等结构性命令及 batch 消息在队列满时总是阻塞等待。
+    drop_oldest 在客户端另有一个长度为 max_queue 的有序发送缓冲，只在缓冲中挑选最旧的可丢弃命令
+    丢弃与合并的数量可通过 queue_stats() 查询
 
-def create_visualizer_subprocess() -> VTKVisualizerRemote:
-    q_request = Queue()
-    Process(target=sub_main, args=(q_request,)).start()
-    return _RemoteProcedureCallClient(q_request)
+    每次调用返回 concurrent.futures.Future，在子进程执行并渲染后完成，结果中的 vtk 对象与 VRobot 等句柄替换为 None，
+    其他无法传回的返回值以 TypeError 失败；
+    被丢弃的命令 future 为 cancelled，被合并的命令结果为 None。viz.aio 下的调用返回可 await 的 asyncio.Future。
+    """
+    q_request = Queue(max_queue)
+    q_release = Queue()
+    q_unlinked = Queue()
+    q_reply = Queue()
+    stats = _CommandStats()
+    pool = None
+    if shared_memory:
+        pool = _SharedMemoryPool(q_release, shm_threshold, shm_max_bytes, q_unlinked)
+        # 子进程 attach 共享内存时会向 resource tracker 注册，先启动 tracker 让父子进程共用同一个
+        resource_tracker.ensure_running()
+    channel = _RemoteChannel(q_request, pool, stats, overflow, q_reply, max_queue)
+    viz_kwargs = dict(max_fps=max_fps, min_poll_ms=min_poll_ms, max_poll_ms=max_poll_ms, headless=headless,
+                      size=size)
+    process = Process(target=sub_main,
+                      args=(q_request, q_release, stats, coalesce, q_reply, viz_kwargs, q_unlinked))
+    process.start()
+    channel.process = process
+    if pool is not None or headless:
+        atexit.register(_shutdown, process, pool, q_request if headless else None)
+    return _RemoteProcedureCallClient(channel)